@@ -6,7 +6,8 @@ from django.contrib import admin
 class WeatherRecordAdmin(admin.ModelAdmin):
     """Admin configuration for WeatherRecord model."""
 
-    search_fields = ("station",)
+    search_fields = ("station__code",)
+    list_select_related = ("station",)
     list_display = (
         "id",
         "date",
@@ -21,7 +22,8 @@ class WeatherRecordAdmin(admin.ModelAdmin):
 class StatisticAdmin(admin.ModelAdmin):
     """Admin configuration for Statistic model."""
 
-    search_fields = ("station",)
+    search_fields = ("station__code",)
+    list_select_related = ("station",)
     list_display = (
         "id",
         "average_max_temperature",
@@ -30,3 +32,69 @@ class StatisticAdmin(admin.ModelAdmin):
         "year",
         "station",
     )
+
+
+@admin.register(MonthlyStatistic)
+class MonthlyStatisticAdmin(admin.ModelAdmin):
+    """Admin configuration for MonthlyStatistic model."""
+
+    search_fields = ("station__code",)
+    list_select_related = ("station",)
+    list_display = ("id", "year", "month", "observations", "missing_days", "station")
+
+
+@admin.register(SeasonalStatistic)
+class SeasonalStatisticAdmin(admin.ModelAdmin):
+    """Admin configuration for SeasonalStatistic model."""
+
+    search_fields = ("station__code",)
+    list_select_related = ("station",)
+    list_display = ("id", "year", "season", "observations", "missing_days", "station")
+
+
+@admin.register(CropYield)
+class CropYieldAdmin(admin.ModelAdmin):
+    """Admin configuration for CropYield model."""
+
+    list_display = ("id", "year", "corn_grain_yield")
+
+
+@admin.register(QuarantinedRecord)
+class QuarantinedRecordAdmin(admin.ModelAdmin):
+    """Admin configuration for QuarantinedRecord model."""
+
+    search_fields = ("station__code",)
+    list_select_related = ("station",)
+    list_filter = ("reason",)
+    list_display = ("id", "date", "reason", "file", "station")
+
+
+@admin.register(StationQuality)
+class StationQualityAdmin(admin.ModelAdmin):
+    """Admin configuration for StationQuality model."""
+
+    search_fields = ("station__code",)
+    list_select_related = ("station",)
+    list_display = (
+        "id",
+        "records",
+        "missing_days",
+        "coverage",
+        "quarantined_records",
+        "station",
+    )
+
+
+@admin.register(IngestionRun)
+class IngestionRunAdmin(admin.ModelAdmin):
+    """Admin configuration for IngestionRun model."""
+
+    list_display = (
+        "id",
+        "started_at",
+        "finished_at",
+        "files_scanned",
+        "rows_parsed",
+        "rows_inserted",
+        "conflicts_skipped",
+    )
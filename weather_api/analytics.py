@@ -0,0 +1,105 @@
+import numpy as np
+from threading import Lock
+from django.db.models import Avg
+from .metrics import record_cache
+from .models import CropYield, Statistic
+from .stations import station_ids
+from .versioning import data_version_token
+
+CORRELATION_METRICS = (
+    "average_max_temperature",
+    "average_min_temperature",
+    "total_precipitation",
+)
+MAX_CACHED_ARRAYS = 64
+
+_lock = Lock()
+_arrays = {}
+
+
+class YearlyArrays:
+    """Years with both statistics and a corn yield, as aligned NumPy arrays: one row of `metrics` per correlation metric."""
+
+    def __init__(self, years, metrics, yields):
+        self.years = years
+        self.metrics = metrics
+        self.yields = yields
+
+    @classmethod
+    def build(cls, stations=None):
+        """Averages Statistic over the selected stations per year and aligns it with the yields."""
+        queryset = Statistic.objects.all()
+        if stations:
+            queryset = queryset.filter(station_id__in=station_ids(stations))
+        rows = list(
+            queryset.values("year")
+            .annotate(**{metric: Avg(metric) for metric in CORRELATION_METRICS})
+            .order_by("year")
+            .values_list("year", *CORRELATION_METRICS)
+        )
+        yields = dict(CropYield.objects.values_list("year", "corn_grain_yield"))
+        rows = [row for row in rows if row[0] in yields]
+        table = np.array(rows, dtype=np.float64).reshape(-1, len(CORRELATION_METRICS) + 1)
+        years = table[:, 0].astype(np.int64)
+        return cls(
+            years,
+            table[:, 1:].T.copy(),
+            np.array([yields[year] for year in years.tolist()], dtype=np.float64),
+        )
+
+    def between(self, year_from=None, year_to=None):
+        """Restricts the arrays to an inclusive year range."""
+        keep = np.ones(len(self.years), dtype=bool)
+        if year_from is not None:
+            keep &= self.years >= year_from
+        if year_to is not None:
+            keep &= self.years <= year_to
+        return YearlyArrays(self.years[keep], self.metrics[:, keep], self.yields[keep])
+
+
+def yearly_arrays(stations=None):
+    """Returns the YearlyArrays of a station selection, built once per data version and kept in process."""
+    key = (data_version_token(), tuple(sorted(stations or ())))
+    arrays = _arrays.get(key)
+    record_cache("yearly_arrays", arrays is not None)
+    if arrays is None:
+        arrays = YearlyArrays.build(stations)
+        with _lock:
+            if len(_arrays) >= MAX_CACHED_ARRAYS or any(k[0] != key[0] for k in _arrays):
+                _arrays.clear()
+            _arrays[key] = arrays
+    return arrays
+
+
+def correlate(metrics, values):
+    """Pearson correlation and least squares slope of `values` against every row of `metrics` at once."""
+    x = metrics - metrics.mean(axis=1, keepdims=True)
+    y = values - values.mean()
+    covariance = x @ y
+    variance = np.einsum("ij,ij->i", x, x)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = covariance / np.sqrt(variance * (y @ y))
+        slope = covariance / variance
+    return r, slope
+
+
+def yield_correlation(stations=None, year_from=None, year_to=None):
+    """Correlates yearly corn grain yield with the yearly averages of each statistic."""
+    arrays = yearly_arrays(stations).between(year_from, year_to)
+    if len(arrays.years) < 3:
+        r = slope = np.full(len(CORRELATION_METRICS), np.nan)
+    else:
+        r, slope = correlate(arrays.metrics, arrays.yields)
+    return {
+        "years": len(arrays.years),
+        "year_from": int(arrays.years[0]) if len(arrays.years) else None,
+        "year_to": int(arrays.years[-1]) if len(arrays.years) else None,
+        "correlations": [
+            {
+                "metric": metric,
+                "r": None if np.isnan(r[i]) else round(float(r[i]), 4),
+                "slope": None if np.isnan(slope[i]) else round(float(slope[i]), 4),
+            }
+            for i, metric in enumerate(CORRELATION_METRICS)
+        ],
+    }
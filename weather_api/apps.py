@@ -1,6 +1,28 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def create_partitions(sender, using, **kwargs):
+    """Creates the yearly WeatherRecord partitions ahead of ingestion after every migrate."""
+    from .partitions import ensure_partitions_ahead, forget_partitions
+
+    forget_partitions(using)
+    ensure_partitions_ahead(using)
 
 
 class WeatherApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "weather_api"
+
+    def ready(self):
+        # Connects the signals that keep the station code cache current.
+        from . import stations  # noqa: F401
+
+        post_migrate.connect(create_partitions, sender=self)
+
+        # Every new connection gets the execute wrapper that times the SQL of
+        # the request it runs for, in whichever thread that happens.
+        from .middleware import install_query_timer
+
+        connection_created.connect(install_query_timer)
@@ -0,0 +1,104 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.status import HTTP_400_BAD_REQUEST
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .models import Statistic, WeatherRecord
+from .pagination import page_count
+from .queries import filter_weather_records
+from .stations import station_codes, station_id
+
+WEATHER_FIELDS = (
+    "station",
+    "date",
+    "maximum_temperature",
+    "minimum_temperature",
+    "precipitation",
+)
+STATISTIC_FIELDS = (
+    "station",
+    "year",
+    "average_max_temperature",
+    "average_min_temperature",
+    "total_precipitation",
+)
+
+
+def page_link(request, offset, limit):
+    """Builds the URL of the limit/offset page starting at `offset`."""
+    url = replace_query_param(request.build_absolute_uri(), "limit", limit)
+    if offset <= 0:
+        return remove_query_param(url, "offset")
+    return replace_query_param(url, "offset", offset)
+
+
+def page_bounds(request):
+    """Reads limit and offset like LimitOffsetPagination, falling back to the defaults on bad values."""
+    try:
+        limit = int(request.GET["limit"])
+        limit = limit if limit > 0 else settings.REST_FRAMEWORK["PAGE_SIZE"]
+    except (KeyError, ValueError):
+        limit = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    try:
+        offset = max(int(request.GET["offset"]), 0)
+    except (KeyError, ValueError):
+        offset = 0
+    return limit, offset
+
+
+async def paginated_response(request, queryset, fields):
+    """
+    Counts and fetches one limit/offset page without blocking the event loop,
+    in the same shape as the DRF views. The count follows the same estimate
+    and cache strategy as EstimatedCountPagination.
+    """
+    limit, offset = page_bounds(request)
+    count, count_exact = await sync_to_async(page_count)(queryset)
+    page = queryset.values(*fields)[offset : offset + limit]
+    rows = [row async for row in page.aiterator(chunk_size=limit)]
+    codes = await sync_to_async(station_codes)({row["station"] for row in rows})
+    for row in rows:
+        row["station"] = codes[row["station"]]
+    return JsonResponse(
+        {
+            "count": count,
+            "count_exact": count_exact,
+            "next": page_link(request, offset + limit, limit)
+            if offset + limit < count
+            else None,
+            "previous": page_link(request, offset - limit, limit) if offset > 0 else None,
+            "results": rows,
+        }
+    )
+
+
+@require_GET
+async def weather_records(request):
+    """Async list of WeatherRecord rows, filtered by date, date range and stations like /api/weather/."""
+    try:
+        queryset = await sync_to_async(filter_weather_records)(
+            WeatherRecord.objects.all(), request.GET
+        )
+        return await paginated_response(request, queryset, WEATHER_FIELDS)
+    except Exception as error:
+        return JsonResponse({"error": str(error)}, status=HTTP_400_BAD_REQUEST)
+
+
+@require_GET
+async def statistics(request):
+    """Async list of Statistic rows, filtered by year and station like /api/weather/stats/."""
+    try:
+        queryset = Statistic.objects.all()
+        year = request.GET.get("year", None)
+        station = request.GET.get("station", None)
+
+        if year:
+            queryset = queryset.filter(year=year)
+        if station:
+            queryset = queryset.filter(
+                station_id=await sync_to_async(station_id)(station)
+            )
+        return await paginated_response(request, queryset, STATISTIC_FIELDS)
+    except Exception as error:
+        return JsonResponse({"error": str(error)}, status=HTTP_400_BAD_REQUEST)
@@ -0,0 +1,58 @@
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from weather_api.pool import get_pool
+
+
+def is_alive(connection):
+    """Runs a trivial query to tell whether an idle pooled connection still works."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return True
+    except base.Database.Error:
+        return False
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend that borrows connections from a per-process pool
+    (weather_api.pool) instead of opening one per request. Closing a
+    connection, which Django does at the end of every request, rolls back any
+    open transaction and hands it back to the pool. Sized and tuned by the
+    "POOL" entry of the database settings.
+    """
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get("POOL", {})
+        return get_pool(
+            (self.alias, self.settings_dict["NAME"]),
+            max_size=options.get("MAX_SIZE", 10),
+            timeout=options.get("TIMEOUT", 30.0),
+            max_lifetime=options.get("MAX_LIFETIME", 3600.0),
+            check=is_alive,
+            check_after=options.get("CHECK_AFTER", 30.0),
+        )
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.checkout(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+        )
+        # Set by the parent while connecting, which reused connections skip.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        reusable = True
+        try:
+            if not self.connection.closed and not self.autocommit:
+                self.connection.rollback()
+        except base.Database.Error:
+            reusable = False
+        self.pool.checkin(self.connection, reusable)
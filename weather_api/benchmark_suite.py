@@ -0,0 +1,162 @@
+import sys
+import json
+import platform
+import numpy as np
+from pathlib import Path
+from datetime import date
+from time import perf_counter
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import setup_databases, teardown_databases
+from .benchmarks import benchmark_parsers, benchmark_queries
+from .dump import dump_rollups, dump_statistics, dump_wx_data
+from .partitions import forget_partitions
+from .stations import clear_station_cache, STATE_CODES
+from .versioning import bump_data_version
+
+# Relative change beyond which a metric counts as a regression.
+DEFAULT_THRESHOLD = 0.25
+# Changes smaller than this, in the metric's unit, are noise whatever their ratio.
+NOISE_FLOORS = {"_ms": 1.0, "_seconds": 0.25}
+STATES = sorted(STATE_CODES)
+
+
+def synthetic_station_code(index):
+    """Returns a GHCN style US cooperative station code that is unique for index < 10000."""
+    return f"USC00{STATES[index % len(STATES)]}{index:04d}"
+
+
+def generate_station_file(path, first_year, last_year, rng, missing=0.02):
+    """
+    Writes one station file in the wx_data format: tab separated YYYYMMDD,
+    maximum and minimum temperature in tenths of a degree Celsius and
+    precipitation in tenths of a millimetre, with -9999 for missing values.
+    """
+    days = np.arange(
+        np.datetime64(date(first_year, 1, 1)),
+        np.datetime64(date(last_year + 1, 1, 1)),
+        dtype="datetime64[D]",
+    )
+    day_of_year = (days - days.astype("datetime64[Y]")).astype(np.int64)
+    season = np.cos(2 * np.pi * (day_of_year - 200) / 365.25)
+    offset = rng.normal(0, 40)
+    maximum = 150 + offset + 150 * season + rng.normal(0, 40, len(days))
+    minimum = maximum - np.abs(rng.normal(110, 30, len(days)))
+    precipitation = np.where(rng.random(len(days)) < 0.7, 0, rng.gamma(1.5, 60, len(days)))
+    years = days.astype("datetime64[Y]")
+    months = days.astype("datetime64[M]")
+    stamps = (
+        (years.astype(np.int64) + 1970) * 10000
+        + (months - years).astype(np.int64) * 100
+        + 100
+        + (days - months).astype(np.int64)
+        + 1
+    )
+    columns = np.column_stack([stamps, maximum, minimum, precipitation]).astype(np.int64)
+    columns[:, 1:][rng.random((len(days), 3)) < missing] = -9999
+    np.savetxt(path, columns, fmt="%d\t%5d\t%5d\t%5d")
+    return len(days)
+
+
+def generate_wx_data(folder, stations=167, first_year=1985, last_year=2014, seed=0):
+    """Generates `stations` synthetic station files in `folder`; the same seed gives the same files."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    rows = 0
+    for index in range(stations):
+        path = folder / f"{synthetic_station_code(index)}.txt"
+        rows += generate_station_file(path, first_year, last_year, rng)
+    return rows
+
+
+def run_suite(folder, repeat=50, batch_size=None, loader=None):
+    """
+    Measures the parse rate of every parser, the load rate of a full ingestion,
+    the statistics and rollup build times and the p50/p99 latency of the list
+    endpoints, in a throwaway test database so no loaded data is touched.
+    Returns flat {metric: value} results.
+    """
+    metrics = {}
+    files = sum(1 for _ in Path(folder).glob("*.txt"))
+    for result in benchmark_parsers(folder, files=files):
+        metrics[f"parse.{result['name']}.rows_per_second"] = result["rows_per_second"]
+
+    old_config = setup_databases(verbosity=0, interactive=False)
+    clear_station_cache()
+    forget_partitions()
+    try:
+        start = perf_counter()
+        ingestion = dump_wx_data(
+            batch_size=batch_size, folder=folder, loader=loader, force=True
+        )
+        elapsed = perf_counter() - start
+        metrics["load.rows"] = ingestion.rows
+        metrics["load.rows_per_second"] = round(ingestion.rows / max(elapsed, 1e-9))
+        for name, build in (("statistics", dump_statistics), ("rollups", dump_rollups)):
+            start = perf_counter()
+            build()
+            metrics[f"{name}.build_seconds"] = round(perf_counter() - start, 4)
+        bump_data_version()
+        for result in benchmark_queries(repeat):
+            metrics[f"queries.{result['name']}.p50_ms"] = result["p50_ms"]
+            metrics[f"queries.{result['name']}.p99_ms"] = result["p99_ms"]
+        vendor = connection.vendor
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        clear_station_cache()
+        forget_partitions()
+    return {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "database": vendor,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "files": files,
+            "repeat": repeat,
+        },
+        "metrics": metrics,
+    }
+
+
+def higher_is_better(metric):
+    return metric.endswith("_per_second")
+
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares results with a baseline, metric by metric. Returns one dict per
+    metric present in both, with its relative change (positive means worse)
+    and whether it regressed beyond `threshold`.
+    """
+    comparisons = []
+    for metric, value in results["metrics"].items():
+        previous = baseline["metrics"].get(metric)
+        if previous is None or metric == "load.rows":
+            continue
+        worse = previous - value if higher_is_better(metric) else value - previous
+        change = worse / previous if previous else 0.0
+        floor = next(
+            (floor for suffix, floor in NOISE_FLOORS.items() if metric.endswith(suffix)),
+            0,
+        )
+        comparisons.append(
+            {
+                "metric": metric,
+                "baseline": previous,
+                "value": value,
+                "change": round(change, 3),
+                "regressed": change > threshold and worse > floor,
+            }
+        )
+    return comparisons
+
+
+def save_results(results, path):
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)
@@ -0,0 +1,340 @@
+import asyncio
+import tempfile
+import numpy as np
+from time import perf_counter
+from pathlib import Path
+from urllib.parse import urlsplit
+from itertools import islice
+from django.conf import settings
+from django.test import Client, override_settings
+from rest_framework.renderers import JSONRenderer
+from django.db import connection, transaction
+from .loaders import get_loader
+from .parsers import PARSERS
+from .stations import station_code
+from .columnar import Snapshot, build_snapshot
+from .queries import aggregate_weather_records, filter_weather_records
+from .models import Station, Statistic, WeatherRecord
+from .dump import batched, iter_station_files, parse_station_file
+from .serializers import (
+    StatisticSerializer,
+    WeatherRecordSerializer,
+    lean_columns,
+    lean_data,
+)
+
+
+def sample_rows(folder=None, files=5, prefix="bench-"):
+    """Parses the first `files` station files, renaming stations so they never clash with loaded data."""
+    rows = []
+    for station, path in islice(iter_station_files(folder), files):
+        rows.extend(
+            (prefix + station, *row[1:]) for row in parse_station_file(station, path)
+        )
+    return rows
+
+
+def benchmark_loaders(folder=None, files=5, batch_size=None, loaders=None):
+    """Measures rows per second for each loader; every run is rolled back afterwards."""
+    batch_size = batch_size or settings.INGEST_BATCH_SIZE
+    if loaders is None:
+        loaders = ["orm", "copy"] if connection.vendor == "postgresql" else ["orm"]
+    rows = sample_rows(folder, files)
+    results = []
+    for name in loaders:
+        loader = get_loader(name)
+        with transaction.atomic():
+            start = perf_counter()
+            for batch in batched(rows, batch_size):
+                loader.load(batch)
+            elapsed = perf_counter() - start
+            transaction.set_rollback(True)
+        results.append(
+            {
+                "name": name,
+                "rows": len(rows),
+                "seconds": round(elapsed, 4),
+                "rows_per_second": round(len(rows) / max(elapsed, 1e-9)),
+            }
+        )
+    return results
+
+
+def benchmark_parsers(folder=None, files=5, batch_size=None):
+    """Measures rows per second for each station file parser and its speedup over the text parser."""
+    paths = list(islice(iter_station_files(folder), files))
+    results = []
+    for name, parser in PARSERS.items():
+        start = perf_counter()
+        rows = sum(len(parser(station, path)) for station, path in paths)
+        elapsed = perf_counter() - start
+        results.append(
+            {
+                "name": name,
+                "rows": rows,
+                "seconds": round(elapsed, 4),
+                "rows_per_second": round(rows / max(elapsed, 1e-9)),
+            }
+        )
+    baseline = next(result for result in results if result["name"] == "text")
+    for result in results:
+        result["speedup"] = round(baseline["seconds"] / max(result["seconds"], 1e-9), 1)
+    return results
+
+
+def query_cases():
+    """Builds the main endpoint filter combinations, using a station, date and year present in the database."""
+    record = WeatherRecord.objects.exclude(date=None).first()
+    if record is None:
+        return []
+    station, day = station_code(record.station_id), record.date.isoformat()
+    stations = ",".join(Station.objects.order_by("code").values_list("code", flat=True)[:3])
+    year = Statistic.objects.values_list("year", flat=True).first() or record.date.year
+    year_range = {
+        "date_from": f"{record.date.year}-01-01",
+        "date_to": f"{record.date.year}-12-31",
+    }
+    return [
+        ("weather", "/api/weather/", {}),
+        ("weather?station", "/api/weather/", {"station": station}),
+        ("weather?date", "/api/weather/", {"date": day}),
+        ("weather?station&date", "/api/weather/", {"station": station, "date": day}),
+        ("weather?date_range", "/api/weather/", year_range),
+        ("weather?station&date_range", "/api/weather/", {"station": station, **year_range}),
+        ("weather?stations", "/api/weather/", {"station": stations}),
+        ("weather?station&cursor", "/api/weather/", {"station": station, "pagination": "cursor"}),
+        ("weather?station&group_by", "/api/weather/", {"station": station, "group_by": "month"}),
+        ("stats", "/api/weather/stats/", {}),
+        ("stats?station", "/api/weather/stats/", {"station": station}),
+        ("stats?year", "/api/weather/stats/", {"year": year}),
+    ]
+
+
+def benchmark_queries(repeat=50):
+    """Measures p50/p99 latency of the list endpoints for each main filter combination, with the response cache off."""
+    client = Client()
+    results = []
+    with override_settings(RESPONSE_CACHE={"ENABLED": False}):
+        for name, path, params in query_cases():
+            # Untimed, so the first request's cold caches do not end up as p99.
+            client.get(path, params)
+            timings = []
+            for _ in range(repeat):
+                start = perf_counter()
+                response = client.get(path, params)
+                timings.append(perf_counter() - start)
+            p50, p99 = np.percentile(timings, [50, 99]) * 1000
+            results.append(
+                {
+                    "name": name,
+                    "status": response.status_code,
+                    "p50_ms": round(float(p50), 2),
+                    "p99_ms": round(float(p99), 2),
+                }
+            )
+    return results
+
+
+def benchmark_serialization(rows=1000, repeat=20):
+    """
+    Measures the cost per 1,000 rows of fetching and rendering a list page
+    with the ModelSerializer and with the lean values() path, and checks both
+    render the same bytes.
+    """
+    renderer = JSONRenderer()
+    results = []
+    for serializer_class in (WeatherRecordSerializer, StatisticSerializer):
+        queryset = serializer_class.Meta.model.objects.all()[:rows]
+        values = queryset.values(*lean_columns(serializer_class))
+        count = max(queryset.count(), 1)
+        paths = {
+            "model_serializer": lambda: serializer_class(
+                list(queryset.all()), many=True
+            ).data,
+            "lean": lambda: lean_data(serializer_class, list(values.all())),
+        }
+        rendered = {}
+        for mode, serialize in paths.items():
+            timings = []
+            for _ in range(repeat):
+                start = perf_counter()
+                rendered[mode] = renderer.render(serialize())
+                timings.append(perf_counter() - start)
+            results.append(
+                {
+                    "name": f"{serializer_class.Meta.model.__name__}:{mode}",
+                    "rows": count,
+                    "ms_per_1000_rows": round(
+                        float(np.median(timings)) * 1000 * 1000 / count, 3
+                    ),
+                }
+            )
+        model_serializer, lean = results[-2:]
+        lean["identical"] = rendered["lean"] == rendered["model_serializer"]
+        lean["speedup"] = round(
+            model_serializer["ms_per_1000_rows"] / max(lean["ms_per_1000_rows"], 1e-9), 1
+        )
+    return results
+
+
+def aggregate_cases():
+    """Builds ?group_by= filter combinations using a station and year present in the database."""
+    record = WeatherRecord.objects.exclude(date=None).first()
+    if record is None:
+        return []
+    station, year = station_code(record.station_id), record.date.year
+    years = {"date_from": f"{year}-01-01", "date_to": f"{year + 4}-12-31"}
+    return [
+        ("month", {}),
+        ("year", {}),
+        ("month?station", {"station": station}),
+        ("year?station&date_range", {"station": station, **years}),
+        ("month?date_range", years),
+    ]
+
+
+def benchmark_columnar(repeat=20):
+    """
+    Measures the p50 latency of computing ?group_by= aggregates with a SQL
+    GROUP BY and from a columnar snapshot built in a temporary directory, and
+    checks both return the same rows.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        with override_settings(COLUMNAR_SNAPSHOT={"ENABLED": True, "DIR": directory}):
+            start = perf_counter()
+            build_snapshot(version=0)
+            results.append(
+                {"name": "build", "seconds": round(perf_counter() - start, 4)}
+            )
+            snapshot = Snapshot(Path(directory) / "v0")
+        for name, params in aggregate_cases():
+            group_by = name.split("?")[0]
+            paths = {
+                "sql": lambda: list(
+                    aggregate_weather_records(
+                        filter_weather_records(WeatherRecord.objects.all(), params),
+                        group_by,
+                    )
+                ),
+                "columnar": lambda: list(snapshot.aggregate(params, group_by)),
+            }
+            latencies, rows = {}, {}
+            for path, aggregate in paths.items():
+                timings = []
+                for _ in range(repeat):
+                    start = perf_counter()
+                    rows[path] = aggregate()
+                    timings.append(perf_counter() - start)
+                latencies[path] = float(np.percentile(timings, 50)) * 1000
+            results.append(
+                {
+                    "name": name,
+                    "groups": len(rows["sql"]),
+                    "sql_p50_ms": round(latencies["sql"], 2),
+                    "columnar_p50_ms": round(latencies["columnar"], 2),
+                    "speedup": round(latencies["sql"] / max(latencies["columnar"], 1e-9), 1),
+                    "identical": same_aggregates(rows["sql"], rows["columnar"]),
+                }
+            )
+    return results
+
+
+def same_aggregates(expected, actual):
+    """Compares aggregate rows, reading PostgreSQL's numeric averages as floats."""
+
+    def normalized(row):
+        return {
+            key: float(value) if key.startswith("average_") and value is not None else value
+            for key, value in row.items()
+        }
+
+    return [normalized(row) for row in expected] == [normalized(row) for row in actual]
+
+
+async def fetch(reader, writer, host, path):
+    """Sends one keep-alive GET and reads the response; returns the status and whether the server kept the connection."""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = {
+        name.strip().lower(): value.strip()
+        for name, _, value in (line.partition(":") for line in lines[1:] if line)
+    }
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return int(lines[0].split()[1]), headers.get("connection", "").lower() != "close"
+
+
+async def load_test(url, paths, concurrency):
+    """Runs `paths` through `concurrency` keep-alive connections; returns the latencies, error count and total seconds."""
+    parts = urlsplit(url)
+    queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+    timings, errors = [], 0
+
+    async def client():
+        nonlocal errors
+        connection = None
+        while not queue.empty():
+            path = queue.get_nowait()
+            start = perf_counter()
+            try:
+                if connection is None:
+                    connection = await asyncio.open_connection(parts.hostname, parts.port or 80)
+                status, keep_alive = await fetch(*connection, parts.netloc, path)
+                if status != 200:
+                    errors += 1
+            except (OSError, asyncio.IncompleteReadError):
+                errors, keep_alive = errors + 1, False
+            timings.append(perf_counter() - start)
+            if not keep_alive and connection is not None:
+                connection[1].close()
+                connection = None
+        if connection is not None:
+            connection[1].close()
+
+    start = perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return timings, errors, perf_counter() - start
+
+
+def benchmark_http(url="http://127.0.0.1:8000", concurrency=100, requests=2000):
+    """
+    Load tests a running server with `concurrency` simultaneous clients,
+    comparing the sync /api/weather/ view with its async counterpart. Each
+    request has a distinct query string so the response cache never serves it.
+    """
+    record = WeatherRecord.objects.exclude(date=None).first()
+    query = f"station={station_code(record.station_id)}" if record else ""
+    results = []
+    for name, path in (
+        ("sync", "/api/weather/"),
+        ("async", "/api/async/weather/"),
+    ):
+        paths = [f"{path}?{query}&_={i}" for i in range(requests)]
+        timings, errors, elapsed = asyncio.run(load_test(url, paths, concurrency))
+        p50, p99 = np.percentile(timings, [50, 99]) * 1000
+        results.append(
+            {
+                "name": name,
+                "requests": requests,
+                "concurrency": concurrency,
+                "rps": round(requests / max(elapsed, 1e-9)),
+                "p50_ms": round(float(p50), 2),
+                "p99_ms": round(float(p99), 2),
+                "errors": errors,
+            }
+        )
+    return results
+
+
+BENCHMARKS = {
+    "columnar": benchmark_columnar,
+    "http": benchmark_http,
+    "loaders": benchmark_loaders,
+    "parsers": benchmark_parsers,
+    "queries": benchmark_queries,
+    "serialization": benchmark_serialization,
+}
@@ -0,0 +1,153 @@
+import hashlib
+from functools import wraps
+from threading import Lock
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+from django.utils.module_loading import import_string
+from .metrics import record_cache
+from .versioning import data_version_token, get_data_version
+
+
+class LocMemLRUBackend:
+    """In-process response cache holding at most `max_entries` entries, evicting the least recently used."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class DjangoCacheBackend:
+    """
+    Stores responses in a configured Django cache alias, so several processes
+    can share them. Point the alias at Redis in production (with an LRU
+    maxmemory policy) or at the file based cache as a local stand-in.
+    """
+
+    def __init__(self, alias="responses", timeout=None):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, entry):
+        self.cache.set(key, entry, self.timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+_backend = {}
+
+
+def get_response_cache():
+    """Returns the configured response cache backend, or None when response caching is off."""
+    config = settings.RESPONSE_CACHE
+    if not config.get("ENABLED", True):
+        return None
+    if "instance" not in _backend:
+        backend_class = import_string(config["BACKEND"])
+        _backend["instance"] = backend_class(**config.get("OPTIONS", {}))
+    return _backend["instance"]
+
+
+def response_cache_key(request, version):
+    """
+    Builds the cache key from the scheme, host, path, sorted query string,
+    renderer and data version. Pages embed absolute next/previous links, so
+    each host and scheme gets its own entry.
+    """
+    query = sorted(request.query_params.lists())
+    renderer = getattr(request.accepted_renderer, "format", "")
+    raw = (
+        f"{request.scheme}://{request.get_host()}{request.path}"
+        f"|{query!r}|{renderer}|{version}"
+    )
+    return f"response:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def is_not_modified(request, entry):
+    """Evaluates If-None-Match, then If-Modified-Since, against a cache entry."""
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or entry["etag"] in tags
+    if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since"))
+    return (
+        if_modified_since is not None
+        and int(entry["last_modified"]) <= if_modified_since
+    )
+
+
+def add_validators(response, entry, state):
+    """Sets the revalidation headers of a cache entry, plus X-Cache showing whether it was a hit."""
+    response["ETag"] = entry["etag"]
+    response["Last-Modified"] = http_date(entry["last_modified"])
+    response["Cache-Control"] = "no-cache"
+    response["X-Cache"] = state
+    return response
+
+
+def cache_response(view_method):
+    """
+    Caches the fully rendered response of a GET list view until the next
+    ingestion bumps the data version. Responses carry ETag and Last-Modified
+    so clients can revalidate and get a 304 without a body.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        cache = get_response_cache()
+        if cache is None or request.method != "GET":
+            return view_method(self, request, *args, **kwargs)
+
+        version = get_data_version()
+        key = response_cache_key(request, data_version_token(version))
+        entry = cache.get(key)
+        record_cache("response", entry is not None)
+        response, state = None, "HIT"
+        if entry is None:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response = self.finalize_response(request, response, *args, **kwargs)
+            response.render()
+            digest = hashlib.sha256(response.content).hexdigest()[:32]
+            entry = {
+                "content": response.content,
+                "content_type": response["Content-Type"],
+                "etag": f'"{version.version}-{digest}"',
+                "last_modified": version.updated_at.timestamp(),
+            }
+            cache.set(key, entry)
+            state = "MISS"
+
+        if is_not_modified(request, entry):
+            return add_validators(HttpResponseNotModified(), entry, state)
+        if response is None:
+            response = HttpResponse(entry["content"], content_type=entry["content_type"])
+        return add_validators(response, entry, state)
+
+    return wrapper
@@ -0,0 +1,262 @@
+import os
+import json
+import shutil
+import logging
+import numpy as np
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+from collections.abc import Sequence
+from django.conf import settings
+from .models import WeatherRecord
+from .queries import split_stations
+from .stations import station_ids
+from .versioning import get_data_version
+
+logger = logging.getLogger(__name__)
+
+MEASUREMENTS = ("maximum_temperature", "minimum_temperature", "precipitation")
+COLUMNS = ("date", *MEASUREMENTS)
+# Stands for NULL in the int32 measurement columns.
+NULL = np.iinfo(np.int32).min
+EPOCH = np.datetime64("1970-01-01", "D")
+# NumPy datetime units of the aggregation periods.
+PERIOD_UNITS = {"month": "M", "year": "Y"}
+
+_lock = Lock()
+_loaded = {}
+
+
+def snapshot_path(version):
+    """Returns the directory of the snapshot built for a data version number."""
+    return Path(settings.COLUMNAR_SNAPSHOT["DIR"]) / f"v{version}"
+
+
+def build_snapshot(version=None):
+    """
+    Writes the dated WeatherRecord rows as one .npy file per column, sorted by
+    station and date, plus an index.json holding each station's [start, end)
+    row range. Files are written to a temporary directory that is renamed into
+    place, then the snapshots of older data versions are removed.
+    """
+    start = perf_counter()
+    version = get_data_version().version if version is None else version
+    target = snapshot_path(version)
+    building = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+    shutil.rmtree(building, ignore_errors=True)
+    building.mkdir(parents=True)
+
+    records = WeatherRecord.objects.filter(date__isnull=False)
+    parts = {name: [] for name in COLUMNS}
+    stations = []
+    rows_count = 0
+    # One index-only scan per station, in id order, which is the API's station order.
+    pks = records.order_by("station_id").values_list("station_id", flat=True)
+    for pk in pks.distinct():
+        rows = list(
+            records.filter(station_id=pk).order_by("date").values_list(*COLUMNS)
+        )
+        dates = np.array([row[0] for row in rows], dtype="datetime64[D]")
+        parts["date"].append((dates - EPOCH).astype(np.int32))
+        for index, name in enumerate(MEASUREMENTS, start=1):
+            parts[name].append(
+                np.fromiter(
+                    (NULL if row[index] is None else row[index] for row in rows),
+                    np.int32,
+                    len(rows),
+                )
+            )
+        stations.append([pk, rows_count, rows_count + len(rows)])
+        rows_count += len(rows)
+
+    for name, arrays in parts.items():
+        column = np.concatenate(arrays) if arrays else np.empty(0, np.int32)
+        np.save(building / f"{name}.npy", column)
+    with open(building / "index.json", "w") as index:
+        json.dump({"version": version, "rows": rows_count, "stations": stations}, index)
+    try:
+        os.rename(building, target)
+    except OSError:
+        # Another process published this version first.
+        shutil.rmtree(building, ignore_errors=True)
+    for path in target.parent.glob("v*"):
+        if path != target and ".tmp-" not in path.name:
+            shutil.rmtree(path, ignore_errors=True)
+    logger.info(
+        f"Columnar snapshot built in : {perf_counter() - start:.2f} seconds. Rows count: {rows_count}"
+    )
+    return rows_count
+
+
+def ensure_snapshot():
+    """Builds the snapshot of the current data version unless it exists; returns whether one was built."""
+    version = get_data_version().version
+    if (snapshot_path(version) / "index.json").exists():
+        return False
+    build_snapshot(version)
+    return True
+
+
+class Snapshot:
+    """Memory-mapped columns of one snapshot, with the per-station row ranges of its index."""
+
+    def __init__(self, path):
+        with open(path / "index.json") as index:
+            meta = json.load(index)
+        self.version = meta["version"]
+        self.ranges = {pk: (start, end) for pk, start, end in meta["stations"]}
+        self.columns = {
+            name: np.load(path / f"{name}.npy", mmap_mode="r") for name in COLUMNS
+        }
+        self.station = np.repeat(
+            np.array([pk for pk, _, _ in meta["stations"]], dtype=np.int32),
+            [end - start for _, start, end in meta["stations"]],
+        )
+
+    def select(self, stations=None, date_from=None, date_to=None):
+        """
+        Returns the station column and the other columns of the rows of
+        `stations` (ids, all when None) between two dates, using the index to
+        read only those stations and a binary search on their sorted dates.
+        """
+        pks = sorted(self.ranges) if stations is None else sorted(set(stations))
+        lower = None if date_from is None else np.datetime64(date_from, "D") - EPOCH
+        upper = None if date_to is None else np.datetime64(date_to, "D") - EPOCH
+        slices = []
+        for pk in pks:
+            if pk not in self.ranges:
+                continue
+            first, last = self.ranges[pk]
+            dates = self.columns["date"][first:last]
+            start, end = first, last
+            if lower is not None:
+                start = first + int(np.searchsorted(dates, lower, "left"))
+            if upper is not None:
+                end = first + int(np.searchsorted(dates, upper, "right"))
+            if start < end:
+                slices.append(slice(start, end))
+        names = ("station", *COLUMNS)
+        sources = {"station": self.station, **self.columns}
+        if stations is None and lower is None and upper is None:
+            return {name: sources[name] for name in names}
+        return {
+            name: np.concatenate([sources[name][part] for part in slices])
+            if slices
+            else np.empty(0, np.int32)
+            for name in names
+        }
+
+    def aggregate(self, params, group_by):
+        """
+        Computes what queries.aggregate_weather_records returns for the same
+        request parameters with NumPy reductions over contiguous groups: rows
+        are sorted by station and date, so each (station, period) is one run.
+        """
+        if group_by not in PERIOD_UNITS:
+            raise ValueError(
+                f"group_by must be one of {', '.join(PERIOD_UNITS)}, not {group_by!r}"
+            )
+        field = WeatherRecord._meta.get_field("date")
+        day = params.get("date", None)
+        date_from = params.get("date_from", None)
+        date_to = params.get("date_to", None)
+        codes = split_stations(params.get("station", None) or "")
+        date_from = [field.to_python(value) for value in (day, date_from) if value]
+        date_to = [field.to_python(value) for value in (day, date_to) if value]
+        columns = self.select(
+            station_ids(codes) if codes else None,
+            max(date_from) if date_from else None,
+            min(date_to) if date_to else None,
+        )
+        return AggregateRows(columns, group_by)
+
+
+def reduce_groups(values, starts):
+    """Returns the minimum, maximum, sum and count of the non-NULL `values` of each group starting at `starts`."""
+    if not len(starts):
+        return tuple(np.empty(0, np.int64) for _ in range(4))
+    valid = values != NULL
+    values = values.astype(np.int64)
+    return (
+        np.minimum.reduceat(np.where(valid, values, np.iinfo(np.int64).max), starts),
+        np.maximum.reduceat(np.where(valid, values, np.iinfo(np.int64).min), starts),
+        np.add.reduceat(np.where(valid, values, 0), starts),
+        np.add.reduceat(valid.astype(np.int64), starts),
+    )
+
+
+class AggregateRows(Sequence):
+    """
+    Per station and period aggregates of selected snapshot columns. Groups are
+    reduced up front; the dicts are only built for the rows that are read, so
+    a page of a large result stays cheap.
+    """
+
+    def __init__(self, columns, group_by):
+        station = columns["station"]
+        periods = (
+            np.asarray(columns["date"])
+            .astype("datetime64[D]")
+            .astype(f"datetime64[{PERIOD_UNITS[group_by]}]")
+        )
+        boundary = (station[1:] != station[:-1]) | (periods[1:] != periods[:-1])
+        starts = np.flatnonzero(np.concatenate([[len(station) > 0], boundary]))
+        self.station = station[starts]
+        self.period = periods[starts].astype("datetime64[D]")
+        self.days = np.diff(np.append(starts, len(station)))
+        self.min_temperature, _, self.min_sum, self.min_count = reduce_groups(
+            columns["minimum_temperature"], starts
+        )
+        _, self.max_temperature, self.max_sum, self.max_count = reduce_groups(
+            columns["maximum_temperature"], starts
+        )
+        _, _, self.precipitation, self.precipitation_count = reduce_groups(
+            columns["precipitation"], starts
+        )
+
+    def __len__(self):
+        return len(self.station)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(len(self)))]
+        return self.row(range(len(self))[index])
+
+    def row(self, i):
+        """Builds the aggregate dict of group `i`, with None where SQL would return NULL."""
+        min_count, max_count = self.min_count[i], self.max_count[i]
+        return {
+            "station": int(self.station[i]),
+            "period": self.period[i].item(),
+            "days": int(self.days[i]),
+            "min_temperature": int(self.min_temperature[i]) if min_count else None,
+            "max_temperature": int(self.max_temperature[i]) if max_count else None,
+            "average_min_temperature": (
+                float(self.min_sum[i] / min_count) if min_count else None
+            ),
+            "average_max_temperature": (
+                float(self.max_sum[i] / max_count) if max_count else None
+            ),
+            "total_precipitation": (
+                int(self.precipitation[i]) if self.precipitation_count[i] else None
+            ),
+        }
+
+
+def current_snapshot():
+    """
+    Returns the Snapshot of the current data version when snapshots are
+    enabled and it has been built, otherwise None so callers fall back to SQL.
+    """
+    if not settings.COLUMNAR_SNAPSHOT["ENABLED"]:
+        return None
+    version = get_data_version().version
+    if version not in _loaded:
+        path = snapshot_path(version)
+        if not (path / "index.json").exists():
+            return None
+        snapshot = Snapshot(path)
+        with _lock:
+            _loaded.clear()
+            _loaded[version] = snapshot
+    return _loaded.get(version)
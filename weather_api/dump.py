@@ -1,120 +1,805 @@
 import os
+import django
+import calendar
+import hashlib
 import logging
-from datetime import datetime
+import numpy as np
+from collections import Counter
+from time import perf_counter
+from datetime import date
+from itertools import islice
+from typing import NamedTuple, Optional
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from django.db.models import Q
-from django.db import transaction
-from django.db.models import Avg, Sum
-from .models import WeatherRecord, Statistic
-from django.db.models.functions import ExtractYear
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    filename="log.log",
+from django.db.models import Avg, Case, Count, Max, Min, Sum, Value, When
+from .loaders import CopyLoader, get_loader
+from .stations import station_id
+from .partitions import swap_partition
+from .parsers import get_parser, parse_station_file
+from .pool import close_pools
+from .validation import validate_frame
+from .models import (
+    CropYield,
+    IngestedFile,
+    MonthlyStatistic,
+    QuarantinedRecord,
+    SeasonalStatistic,
+    Station,
+    StationQuality,
+    Statistic,
+    WeatherRecord,
 )
+from django.db.models.functions import ExtractMonth, ExtractYear
+
 logger = logging.getLogger(__name__)
 
+HASH_CHUNK_SIZE = 1 << 20
+STATISTIC_FIELDS = [
+    "average_max_temperature",
+    "average_min_temperature",
+    "total_precipitation",
+]
+ROLLUP_FIELDS = [
+    "observations",
+    "missing_days",
+    "min_temperature",
+    "max_temperature",
+    "average_min_temperature",
+    "average_max_temperature",
+    "total_precipitation",
+]
+QUALITY_FIELDS = [
+    "records",
+    "incomplete_records",
+    "first_date",
+    "last_date",
+    "missing_days",
+    "coverage",
+    "quarantined_records",
+    "quarantine_reasons",
+]
+SEASON_MONTHS = {
+    SeasonalStatistic.WINTER: (12, 1, 2),
+    SeasonalStatistic.SPRING: (3, 4, 5),
+    SeasonalStatistic.SUMMER: (6, 7, 8),
+    SeasonalStatistic.AUTUMN: (9, 10, 11),
+}
+
+
+def iter_station_files(folder=None):
+    """Yields (station, path) pairs for every txt file in the weather data folder, in name order."""
+    folder = folder or settings.WX_DATA_DIR
+    entries = sorted(
+        (entry for entry in os.scandir(folder) if entry.name.endswith(".txt")),
+        key=lambda entry: entry.name,
+    )
+    for entry in entries:
+        yield entry.name.split(".")[0], entry.path
+
 
-def read_data():
-    """Reads weather data from txt files in the 'data/wx_data' folder and returns a list of WeatherRecord objects."""
+def read_data(folder=None):
+    """Lazily reads weather rows from every txt file in the 'data/wx_data' folder, one file at a time."""
     logger.info("Reading txt files to dump data")
-    folder = "data/wx_data"
-    weather_data = []
+    for station, path in iter_station_files(folder):
+        yield from parse_station_file(station, path)
+
+
+def batched(iterable, size):
+    """Yields lists of at most `size` items from `iterable` without materialising it."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class FileResult(NamedTuple):
+    """Outcome of ingesting one station file; `inserted` is None when the loader cannot tell new rows from conflicts."""
+    station: str
+    rows: int = 0
+    status: str = "loaded"
+    error: Optional[str] = None
+    years: frozenset = frozenset()
+    parse_seconds: float = 0.0
+    load_seconds: float = 0.0
+    inserted: Optional[int] = None
+    quarantined: int = 0
+    validate_seconds: float = 0.0
+
+
+class IngestionResult(NamedTuple):
+    """
+    Summary of a dump_wx_data run; `touched` maps each station to the years
+    that received rows and `failures` each station whose file failed to its
+    error. Stage seconds are summed over files, so they exceed the wall time
+    when several workers run.
+    """
+    rows: int
+    touched: dict
+    statuses: dict
+    failures: dict
+    files: int = 0
+    parse_seconds: float = 0.0
+    load_seconds: float = 0.0
+    inserted: Optional[int] = None
+    quarantined: int = 0
+    validate_seconds: float = 0.0
+
+
+def hash_file(path, prefix_size=None):
+    """Returns the SHA-256 of the whole file and, in the same pass, of its first `prefix_size` bytes."""
+    digest = hashlib.sha256()
+    prefix_digest = None
+    with open(path, "rb") as input_file:
+        if prefix_size is not None:
+            while remaining := prefix_size - input_file.tell():
+                chunk = input_file.read(min(HASH_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+            prefix_digest = digest.copy().hexdigest()
+        while chunk := input_file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest(), prefix_digest
+
+
+def is_unchanged(path, manifest):
+    """Cheap check that a file still has the size and mtime recorded in its manifest entry."""
+    stat = os.stat(path)
+    return (
+        manifest is not None
+        and manifest.size == stat.st_size
+        and manifest.mtime == stat.st_mtime
+    )
+
+
+def quarantine(station, pk, path, parse_rejects, rejects, replace=False):
+    """
+    Stores the lines of a station file the parser could not read and the rows
+    validation rejected in QuarantinedRecord under the Station id `pk`,
+    returning how many there were. `replace` first drops what earlier runs
+    quarantined from the same file.
+    """
+    name = os.path.basename(path)
+    if replace:
+        QuarantinedRecord.objects.filter(station_id=pk, file=name).delete()
+    records = [
+        QuarantinedRecord(station_id=pk, file=name, reason=reason, line=line)
+        for line, reason in parse_rejects
+    ]
+    for reason, part in rejects:
+        records.extend(
+            QuarantinedRecord(
+                station_id=pk,
+                file=name,
+                reason=reason,
+                date=day,
+                maximum_temperature=maximum,
+                minimum_temperature=minimum,
+                precipitation=precipitation,
+            )
+            for _, day, maximum, minimum, precipitation in part.rows()
+        )
+    QuarantinedRecord.objects.bulk_create(records, batch_size=1000)
+    if records:
+        logger.info(f"{station}: {len(records)} rows quarantined")
+    return len(records)
+
+
+def delete_station_records(pk, using=DEFAULT_DB_ALIAS):
+    """Deletes every WeatherRecord of a Station id, returning the years they covered so their aggregates get refreshed."""
+    records = WeatherRecord.objects.using(using).filter(station_id=pk)
+    years = set(
+        records.filter(date__isnull=False)
+        .annotate(year=ExtractYear("date"))
+        .values_list("year", flat=True)
+        .order_by()
+        .distinct()
+    )
+    records.delete()
+    return years
+
+
+def ingest_station_file(station, path, loader, batch_size, manifest=None, parser=None):
+    """
+    Loads one station file in fixed-size batches, skipping it when unchanged
+    and loading only the new tail when it grew. A file read in full replaces
+    the station's rows, so corrected values and removed lines are not kept.
+    """
+    stat = os.stat(path)
+    prefix_size = manifest.size if manifest and stat.st_size > manifest.size else None
+    content_hash, prefix_hash = hash_file(path, prefix_size)
+    offset, status = 0, "loaded"
+    if manifest and manifest.content_hash == content_hash:
+        offset, status = stat.st_size, "skipped"
+    elif manifest and prefix_hash == manifest.content_hash:
+        offset, status = manifest.size, "appended"
+
+    parse_start = perf_counter()
+    frame = get_parser(parser)(station, path, offset)
+    parse_seconds = perf_counter() - parse_start
+    validate_start = perf_counter()
+    parse_rejects = frame.rejects
+    frame, rejects = validate_frame(frame)
+    validate_seconds = perf_counter() - validate_start
+    rows_count, load_seconds, inserted = 0, 0.0, 0
+    replaced_years = set()
+    with transaction.atomic(using=loader.using):
+        # Resolved once per file: inside the transaction the station cache
+        # is not filled, so a lookup per batch would query Station each time.
+        pk = station_id(station, create=True)
+        if status == "loaded":
+            replaced_years = delete_station_records(pk, loader.using)
+        batch_start = perf_counter()
+        for number, batch_offset in enumerate(range(0, len(frame), batch_size), 1):
+            batch = frame[batch_offset : batch_offset + batch_size]
+            batch_inserted = loader.load_frame(batch, pk)
+            if inserted is not None:
+                inserted = None if batch_inserted is None else inserted + batch_inserted
+            rows_count += len(batch)
+            elapsed = perf_counter() - batch_start
+            load_seconds += elapsed
+            logger.debug(
+                f"{station} batch {number}: {len(batch)} rows in {elapsed:.2f} seconds "
+                f"({len(batch) / max(elapsed, 1e-9):.0f} rows/s)"
+            )
+            batch_start = perf_counter()
+
+        # In the same transaction as the rows, so a failed load quarantines nothing.
+        quarantine_start = perf_counter()
+        quarantined = quarantine(
+            station, pk, path, parse_rejects, rejects, replace=status == "loaded"
+        )
+        validate_seconds += perf_counter() - quarantine_start
+        previous_rows = manifest.rows if manifest and status != "loaded" else 0
+        IngestedFile.objects.update_or_create(
+            name=os.path.basename(path),
+            defaults={
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "content_hash": content_hash,
+                "rows": previous_rows + rows_count,
+            },
+        )
+    return FileResult(
+        station,
+        rows_count,
+        status,
+        years=frozenset(frame.years() | replaced_years),
+        parse_seconds=parse_seconds,
+        load_seconds=load_seconds,
+        inserted=inserted,
+        quarantined=quarantined,
+        validate_seconds=validate_seconds,
+    )
+
+
+def _init_worker():
+    """Prepares a pool process: sets Django up when spawned and makes sure it opens its own connections."""
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def _ingest_station_worker(
+    station, path, loader_name, batch_size, manifest=None, parser=None
+):
+    """Process pool entry point; returns a FileResult instead of raising so one bad file stays isolated."""
     try:
-        with transaction.atomic():
-            for file in os.scandir(folder):
-                if file.name.endswith(".txt"):
-                    station = file.name.split(".")[0]
-
-                    with open(file.path, "r") as input_file:
-                        for row in input_file:
-                            data = row.strip().split("\t")
-                            try:
-                                date = (
-                                    datetime.strptime(data[0], "%Y%m%d").date()
-                                    if data[0] != "-9999"
-                                    else None
-                                )
-                                maximum_temperature = (
-                                    int(data[1]) if data[1] != "-9999" else None
-                                )
-                                minimum_temperature = (
-                                    int(data[2]) if data[2] != "-9999" else None
-                                )
-                                precipitation = (
-                                    int(data[3]) if data[3] != "-9999" else None
-                                )
-                            except (ValueError, IndexError):
-                                logging.warning(f"Skipping invalid data row: {row}")
-                                continue
-
-                            weather_data.append(
-                                WeatherRecord(
-                                    station=station,
-                                    date=date,
-                                    maximum_temperature=maximum_temperature,
-                                    minimum_temperature=minimum_temperature,
-                                    precipitation=precipitation,
-                                )
-                            )
-
-        end = datetime.now()
-        logging.info(f"File reading completed found {len(weather_data)} rows")
-        return weather_data
+        return ingest_station_file(
+            station, path, get_loader(loader_name), batch_size, manifest, parser
+        )
     except Exception as e:
-        logging.error(f"Error during ingestion: {str(e)}")
+        return FileResult(station, status="failed", error=str(e))
+
+
+def _ingest_serial(files, loader, batch_size, parser):
+    """Ingests station files one after another in the current process."""
+    for station, path, manifest in files:
+        try:
+            yield ingest_station_file(
+                station, path, loader, batch_size, manifest, parser
+            )
+        except Exception as e:
+            yield FileResult(station, status="failed", error=str(e))
+
+
+def _ingest_parallel(files, loader, batch_size, parser, workers):
+    """Ingests station files in a process pool, each worker loading through its own database connection."""
+    # Forked workers must not share the parent's sockets, so the connections
+    # are handed back and the pooled ones closed before forking.
+    connections.close_all()
+    close_pools()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {
+            pool.submit(
+                _ingest_station_worker,
+                station,
+                path,
+                loader.name,
+                batch_size,
+                manifest,
+                parser,
+            ): station
+            for station, path, manifest in files
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield FileResult(futures[future], status="failed", error=str(e))
 
 
-def dump_wx_data():
-    """Reads weather data using read_data() and bulk inserts it into the WeatherRecord model."""
-    start = datetime.now()
-    weather_data = []
+def dump_wx_data(
+    batch_size=None,
+    folder=None,
+    loader=None,
+    workers=1,
+    force=False,
+    parser=None,
+    progress=None,
+):
+    """
+    Loads new and changed station files into WeatherRecord in fixed-size
+    batches, optionally across `workers` processes. `progress` is called with
+    the number of files done and the number of files to load after each file.
+    A file that fails is logged and reported in `failures` without stopping
+    the others; any other error is logged and raised.
+    """
+    batch_size = batch_size or settings.INGEST_BATCH_SIZE
+    start = perf_counter()
+    rows_count = files_count = inserted = quarantined = 0
+    parse_seconds = load_seconds = validate_seconds = 0.0
+    statuses = Counter()
+    touched, failures = {}, {}
     try:
-        weather_data = read_data()
-        WeatherRecord.objects.bulk_create(weather_data, ignore_conflicts=True)
+        loader = loader if hasattr(loader, "load") else get_loader(loader)
+        logger.info(
+            f"Loading weather data with the {loader.name} loader and {workers} worker(s)"
+        )
+        manifests = {} if force else IngestedFile.objects.in_bulk(field_name="name")
+        files = []
+        for station, path in iter_station_files(folder):
+            files_count += 1
+            manifest = manifests.get(os.path.basename(path))
+            if is_unchanged(path, manifest):
+                statuses["skipped"] += 1
+            else:
+                files.append((station, path, manifest))
+        if workers > 1 and len(files) > 1:
+            results = _ingest_parallel(files, loader, batch_size, parser, workers)
+        else:
+            results = _ingest_serial(files, loader, batch_size, parser)
+        for done, result in enumerate(results, 1):
+            if progress is not None:
+                progress(done, len(files))
+            if result.error:
+                logger.error(
+                    f"Error in ingesting station {result.station}: {result.error}"
+                )
+                failures[result.station] = result.error
+            statuses[result.status] += 1
+            rows_count += result.rows
+            parse_seconds += result.parse_seconds
+            load_seconds += result.load_seconds
+            validate_seconds += result.validate_seconds
+            quarantined += result.quarantined
+            if result.rows and inserted is not None:
+                inserted = None if result.inserted is None else inserted + result.inserted
+            if result.years:
+                touched.setdefault(result.station, set()).update(result.years)
     except Exception as e:
         logger.error(f"Error in inserting weather row: {e}")
+        raise
     finally:
-        end = datetime.now()
+        elapsed = perf_counter() - start
         logger.info(
-            f"Weather Data inserted in : {(end-start).total_seconds()} seconds. Rows count: {len(weather_data)}"
+            f"Weather Data inserted in : {elapsed:.2f} seconds. Rows count: {rows_count}. "
+            f"Files: {dict(statuses)}. Parse: {parse_seconds:.2f} seconds. "
+            f"Validate: {validate_seconds:.2f} seconds. Quarantined: {quarantined}. "
+            f"Load: {load_seconds:.2f} seconds. Inserted: {inserted}"
+        )
+    return IngestionResult(
+        rows_count,
+        touched,
+        dict(statuses),
+        failures=failures,
+        files=files_count,
+        parse_seconds=parse_seconds,
+        load_seconds=load_seconds,
+        inserted=inserted,
+        quarantined=quarantined,
+        validate_seconds=validate_seconds,
+    )
+
+
+def yearly_statistics(queryset):
+    """Aggregates the complete rows of a WeatherRecord queryset into per station and year averages and totals."""
+    return (
+        queryset.exclude(
+            Q(maximum_temperature=None)
+            | Q(minimum_temperature=None)
+            | Q(precipitation=None)
+        )
+        .annotate(year=ExtractYear("date"))
+        .values("station", "year")
+        .annotate(
+            average_max_temperature=Avg("maximum_temperature"),
+            average_min_temperature=Avg("minimum_temperature"),
+            total_precipitation=Sum("precipitation"),
         )
+    )
 
 
-def dump_statistics():
-    """Calculates and bulk inserts yearly statistics for each weather station into the Statistic model."""
-    start = datetime.now()
+def touched_querysets(touched):
+    """Yields (station id, years, queryset) restricting WeatherRecord to the date span of each station's touched years."""
+    for code, years in touched.items():
+        station = station_id(code)
+        yield station, years, WeatherRecord.objects.filter(
+            station_id=station,
+            date__gte=date(min(years), 1, 1),
+            date__lt=date(max(years) + 1, 1, 1),
+        )
+
+
+def dump_statistics(touched=None):
+    """
+    Upserts yearly statistics into the Statistic model, for every station or
+    only the (station, year) pairs in `touched`, and returns how many were
+    written. Pairs left without complete rows lose their statistic, so full
+    and incremental runs agree. Errors are logged and raised.
+    """
+    start = perf_counter()
     statistics_list = []
+    upserted = 0
     try:
-        statistics = (
-            WeatherRecord.objects.exclude(
-                Q(maximum_temperature=None)
-                | Q(minimum_temperature=None)
-                | Q(precipitation=None)
+        if touched is None:
+            scopes = [(None, None, WeatherRecord.objects.all())]
+        else:
+            scopes = touched_querysets(touched)
+
+        stale = Q()
+        rebuilt = set()
+        for station, years, queryset in scopes:
+            computed = set()
+            for stat in yearly_statistics(queryset):
+                if years is not None and stat["year"] not in years:
+                    continue
+                computed.add(stat["year"])
+                rebuilt.add((stat["station"], stat["year"]))
+                statistics_list.append(
+                    Statistic(
+                        station_id=stat["station"],
+                        year=stat["year"],
+                        average_max_temperature=stat["average_max_temperature"],
+                        average_min_temperature=stat["average_min_temperature"],
+                        total_precipitation=stat["total_precipitation"],
+                    )
+                )
+            if years is not None and years - computed:
+                stale |= Q(station_id=station, year__in=years - computed)
+
+        Statistic.objects.bulk_create(
+            statistics_list,
+            update_conflicts=True,
+            unique_fields=["year", "station"],
+            update_fields=STATISTIC_FIELDS,
+        )
+        if touched is None:
+            stale_ids = [
+                pk
+                for pk, station, year in Statistic.objects.values_list(
+                    "id", "station_id", "year"
+                )
+                if (station, year) not in rebuilt
+            ]
+            if stale_ids:
+                Statistic.objects.filter(pk__in=stale_ids).delete()
+        elif stale:
+            Statistic.objects.filter(stale).delete()
+        upserted = len(statistics_list)
+    except Exception as e:
+        logger.error(f"Error in inserting statistics row: {e}")
+        raise
+    finally:
+        elapsed = perf_counter() - start
+        logger.info(
+            f"Statistics Data upserted in : {elapsed:.2f} seconds. Rows count: {upserted}"
+        )
+    return upserted
+
+
+def rollup_aggregates():
+    """Aggregates shared by every rollup; `complete` counts the days with all three measurements."""
+    return {
+        "observations": Count("id"),
+        "complete": Count(
+            "id",
+            filter=Q(
+                maximum_temperature__isnull=False,
+                minimum_temperature__isnull=False,
+                precipitation__isnull=False,
+            ),
+        ),
+        "min_temperature": Min("minimum_temperature"),
+        "max_temperature": Max("maximum_temperature"),
+        "average_min_temperature": Avg("minimum_temperature"),
+        "average_max_temperature": Avg("maximum_temperature"),
+        "total_precipitation": Sum("precipitation"),
+    }
+
+
+def monthly_rollups(queryset):
+    """Aggregates a WeatherRecord queryset per station, year and month."""
+    return (
+        queryset.filter(date__isnull=False)
+        .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .values("station", "year", "month")
+        .annotate(**rollup_aggregates())
+        .order_by()
+    )
+
+
+def seasonal_rollups(queryset):
+    """Aggregates a WeatherRecord queryset per station and meteorological season, December counting towards the next year."""
+    return (
+        queryset.filter(date__isnull=False)
+        .annotate(
+            year=Case(
+                When(date__month=12, then=ExtractYear("date") + 1),
+                default=ExtractYear("date"),
+            ),
+            season=Case(
+                *(
+                    When(date__month__in=months, then=Value(season))
+                    for season, months in SEASON_MONTHS.items()
+                )
+            ),
+        )
+        .values("station", "year", "season")
+        .annotate(**rollup_aggregates())
+        .order_by()
+    )
+
+
+def month_days(year, month):
+    """Number of days in a month."""
+    return calendar.monthrange(year, month)[1]
+
+
+def season_days(year, season):
+    """Number of days in a season, whose December falls in the previous year."""
+    return sum(
+        month_days(year - (month == 12), month) for month in SEASON_MONTHS[season]
+    )
+
+
+ROLLUPS = [
+    (MonthlyStatistic, "month", monthly_rollups, month_days, range(1, 13)),
+    (SeasonalStatistic, "season", seasonal_rollups, season_days, SEASON_MONTHS),
+]
+
+
+def rollup_targets(years, periods, period):
+    """Returns the (year, period) keys a change to `years` affects; the December of a year also moves the next winter."""
+    targets = {(year, value) for year in years for value in periods}
+    if period == "season":
+        targets |= {(year + 1, SeasonalStatistic.WINTER) for year in years}
+    return targets
+
+
+def dump_rollups(touched=None):
+    """
+    Upserts the monthly and seasonal rollups, for every station or only the
+    periods overlapping the years in `touched`, deleting the periods left
+    without rows. Errors are logged and raised.
+    """
+    start = perf_counter()
+    rows_count = 0
+    try:
+        if touched is None:
+            scopes = [(None, None, WeatherRecord.objects.all())]
+        else:
+            scopes = []
+            for code, years in touched.items():
+                station = station_id(code)
+                # Widened by a season on each side, so winters spanning two years are complete.
+                queryset = WeatherRecord.objects.filter(
+                    station_id=station,
+                    date__gte=date(min(years) - 1, 12, 1),
+                    date__lt=date(max(years) + 1, 3, 1),
+                )
+                scopes.append((station, years, queryset))
+
+        for model, period, rollups, days, periods in ROLLUPS:
+            rollup_list = []
+            stale = Q()
+            rebuilt = set()
+            for station, years, queryset in scopes:
+                targets = None if years is None else rollup_targets(years, periods, period)
+                computed = set()
+                for rollup in rollups(queryset):
+                    key = (rollup["year"], rollup[period])
+                    if targets is not None and key not in targets:
+                        continue
+                    computed.add(key)
+                    rebuilt.add((rollup["station"], *key))
+                    values = {field: rollup[field] for field in ROLLUP_FIELDS if field in rollup}
+                    rollup_list.append(
+                        model(
+                            station_id=rollup["station"],
+                            year=rollup["year"],
+                            missing_days=days(*key) - rollup["complete"],
+                            **{period: rollup[period]},
+                            **values,
+                        )
+                    )
+                for year, value in (targets or set()) - computed:
+                    stale |= Q(station_id=station, year=year, **{period: value})
+
+            model.objects.bulk_create(
+                rollup_list,
+                update_conflicts=True,
+                unique_fields=["station", "year", period],
+                update_fields=ROLLUP_FIELDS,
             )
-            .annotate(year=ExtractYear("date"))
-            .values("station", "year")
+            if touched is None:
+                stale_ids = [
+                    pk
+                    for pk, *key in model.objects.values_list(
+                        "id", "station_id", "year", period
+                    )
+                    if tuple(key) not in rebuilt
+                ]
+                if stale_ids:
+                    model.objects.filter(pk__in=stale_ids).delete()
+            elif stale:
+                model.objects.filter(stale).delete()
+            rows_count += len(rollup_list)
+    except Exception as e:
+        logger.error(f"Error in inserting rollup row: {e}")
+        raise
+    finally:
+        elapsed = perf_counter() - start
+        logger.info(
+            f"Rollups upserted in : {elapsed:.2f} seconds. Rows count: {rows_count}"
+        )
+    return rows_count
+
+
+def dump_quality(touched=None):
+    """
+    Upserts the StationQuality summary of every station, or only of the
+    stations in `touched`: loaded and incomplete rows, the first and last date
+    with the days missing between them, and quarantined rows per reason.
+    Errors are logged and raised.
+    """
+    start = perf_counter()
+    summaries = []
+    upserted = 0
+    try:
+        records = WeatherRecord.objects.all()
+        quarantined = QuarantinedRecord.objects.all()
+        if touched is not None:
+            stations = [station_id(code) for code in touched]
+            records = records.filter(station_id__in=stations)
+            quarantined = quarantined.filter(station_id__in=stations)
+
+        reasons = {}
+        for row in (
+            quarantined.values("station", "reason").annotate(count=Count("id")).order_by()
+        ):
+            reasons.setdefault(row["station"], {})[row["reason"]] = row["count"]
+        aggregates = (
+            records.values("station")
             .annotate(
-                average_max_temperature=Avg("maximum_temperature"),
-                average_min_temperature=Avg("minimum_temperature"),
-                total_precipitation=Sum("precipitation"),
+                records=Count("id"),
+                dated=Count("date"),
+                first_date=Min("date"),
+                last_date=Max("date"),
+                incomplete_records=Count(
+                    "id",
+                    filter=Q(maximum_temperature=None)
+                    | Q(minimum_temperature=None)
+                    | Q(precipitation=None),
+                ),
             )
+            .order_by()
         )
-        statistics_list = [
-            Statistic(
-                station=stat["station"],
-                year=stat["year"],
-                average_max_temperature=stat["average_max_temperature"],
-                average_min_temperature=stat["average_min_temperature"],
-                total_precipitation=stat["total_precipitation"],
+        empty = {"records": 0, "dated": 0, "incomplete_records": 0}
+        rows = {row["station"]: row for row in aggregates}
+        for station in rows.keys() | reasons.keys():
+            row = rows.get(station, empty)
+            first, last = row.get("first_date"), row.get("last_date")
+            span = (last - first).days + 1 if first else 0
+            station_reasons = reasons.get(station, {})
+            summaries.append(
+                StationQuality(
+                    station_id=station,
+                    records=row["records"],
+                    incomplete_records=row["incomplete_records"],
+                    first_date=first,
+                    last_date=last,
+                    missing_days=span - row["dated"],
+                    coverage=row["dated"] / span if span else None,
+                    quarantined_records=sum(station_reasons.values()),
+                    quarantine_reasons=station_reasons,
+                )
             )
-            for stat in statistics
-        ]
-        Statistic.objects.bulk_create(statistics_list, ignore_conflicts=True)
+
+        StationQuality.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=["station"],
+            update_fields=QUALITY_FIELDS,
+        )
+        upserted = len(summaries)
     except Exception as e:
-        logger.error(f"Error in inserting statistics row: {e}")
+        logger.error(f"Error in inserting quality row: {e}")
+        raise
     finally:
-        end = datetime.now()
+        elapsed = perf_counter() - start
         logger.info(
-            f"Statistics Data inserted in : {(end-start).total_seconds()} seconds. Rows count: {len(statistics_list)}"
+            f"Quality summaries upserted in : {elapsed:.2f} seconds. Rows count: {upserted}"
         )
+    return upserted
+
+
+def dump_yield_data(path=None):
+    """Upserts the yearly corn grain yields of the yield data file, returning how many years were new or changed; errors are logged and raised."""
+    start = perf_counter()
+    changed = 0
+    try:
+        values = np.loadtxt(path or settings.YLD_DATA_FILE, dtype=np.int64, ndmin=2)
+        yields = dict(values.tolist())
+        existing = dict(CropYield.objects.values_list("year", "corn_grain_yield"))
+        changed = sum(existing.get(year) != value for year, value in yields.items())
+        if changed:
+            CropYield.objects.bulk_create(
+                [
+                    CropYield(year=year, corn_grain_yield=value)
+                    for year, value in yields.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["year"],
+                update_fields=["corn_grain_yield"],
+            )
+    except Exception as e:
+        logger.error(f"Error in inserting yield row: {e}")
+        raise
+    finally:
+        elapsed = perf_counter() - start
+        logger.info(
+            f"Yield Data upserted in : {elapsed:.2f} seconds. Rows changed: {changed}"
+        )
+    return changed
+
+
+def reload_year(year, folder=None, parser=None):
+    """Re-reads one year of every station file into a new partition, swaps it in and refreshes that year's statistics, rollups and quality summaries."""
+    start = perf_counter()
+    loader = CopyLoader()
+
+    def load(table):
+        rows_count = 0
+        for station, path in iter_station_files(folder):
+            # Rejected rows were already quarantined when the file was ingested.
+            frame, _ = validate_frame(get_parser(parser)(station, path))
+            for frame_year, part in frame.by_year():
+                if frame_year == year:
+                    buffer = loader.frame_to_copy_text(
+                        part, station_id(station, create=True)
+                    )
+                    rows_count += loader.merge(buffer, table)
+        return rows_count
+
+    rows_count = swap_partition(year, load)
+    touched = {code: {year} for code in Station.objects.values_list("code", flat=True)}
+    dump_statistics(touched)
+    dump_rollups(touched)
+    dump_quality(touched)
+    logger.info(
+        f"Year {year} reloaded in : {perf_counter() - start:.2f} seconds. Rows count: {rows_count}"
+    )
+    return rows_count
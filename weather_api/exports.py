@@ -0,0 +1,123 @@
+import io
+import csv
+import json
+import zlib
+from django.conf import settings
+from .stations import station_codes
+from .serializers import WeatherRecordSerializer
+
+FIELDS = WeatherRecordSerializer.Meta.fields
+COLUMNS = ("station_id", *FIELDS[1:])
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def iter_chunks(queryset, chunk_size=None):
+    """
+    Yields the export rows of a WeatherRecord queryset as lists of
+    (station code, date, max, min, precipitation) tuples of at most
+    `chunk_size` rows, read through a server-side cursor in station and date
+    order so memory stays bounded whatever the size of the export.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    rows = (
+        queryset.order_by("station", "date")
+        .values_list(*COLUMNS)
+        .iterator(chunk_size=chunk_size)
+    )
+    codes = {}
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield with_codes(chunk, codes)
+            chunk = []
+    if chunk:
+        yield with_codes(chunk, codes)
+
+
+def with_codes(chunk, codes):
+    """Replaces the station ids of a chunk with their codes, memoising them in `codes`."""
+    missing = {row[0] for row in chunk} - codes.keys()
+    if missing:
+        codes.update(station_codes(missing))
+    return [(codes[row[0]], *row[1:]) for row in chunk]
+
+
+def ndjson_export(chunks):
+    """Encodes chunks as one JSON object per line, with the keys and values of /api/weather/ records."""
+    for chunk in chunks:
+        yield "".join(
+            json.dumps(
+                dict(zip(FIELDS, (station, day and day.isoformat(), *values))),
+                separators=(",", ":"),
+            )
+            + "\n"
+            for station, day, *values in chunk
+        ).encode()
+
+
+def csv_export(chunks):
+    """Encodes chunks as CSV with a header row; missing values are empty cells."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(FIELDS)
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def arrow_export(chunks):
+    """Encodes chunks as an Arrow IPC stream with one record batch per chunk; needs pyarrow."""
+    import pyarrow as pa
+
+    schema = pa.schema(
+        [
+            ("station", pa.string()),
+            ("date", pa.date32()),
+            ("maximum_temperature", pa.int32()),
+            ("minimum_temperature", pa.int32()),
+            ("precipitation", pa.int32()),
+        ]
+    )
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for chunk in chunks:
+            columns = list(zip(*chunk))
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+
+EXPORTS = {"ndjson": ndjson_export, "csv": csv_export, "arrow": arrow_export}
+
+
+def get_export(name):
+    """Returns the encoder of an export format, checking that its optional dependency is installed."""
+    if name not in EXPORTS:
+        raise ValueError(f"output must be one of {', '.join(EXPORTS)}, not {name!r}")
+    if name == "arrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Arrow export needs the pyarrow package")
+    return EXPORTS[name]
+
+
+def gzip_stream(parts):
+    """Compresses a byte stream into a gzip stream, flushing after every part so the client receives data as it goes."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for part in parts:
+        data = compressor.compress(part) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,237 @@
+import os
+import fcntl
+import socket
+import logging
+from pathlib import Path
+from contextlib import contextmanager
+from time import perf_counter
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from .columnar import ensure_snapshot
+from .loaders import LOADERS
+from .parsers import PARSERS
+from .profiling import Profiler, profile_name
+from .versioning import bump_data_version
+from .partitions import ensure_partitions_ahead
+from .models import IngestionRun, MonthlyStatistic, StationQuality, Statistic
+from .dump import (
+    dump_quality,
+    dump_rollups,
+    dump_statistics,
+    dump_wx_data,
+    dump_yield_data,
+)
+
+logger = logging.getLogger(__name__)
+
+# Key of the PostgreSQL advisory lock held by the process running ingestion.
+ADVISORY_LOCK_KEY = 72_616_401
+
+
+def default_options():
+    """The dump_wx_data options of a run that does not set its own, from the INGEST_* settings."""
+    return {
+        "batch_size": settings.INGEST_BATCH_SIZE,
+        "loader": settings.INGEST_LOADER,
+        "parser": settings.INGEST_PARSER,
+        "workers": settings.INGEST_WORKERS,
+        "force": False,
+    }
+
+
+def clean_options(options):
+    """Fills in the defaults of a run's options and checks them, raising ValueError for unknown or invalid ones."""
+    cleaned = default_options()
+    unknown = set(options) - cleaned.keys()
+    if unknown:
+        raise ValueError(
+            f"Unknown options {sorted(unknown)}, choose from {sorted(cleaned)}"
+        )
+    cleaned.update(options)
+    limits = {
+        "batch_size": settings.INGESTION["MAX_BATCH_SIZE"],
+        "workers": settings.INGESTION["MAX_WORKERS"],
+    }
+    for name, limit in limits.items():
+        value = cleaned[name]
+        if not isinstance(value, int) or isinstance(value, bool) or not 1 <= value <= limit:
+            raise ValueError(f"{name} must be an integer from 1 to {limit}, not {value!r}")
+    if cleaned["loader"] not in ("auto", *LOADERS):
+        raise ValueError(
+            f"Unknown loader {cleaned['loader']!r}, choose from {['auto', *LOADERS]}"
+        )
+    if cleaned["parser"] not in PARSERS:
+        raise ValueError(
+            f"Unknown parser {cleaned['parser']!r}, choose from {sorted(PARSERS)}"
+        )
+    if not isinstance(cleaned["force"], bool):
+        raise ValueError(f"force must be true or false, not {cleaned['force']!r}")
+    return cleaned
+
+
+def enqueue(**options):
+    """
+    Queues an ingestion run and returns (run, created). When a run with the
+    same options is already queued that one is returned instead, so replicas
+    starting together queue a single run.
+    """
+    options = clean_options(options)
+    queued = IngestionRun.objects.filter(status=IngestionRun.QUEUED, options=options)
+    run = queued.order_by("queued_at").first()
+    if run is not None:
+        return run, False
+    return IngestionRun.objects.create(options=options), True
+
+
+@contextmanager
+def ingestion_lock(using=DEFAULT_DB_ALIAS):
+    """
+    Yields whether this process got the ingestion lock, without waiting for it.
+    On PostgreSQL it is a session advisory lock taken on a connection of its
+    own, so ingestion can close and fork its connections, and the server
+    releases it if the process dies. Other databases use an exclusive flock on
+    INGESTION["LOCK_FILE"], which guards the processes of one host.
+    """
+    if connections[using].vendor == "postgresql":
+        connection = connections.create_connection(using)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", [ADVISORY_LOCK_KEY])
+                acquired = cursor.fetchone()[0]
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            "SELECT pg_advisory_unlock(%s)", [ADVISORY_LOCK_KEY]
+                        )
+        finally:
+            connection.close()
+        return
+
+    path = Path(settings.INGESTION["LOCK_FILE"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            acquired = True
+        except BlockingIOError:
+            acquired = False
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def fail_abandoned_runs():
+    """Marks runs left running by a worker that died as failed; only call it while holding the lock."""
+    return IngestionRun.objects.filter(status=IngestionRun.RUNNING).update(
+        status=IngestionRun.FAILED,
+        error="The worker stopped before the run finished",
+        finished_at=timezone.now(),
+    )
+
+
+@contextmanager
+def phase(run, name, profiles=None):
+    """Records the phase a run is in and, when `profiles` is a list, profiles it and appends the profile's path."""
+    run.phase = name
+    run.save(update_fields=["phase"])
+    if profiles is None:
+        yield
+        return
+    with Profiler() as profiler:
+        yield
+    profiles.append(profiler.save(profile_name(f"ingestion-{name}")))
+
+
+def run_ingestion(run, profiles=None):
+    """
+    Runs an IngestionRun through every phase: load the station files, then
+    refresh the statistics, rollups and quality summaries they touched, load
+    the yields and publish a new data version. Progress and the outcome are
+    saved on the run as it goes; the caller must hold the ingestion lock. A
+    stage that raises fails the run, and so do station files that failed to
+    load, although the files that did load are still aggregated and published.
+    """
+    options = run.options or default_options()
+    run.status = IngestionRun.RUNNING
+    run.started_at = timezone.now()
+    run.worker = f"{socket.gethostname()}:{os.getpid()}"
+    run.save()
+
+    def progress(done, total):
+        run.files_done, run.files_to_load = done, total
+        run.save(update_fields=["files_done", "files_to_load"])
+
+    try:
+        with phase(run, "ingest", profiles):
+            result = dump_wx_data(**options, progress=progress)
+        run.record_ingestion(result)
+        # Forced and first runs rebuild everything in one pass, later runs
+        # only re-aggregate the (station, year) pairs that received rows.
+        full = options["force"] or not Statistic.objects.exists()
+        start = perf_counter()
+        with phase(run, "statistics", profiles):
+            run.statistics_upserted = dump_statistics(None if full else result.touched)
+        run.statistics_seconds = perf_counter() - start
+        full = options["force"] or not MonthlyStatistic.objects.exists()
+        start = perf_counter()
+        with phase(run, "rollups", profiles):
+            run.rollups_upserted = dump_rollups(None if full else result.touched)
+        run.rollups_seconds = perf_counter() - start
+        full = options["force"] or not StationQuality.objects.exists()
+        start = perf_counter()
+        with phase(run, "quality", profiles):
+            dump_quality(None if full else result.touched)
+        run.quality_seconds = perf_counter() - start
+        with phase(run, "publish"):
+            yields_changed = dump_yield_data()
+            if options["force"] or result.rows or yields_changed:
+                bump_data_version()
+            # Snapshots belong to a data version, so this only rebuilds after changes.
+            if settings.COLUMNAR_SNAPSHOT["ENABLED"]:
+                ensure_snapshot()
+        if result.failures:
+            failures = "; ".join(
+                f"{station}: {error}" for station, error in result.failures.items()
+            )
+            run.status = IngestionRun.FAILED
+            run.error = f"{len(result.failures)} station file(s) failed to load: {failures}"
+        else:
+            run.status = IngestionRun.SUCCEEDED
+    except Exception as e:
+        logger.error(f"Error in ingestion run {run.pk}: {e}")
+        run.status = IngestionRun.FAILED
+        run.error = str(e)
+    finally:
+        run.phase = ""
+        run.finished_at = timezone.now()
+        run.save()
+    return run
+
+
+def run_pending():
+    """
+    Runs the queued ingestion runs oldest first while holding the ingestion
+    lock. Returns how many ran, or None when another process holds the lock.
+    """
+    with ingestion_lock() as acquired:
+        if not acquired:
+            return None
+        abandoned = fail_abandoned_runs()
+        if abandoned:
+            logger.warning(f"Marked {abandoned} abandoned ingestion run(s) as failed")
+        count = 0
+        queued = IngestionRun.objects.filter(status=IngestionRun.QUEUED)
+        while (run := queued.order_by("queued_at").first()) is not None:
+            # Creating partitions locks the whole table, so it happens under
+            # the ingestion lock, where no other process is loading.
+            ensure_partitions_ahead()
+            logger.info(f"Starting ingestion run {run.pk} with {run.options}")
+            run_ingestion(run)
+            count += 1
+        return count
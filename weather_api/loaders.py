@@ -0,0 +1,162 @@
+import io
+import numpy as np
+from django.conf import settings
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from .models import WeatherRecord
+from .stations import station_id
+from .partitions import is_partitioned, known_partition_years, partition_name
+
+COLUMNS = (
+    "station_id",
+    "date",
+    "maximum_temperature",
+    "minimum_temperature",
+    "precipitation",
+)
+
+
+def with_station_ids(rows):
+    """Replaces the station code leading each row with its Station id, registering new stations on the way."""
+    ids = {code: station_id(code, create=True) for code in {row[0] for row in rows}}
+    return [(ids[row[0]], *row[1:]) for row in rows]
+
+
+class OrmLoader:
+    """Loads row batches with bulk_create(ignore_conflicts=True); works on every database backend."""
+
+    name = "orm"
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def load(self, rows):
+        """Inserts the rows, returning None because the ORM cannot report skipped conflicts."""
+        return self.insert(with_station_ids(rows))
+
+    def load_frame(self, frame, station=None):
+        """Loads a StationFrame batch under the Station id `station`, looked up from the frame when not given."""
+        if station is None:
+            station = station_id(frame.station, create=True)
+        return self.insert([(station, *row[1:]) for row in frame.rows()])
+
+    def insert(self, rows):
+        """Inserts rows that already lead with their Station id."""
+        WeatherRecord.objects.using(self.using).bulk_create(
+            [WeatherRecord(**dict(zip(COLUMNS, row))) for row in rows],
+            ignore_conflicts=True,
+        )
+        return None
+
+
+class CopyLoader:
+    """Loads row batches into a PostgreSQL staging table with COPY and merges them with ON CONFLICT DO NOTHING."""
+
+    name = "copy"
+    staging_table = "weather_api_weatherrecord_staging"
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self.connection = connections[using]
+        if self.connection.vendor != "postgresql":
+            raise ValueError(
+                f"The copy loader needs PostgreSQL, not {self.connection.vendor}"
+            )
+
+    @staticmethod
+    def to_copy_text(rows):
+        """Renders rows in COPY text format, with \\N for missing values."""
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(
+                "\t".join("\\N" if value is None else str(value) for value in row)
+            )
+            buffer.write("\n")
+        buffer.seek(0)
+        return buffer
+
+    @staticmethod
+    def frame_to_copy_text(frame, station):
+        """Renders a StationFrame in COPY text format under the given Station id, converting whole columns at once."""
+        dates = np.where(np.isnat(frame.dates), "\\N", frame.dates.astype(str))
+        columns = [[str(station)] * len(frame), dates.tolist()] + [
+            np.where(
+                np.ma.getmaskarray(column), "\\N", column.data.astype(str)
+            ).tolist()
+            for column in frame.columns
+        ]
+        buffer = io.StringIO()
+        for line in map("\t".join, zip(*columns)):
+            buffer.write(line)
+            buffer.write("\n")
+        buffer.seek(0)
+        return buffer
+
+    def copy(self, cursor, sql, buffer):
+        """Streams the buffer through COPY FROM STDIN on a psycopg2 or psycopg 3 cursor."""
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, "copy_expert"):
+            raw_cursor.copy_expert(sql, buffer)
+        else:
+            with raw_cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+    def load(self, rows):
+        """Copies the rows into the staging table, merges them and returns the number of new rows."""
+        rows = with_station_ids(rows)
+        return self.merge(self.to_copy_text(rows))
+
+    def load_frame(self, frame, station=None):
+        """
+        Loads a StationFrame batch under the Station id `station` (looked up
+        from the frame when not given) without building per-row Python
+        tuples. On a partitioned table each year that has a partition is
+        merged straight into it, which skips per-row tuple routing; the other
+        rows go through the parent table into the default partition.
+        """
+        if station is None:
+            station = station_id(frame.station, create=True)
+        if not is_partitioned(self.using):
+            return self.merge(self.frame_to_copy_text(frame, station))
+        partitions = known_partition_years(self.using)
+        inserted = 0
+        for year, part in frame.by_year():
+            table = partition_name(year) if year in partitions else None
+            inserted += self.merge(self.frame_to_copy_text(part, station), table)
+        return inserted
+
+    def merge(self, buffer, table=None):
+        """Streams a COPY text buffer into the staging table and inserts its rows that are not loaded yet into `table`."""
+        table = table or WeatherRecord._meta.db_table
+        columns = ", ".join(COLUMNS)
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE IF NOT EXISTS {self.staging_table} ("
+                "station_id integer, date date, maximum_temperature integer, "
+                "minimum_temperature integer, precipitation integer)"
+            )
+            self.copy(
+                cursor,
+                f"COPY {self.staging_table} ({columns}) FROM STDIN",
+                buffer,
+            )
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) "
+                f"SELECT {columns} FROM {self.staging_table} "
+                "ON CONFLICT (date, station_id) DO NOTHING"
+            )
+            inserted = cursor.rowcount
+            cursor.execute(f"TRUNCATE {self.staging_table}")
+        return inserted
+
+
+LOADERS = {loader.name: loader for loader in (OrmLoader, CopyLoader)}
+
+
+def get_loader(name=None, using=DEFAULT_DB_ALIAS):
+    """Returns a loader by name; "auto" picks COPY on PostgreSQL and the ORM everywhere else."""
+    name = name or settings.INGEST_LOADER
+    if name == "auto":
+        name = "copy" if connections[using].vendor == "postgresql" else "orm"
+    if name not in LOADERS:
+        raise ValueError(f"Unknown loader {name!r}, choose from {sorted(LOADERS)}")
+    return LOADERS[name](using=using)
@@ -0,0 +1,50 @@
+from inspect import signature
+from django.core.management.base import BaseCommand
+from weather_api.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Run a performance benchmark and print its results"
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", choices=sorted(BENCHMARKS))
+        parser.add_argument(
+            "--files",
+            type=int,
+            default=5,
+            help="Number of station files used as benchmark input.",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=50,
+            help="Requests per filter combination for the queries benchmark.",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1000,
+            help="Rows per page for the serialization benchmark.",
+        )
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000",
+            help="Base URL of the running server for the http benchmark.",
+        )
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **kwargs):
+        benchmark = BENCHMARKS[kwargs["target"]]
+        options = {
+            name: kwargs[name]
+            for name in signature(benchmark).parameters
+            if name
+            in ("files", "batch_size", "repeat", "rows", "url", "concurrency", "requests")
+        }
+        results = benchmark(**options)
+        for result in results:
+            self.stdout.write(
+                "  ".join(f"{key}={value}" for key, value in result.items())
+            )
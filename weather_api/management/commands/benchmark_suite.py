@@ -0,0 +1,112 @@
+import tempfile
+from time import perf_counter
+from django.core.management.base import BaseCommand, CommandError
+from weather_api.loaders import LOADERS
+from weather_api.benchmark_suite import (
+    DEFAULT_THRESHOLD,
+    compare_results,
+    generate_wx_data,
+    load_results,
+    run_suite,
+    save_results,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic wx_data set, benchmark parsing, loading, statistics "
+        "and the list endpoints in a throwaway database, and compare with a baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stations",
+            type=int,
+            default=167,
+            help="Number of synthetic station files to generate.",
+        )
+        parser.add_argument("--first-year", type=int, default=1985)
+        parser.add_argument("--last-year", type=int, default=2014)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--data",
+            default=None,
+            help="Benchmark the station files in this folder instead of generating them.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=50,
+            help="Requests per filter combination for the endpoint latencies.",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--loader", choices=["auto", *LOADERS], default=None)
+        parser.add_argument("--output", default=None, help="Write the results to this JSON file.")
+        parser.add_argument(
+            "--baseline",
+            default=None,
+            help="Fail when a metric is worse than in this results file by more than the threshold.",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            default=None,
+            help="Also write the results to this file, to compare later runs with.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=DEFAULT_THRESHOLD,
+            help="Allowed relative slowdown per metric, e.g. 0.25 for 25%%.",
+        )
+
+    def handle(self, *args, **kwargs):
+        with tempfile.TemporaryDirectory() as directory:
+            folder = kwargs["data"]
+            if folder is None:
+                folder = directory
+                start = perf_counter()
+                rows = generate_wx_data(
+                    folder,
+                    stations=kwargs["stations"],
+                    first_year=kwargs["first_year"],
+                    last_year=kwargs["last_year"],
+                    seed=kwargs["seed"],
+                )
+                self.stdout.write(
+                    f"Generated {kwargs['stations']} station files ({rows} rows) "
+                    f"in {perf_counter() - start:.2f} seconds"
+                )
+            results = run_suite(
+                folder,
+                repeat=kwargs["repeat"],
+                batch_size=kwargs["batch_size"],
+                loader=kwargs["loader"],
+            )
+        results["meta"].update(
+            stations=kwargs["stations"] if kwargs["data"] is None else None,
+            first_year=kwargs["first_year"],
+            last_year=kwargs["last_year"],
+            seed=kwargs["seed"],
+        )
+        for metric, value in results["metrics"].items():
+            self.stdout.write(f"{metric}={value}")
+        for path in (kwargs["output"], kwargs["save_baseline"]):
+            if path:
+                save_results(results, path)
+
+        if kwargs["baseline"]:
+            comparisons = compare_results(
+                results, load_results(kwargs["baseline"]), kwargs["threshold"]
+            )
+            regressions = [item for item in comparisons if item["regressed"]]
+            for item in regressions:
+                self.stderr.write(
+                    f"REGRESSION {item['metric']}: {item['baseline']} -> {item['value']} "
+                    f"({item['change']:+.0%})"
+                )
+            if regressions:
+                raise CommandError(
+                    f"{len(regressions)} of {len(comparisons)} metrics regressed by "
+                    f"more than {kwargs['threshold']:.0%}"
+                )
+            self.stdout.write(f"No regressions in {len(comparisons)} metrics")
@@ -1,10 +1,79 @@
-from django.core.management.base import BaseCommand
-from weather_api.dump import dump_wx_data, dump_statistics
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from weather_api.jobs import (
+    clean_options,
+    fail_abandoned_runs,
+    ingestion_lock,
+    run_ingestion,
+)
+from weather_api.loaders import LOADERS
+from weather_api.models import IngestionRun
+from weather_api.parsers import PARSERS
+from weather_api.partitions import ensure_partitions_ahead
 
 
 class Command(BaseCommand):
-    help = "Create database tables and ingest data"
+    help = "Ingest the weather and yield data now, in this process"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.INGEST_BATCH_SIZE,
+            help="Number of weather rows inserted per batch.",
+        )
+        parser.add_argument(
+            "--loader",
+            choices=["auto", *LOADERS],
+            default=settings.INGEST_LOADER,
+            help="How batches are written: PostgreSQL COPY, ORM bulk_create, or auto.",
+        )
+        parser.add_argument(
+            "--parser",
+            choices=sorted(PARSERS),
+            default=settings.INGEST_PARSER,
+            help="Station file parser: vectorised numpy or row by row text.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.INGEST_WORKERS,
+            help="Number of processes parsing and loading station files in parallel.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Ignore the ingestion manifest and re-read every station file.",
+        )
+        parser.add_argument(
+            "--profile",
+            action="store_true",
+            help=(
+                "Write a cProfile profile and SQL timeline of the ingest (parse and "
+                "load), statistics, rollups and quality phases to PROFILE_DIR. With "
+                "several workers only the parent process is profiled."
+            ),
+        )
 
     def handle(self, *args, **kwargs):
-        dump_wx_data()
-        dump_statistics()
+        options = clean_options(
+            {
+                name: kwargs[name]
+                for name in ("batch_size", "loader", "parser", "workers", "force")
+            }
+        )
+        with ingestion_lock() as acquired:
+            if not acquired:
+                raise CommandError(
+                    "Another process is running an ingestion; queue a run with "
+                    "`ingest_worker --enqueue` or POST /api/ingestion/ instead"
+                )
+            fail_abandoned_runs()
+            ensure_partitions_ahead()
+            run = IngestionRun.objects.create(options=options)
+            profiles = [] if kwargs["profile"] else None
+            run_ingestion(run, profiles)
+        for path in profiles or []:
+            self.stdout.write(f"Profile written to {path}")
+        if run.status == IngestionRun.FAILED:
+            raise CommandError(f"Ingestion run {run.pk} failed: {run.error}")
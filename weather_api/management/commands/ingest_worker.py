@@ -0,0 +1,52 @@
+from time import sleep
+from django.conf import settings
+from django.db import close_old_connections
+from django.core.management.base import BaseCommand
+from weather_api.jobs import enqueue, run_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued ingestion runs, one process at a time across every replica "
+        "sharing the database, polling for new ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="Queue a run with the INGEST_* settings first, unless an identical one is queued.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="With --enqueue, queue a run that re-reads every station file.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty, or right away when another process holds the lock.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.INGESTION["POLL_INTERVAL"],
+            help="Seconds between checks for queued runs.",
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs["enqueue"]:
+            run, created = enqueue(force=kwargs["force"])
+            state = "Queued" if created else "Already queued:"
+            self.stdout.write(f"{state} ingestion run {run.pk}")
+        while True:
+            # Long lived: drop connections that outlived CONN_MAX_AGE or broke.
+            close_old_connections()
+            ran = run_pending()
+            if ran is None and kwargs["once"]:
+                self.stdout.write("Another process holds the ingestion lock")
+            elif ran:
+                self.stdout.write(f"Ran {ran} ingestion run(s)")
+            if kwargs["once"]:
+                return
+            sleep(kwargs["poll_interval"])
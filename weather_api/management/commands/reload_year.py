@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from weather_api.columnar import ensure_snapshot
+from weather_api.dump import reload_year
+from weather_api.jobs import ingestion_lock
+from weather_api.parsers import PARSERS
+from weather_api.versioning import bump_data_version
+
+
+class Command(BaseCommand):
+    help = "Reload one year of weather data by swapping in a freshly loaded partition"
+
+    def add_arguments(self, parser):
+        parser.add_argument("year", type=int)
+        parser.add_argument(
+            "--parser",
+            choices=sorted(PARSERS),
+            default=settings.INGEST_PARSER,
+            help="Station file parser: vectorised numpy or row by row text.",
+        )
+
+    def handle(self, *args, **kwargs):
+        with ingestion_lock() as acquired:
+            if not acquired:
+                raise CommandError("Another process is running an ingestion")
+            try:
+                rows = reload_year(kwargs["year"], parser=kwargs["parser"])
+            except ValueError as e:
+                raise CommandError(str(e))
+            bump_data_version()
+            if settings.COLUMNAR_SNAPSHOT["ENABLED"]:
+                ensure_snapshot()
+        self.stdout.write(f"Reloaded {rows} rows for {kwargs['year']}")
@@ -0,0 +1,407 @@
+import os
+import json
+import atexit
+import logging
+from bisect import bisect_left
+from copy import copy
+from pathlib import Path
+from threading import Lock, Thread
+from time import perf_counter, sleep
+from contextlib import contextmanager
+from django.conf import settings
+from django.db.models import Count
+from django.http import HttpResponse
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+logger = logging.getLogger(__name__)
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels, rendered in the Prometheus text format."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self.values.get(tuple(labels[name] for name in self.labels), 0)
+
+    def samples(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            yield self.name, format_labels(self.labels, key), value
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(key), value] for key, value in self.values.items()]
+
+    def merge(self, snapshot):
+        """Adds the series of another process's snapshot to this counter."""
+        with self.lock:
+            for key, value in snapshot:
+                key = tuple(key)
+                self.values[key] = self.values.get(key, 0) + value
+
+
+class Histogram:
+    """Histogram with fixed buckets and labels; each observation is one bisect and a few additions under a lock."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # {labels: [per bucket counts (the last one is +Inf), sum]}
+        self.values = {}
+        self.lock = Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the seconds spent in the with block."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        series = self.values.get(tuple(labels[name] for name in self.labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self.lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self.values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else format_value(float(bound))
+                yield f"{self.name}_bucket", format_labels(self.labels, key, [("le", le)]), cumulative
+            yield f"{self.name}_sum", format_labels(self.labels, key), total
+            yield f"{self.name}_count", format_labels(self.labels, key), cumulative
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(key), list(counts), total] for key, (counts, total) in self.values.items()]
+
+    def merge(self, snapshot):
+        """Adds the series of another process's snapshot to this histogram."""
+        with self.lock:
+            for key, counts, total in snapshot:
+                series = self.values.setdefault(tuple(key), [[0] * (len(self.buckets) + 1), 0.0])
+                series[0] = [mine + theirs for mine, theirs in zip(series[0], counts)]
+                series[1] += total
+
+
+class Gauge:
+    """
+    Gauge whose samples are produced at scrape time by a callback, which gets
+    the registry being rendered and yields (label values, value) pairs.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labels=(), collect=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def samples(self, registry):
+        for key, value in self.collect(registry):
+            if value is not None:
+                yield self.name, format_labels(self.labels, key), value
+
+
+class Registry:
+    """Ordered set of metrics rendered together by the /metrics endpoint."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self):
+        """Returns the counter and histogram series of this process as JSON-serialisable lists."""
+        return {
+            metric.name: metric.snapshot()
+            for metric in self.metrics.values()
+            if hasattr(metric, "snapshot")
+        }
+
+    def combined(self, snapshots):
+        """Returns a registry whose counters and histograms sum the given snapshots; gauges are shared."""
+        registry = Registry()
+        for metric in self.metrics.values():
+            if hasattr(metric, "merge"):
+                metric = copy(metric)
+                metric.values = {}
+                metric.lock = Lock()
+                for snapshot in snapshots:
+                    metric.merge(snapshot.get(metric.name, []))
+            registry.register(metric)
+        return registry
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            samples = metric.samples(self) if metric.kind == "gauge" else metric.samples()
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "weather_http_request_duration_seconds",
+        "Time spent handling a request, per route, method and status.",
+        labels=("route", "method", "status"),
+    )
+)
+REQUEST_QUERIES = REGISTRY.register(
+    Histogram(
+        "weather_http_request_db_queries",
+        "SQL queries run while handling a request, per route.",
+        labels=("route",),
+        buckets=QUERY_COUNT_BUCKETS,
+    )
+)
+REQUEST_QUERY_SECONDS = REGISTRY.register(
+    Histogram(
+        "weather_http_request_db_seconds",
+        "Time spent in SQL queries while handling a request, per route.",
+        labels=("route",),
+    )
+)
+SERIALIZER_SECONDS = REGISTRY.register(
+    Histogram(
+        "weather_serializer_seconds",
+        "Time spent turning a page of rows into response data, per serializer.",
+        labels=("serializer",),
+    )
+)
+CACHE_REQUESTS = REGISTRY.register(
+    Counter(
+        "weather_cache_requests_total",
+        "Cache lookups per cache and result (hit or miss).",
+        labels=("cache", "result"),
+    )
+)
+
+
+def cache_hit_ratios(registry):
+    requests = registry.metrics[CACHE_REQUESTS.name]
+    caches = sorted({cache for cache, _ in requests.values})
+    for cache in caches:
+        hits = requests.value(cache=cache, result="hit")
+        misses = requests.value(cache=cache, result="miss")
+        yield (cache,), hits / (hits + misses) if hits + misses else None
+
+
+REGISTRY.register(
+    Gauge(
+        "weather_cache_hit_ratio",
+        "Share of cache lookups that were hits since the counters started.",
+        labels=("cache",),
+        collect=cache_hit_ratios,
+    )
+)
+
+
+def record_cache(cache, hit):
+    """Counts one lookup of an in-process or shared cache."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def connection_pool_metrics(registry):
+    from .pool import pool_stats
+
+    for (alias, name), stats in pool_stats().items():
+        for stat, value in stats.items():
+            yield (alias, stat), value
+
+
+REGISTRY.register(
+    Gauge(
+        "weather_db_pool",
+        "Connection pool counters and sizes of the process answering the scrape (see weather_api.pool).",
+        labels=("alias", "stat"),
+        collect=connection_pool_metrics,
+    )
+)
+
+
+def last_ingestion_metrics(registry):
+    from .models import IngestionRun
+
+    run = IngestionRun.objects.exclude(finished_at=None).order_by("-finished_at").first()
+    if run is None:
+        return
+    for field in IngestionRun.STAGE_FIELDS:
+        yield (field,), getattr(run, field)
+    yield ("rows_parsed_per_second",), run.rows_parsed_per_second
+    yield ("finished_at_timestamp",), run.finished_at.timestamp() if run.finished_at else None
+
+
+REGISTRY.register(
+    Gauge(
+        "weather_ingestion_last_run",
+        "Per stage counters and timings of the most recently finished ingestion run.",
+        labels=("stage",),
+        collect=last_ingestion_metrics,
+    )
+)
+
+
+def ingestion_run_counts(registry):
+    from .models import IngestionRun
+
+    counts = IngestionRun.objects.values("status").annotate(count=Count("id")).order_by()
+    for row in counts:
+        yield (row["status"],), row["count"]
+
+
+REGISTRY.register(
+    Gauge(
+        "weather_ingestion_runs",
+        "Ingestion runs per status; queued or running ones show work in progress.",
+        labels=("status",),
+        collect=ingestion_run_counts,
+    )
+)
+
+
+def snapshot_path(directory, pid):
+    return Path(directory) / f"{pid}.json"
+
+
+def write_snapshot(directory):
+    """Writes this process's counters and histograms to <pid>.json in directory, replacing it atomically."""
+    path = snapshot_path(directory, os.getpid())
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(REGISTRY.snapshot()))
+    os.replace(temporary, path)
+
+
+def read_snapshots(directory):
+    """Reads the snapshots every process (including exited ones) wrote to directory."""
+    snapshots = []
+    for path in sorted(Path(directory).glob("*.json")):
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            logger.warning("Skipping unreadable metrics snapshot %s", path)
+    return snapshots
+
+
+def flush_snapshots(directory, interval):
+    written = None
+    while True:
+        sleep(interval)
+        try:
+            data = json.dumps(REGISTRY.snapshot())
+            if data != written:
+                write_snapshot(directory)
+                written = data
+        except OSError:
+            logger.exception("Failed to write the metrics snapshot to %s", directory)
+
+
+_flusher_pid = None
+_flusher_lock = Lock()
+
+
+def start_snapshot_flusher():
+    """
+    With METRICS["MULTIPROCESS_DIR"] set, starts (once per process, and again
+    in a forked child) the thread writing this process's snapshot there every
+    FLUSH_INTERVAL seconds, and once more at exit. Called at the start of
+    every request, so it costs a setting lookup and a pid comparison.
+    """
+    global _flusher_pid
+    directory = settings.METRICS["MULTIPROCESS_DIR"]
+    if not directory or _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+        if _flusher_pid is not None:
+            # A forked child starts with its parent's series, which the
+            # parent's own snapshot already counts.
+            for metric in REGISTRY.metrics.values():
+                if hasattr(metric, "merge"):
+                    with metric.lock:
+                        metric.values.clear()
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        Thread(
+            target=flush_snapshots,
+            args=(directory, settings.METRICS["FLUSH_INTERVAL"]),
+            name="metrics-snapshot",
+            daemon=True,
+        ).start()
+        if _flusher_pid is None:
+            atexit.register(write_snapshot, directory)
+        _flusher_pid = os.getpid()
+
+
+def metrics_view(request):
+    """
+    Serves every registered metric in the Prometheus text exposition format.
+    With METRICS["MULTIPROCESS_DIR"] set, counters and histograms are summed
+    over the snapshots of all worker processes.
+    """
+    registry = REGISTRY
+    directory = settings.METRICS["MULTIPROCESS_DIR"]
+    if directory:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        write_snapshot(directory)
+        registry = REGISTRY.combined(read_snapshots(directory))
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,100 @@
+from time import perf_counter
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from .metrics import REQUEST_QUERIES, REQUEST_QUERY_SECONDS, REQUEST_SECONDS, start_snapshot_flusher
+
+# The QueryTimer of the request being handled. Context variables follow the
+# request into the threads sync_to_async runs its queries in.
+current_timer = ContextVar("current_timer", default=None)
+
+
+class QueryTimer:
+    """Database execute wrapper counting the queries of one request and the seconds spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += perf_counter() - start
+
+
+def time_query(execute, sql, params, many, context):
+    """Execute wrapper kept on every connection; hands the query to the current request's timer, if any."""
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(connection, **kwargs):
+    """connection_created receiver adding time_query to a connection once."""
+    # Inserted first, so the pop() of an enclosing execute_wrapper() block
+    # still removes its own wrapper.
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_query)
+
+
+def route_name(request):
+    """Names a request by its URL pattern rather than its path, so the metric labels stay bounded."""
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Records the latency of every request per route, method and status, and
+    the number of SQL queries and the time spent in them, whether the view is
+    sync or async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start_snapshot_flusher()
+        start = perf_counter()
+        for connection in connections.all():
+            install_query_timer(connection)
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        self.record(request, response, perf_counter() - start, timer)
+        return response
+
+    async def __acall__(self, request):
+        start_snapshot_flusher()
+        start = perf_counter()
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        self.record(request, response, perf_counter() - start, timer)
+        return response
+
+    def record(self, request, response, seconds, timer):
+        route = route_name(request)
+        REQUEST_SECONDS.observe(
+            seconds, route=route, method=request.method, status=response.status_code
+        )
+        REQUEST_QUERIES.observe(timer.count, route=route)
+        REQUEST_QUERY_SECONDS.observe(timer.seconds, route=route)
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('station', models.CharField(max_length=100, verbose_name='Name of Station')),
+                ('date', models.DateField(blank=True, null=True, verbose_name='Record Date')),
+                ('maximum_temperature', models.IntegerField(blank=True, null=True, verbose_name='Maximum Temperature')),
+                ('minimum_temperature', models.IntegerField(blank=True, null=True, verbose_name='Minimum Temperature')),
+                ('precipitation', models.IntegerField(blank=True, null=True, verbose_name='Precipitation')),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Statistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('station', models.CharField(max_length=100, verbose_name='Name of Station')),
+                ('year', models.IntegerField(verbose_name='Record Year')),
+                ('average_max_temperature', models.FloatField(verbose_name='Average Maximum Temperature')),
+                ('average_min_temperature', models.FloatField(verbose_name='Average Minimum Temperature')),
+                ('total_precipitation', models.FloatField(verbose_name='Total Precipitation')),
+            ],
+            options={
+                'ordering': ['-id'],
+                'indexes': [models.Index(models.F('year'), models.F('station'), name='index_year_station')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='statistic',
+            constraint=models.UniqueConstraint(fields=('year', 'station'), name='unique_year_station'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherrecord',
+            index=models.Index(models.F('date'), models.F('station'), name='index_date_station'),
+        ),
+        migrations.AddConstraint(
+            model_name='weatherrecord',
+            constraint=models.UniqueConstraint(fields=('date', 'station'), name='unique_date_station'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='File Name')),
+                ('size', models.BigIntegerField(verbose_name='Size in Bytes')),
+                ('mtime', models.FloatField(verbose_name='Modification Time')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='SHA-256 of Content')),
+                ('rows', models.IntegerField(default=0, verbose_name='Rows Loaded')),
+                ('ingested_at', models.DateTimeField(auto_now=True, verbose_name='Ingested At')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0002_ingestedfile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='statistic',
+            index=models.Index(fields=['station', 'year'], name='index_station_year'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherrecord',
+            index=models.Index(fields=['station', 'date'], name='index_station_date'),
+        ),
+    ]
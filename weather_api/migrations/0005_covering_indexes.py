@@ -0,0 +1,63 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+# BRIN is PostgreSQL only, so it is created here rather than declared in
+# WeatherRecord.Meta, which would break the migration on other databases.
+# Rows arrive station by station, so small block ranges keep each summary
+# narrow enough to prune blocks for date range filters.
+def create_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS index_date_brin ON weather_api_weatherrecord "
+            "USING brin (date) WITH (pages_per_range = 16)"
+        )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS index_date_brin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0004_dataversion'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='statistic',
+            options={'ordering': ['station', 'year']},
+        ),
+        migrations.AlterModelOptions(
+            name='weatherrecord',
+            options={'ordering': ['station', 'date']},
+        ),
+        migrations.RemoveIndex(
+            model_name='statistic',
+            name='index_year_station',
+        ),
+        migrations.RemoveIndex(
+            model_name='statistic',
+            name='index_station_year',
+        ),
+        migrations.RemoveIndex(
+            model_name='weatherrecord',
+            name='index_date_station',
+        ),
+        migrations.RemoveIndex(
+            model_name='weatherrecord',
+            name='index_station_date',
+        ),
+        migrations.AddIndex(
+            model_name='statistic',
+            index=models.Index(fields=['station', 'year'], include=('average_max_temperature', 'average_min_temperature', 'total_precipitation'), name='index_station_year_covering'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherrecord',
+            index=models.Index(fields=['station', 'date'], include=('maximum_temperature', 'minimum_temperature', 'precipitation'), name='index_station_date_covering'),
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
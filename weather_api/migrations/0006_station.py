@@ -0,0 +1,163 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:24
+
+import re
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of weather_api.stations.parse_station_code as of this migration.
+STATE_CODES = {
+    "01": "AL", "02": "AZ", "03": "AR", "04": "CA", "05": "CO", "06": "CT",
+    "07": "DE", "08": "FL", "09": "GA", "10": "ID", "11": "IL", "12": "IN",
+    "13": "IA", "14": "KS", "15": "KY", "16": "LA", "17": "ME", "18": "MD",
+    "19": "MA", "20": "MI", "21": "MN", "22": "MS", "23": "MO", "24": "MT",
+    "25": "NE", "26": "NV", "27": "NH", "28": "NJ", "29": "NM", "30": "NY",
+    "31": "NC", "32": "ND", "33": "OH", "34": "OK", "35": "OR", "36": "PA",
+    "37": "RI", "38": "SC", "39": "SD", "40": "TN", "41": "TX", "42": "UT",
+    "43": "VT", "44": "VA", "45": "WA", "46": "WV", "47": "WI", "48": "WY",
+    "50": "AK", "51": "HI",
+}
+GHCN_CODE = re.compile(r"^(?P<country>[A-Z]{2})(?P<network>[A-Z0-9])(?P<number>\w{8})$")
+
+
+def parse_station_code(code):
+    match = GHCN_CODE.match(code)
+    if match is None:
+        return {"country": "", "network": "", "state": ""}
+    state = ""
+    if match["country"] == "US" and match["network"] == "C":
+        state = STATE_CODES.get(match["number"][2:4], "")
+    return {"country": match["country"], "network": match["network"], "state": state}
+
+
+def create_stations(apps, schema_editor):
+    """Creates a Station for every distinct code and points the existing rows at it."""
+    Station = apps.get_model("weather_api", "Station")
+    models_with_station = [
+        apps.get_model("weather_api", "WeatherRecord"),
+        apps.get_model("weather_api", "Statistic"),
+    ]
+    codes = set()
+    for model in models_with_station:
+        codes.update(model.objects.values_list("station", flat=True).distinct())
+    Station.objects.bulk_create(
+        [Station(code=code, **parse_station_code(code)) for code in sorted(codes)]
+    )
+    # One UPDATE per station, each served by the (station, ...) indexes.
+    for code, pk in Station.objects.values_list("code", "id"):
+        for model in models_with_station:
+            model.objects.filter(station=code).update(station_ref=pk)
+
+
+def restore_station_codes(apps, schema_editor):
+    """Reverse of create_stations: copies the code of each row's Station back into the restored station column."""
+    Station = apps.get_model("weather_api", "Station")
+    for code, pk in Station.objects.values_list("code", "id"):
+        for name in ("WeatherRecord", "Statistic"):
+            model = apps.get_model("weather_api", name)
+            model.objects.filter(station_ref=pk).update(station=code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0005_covering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Station',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('code', models.CharField(max_length=100, unique=True, verbose_name='Station Code')),
+                ('country', models.CharField(blank=True, max_length=2, verbose_name='Country Code')),
+                ('network', models.CharField(blank=True, max_length=1, verbose_name='Network Code')),
+                ('state', models.CharField(blank=True, max_length=2, verbose_name='State')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='statistic',
+            name='station_ref',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='weather_api.station'),
+        ),
+        migrations.AddField(
+            model_name='weatherrecord',
+            name='station_ref',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='weather_api.station'),
+        ),
+        # Nothing to undo: reversing the AddFields below drops station_ref.
+        migrations.RunPython(create_stations, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='statistic',
+            name='unique_year_station',
+        ),
+        migrations.RemoveIndex(
+            model_name='statistic',
+            name='index_station_year_covering',
+        ),
+        migrations.RemoveConstraint(
+            model_name='weatherrecord',
+            name='unique_date_station',
+        ),
+        migrations.RemoveIndex(
+            model_name='weatherrecord',
+            name='index_station_date_covering',
+        ),
+        # Nullable first, so that in reverse the station columns come back
+        # empty and are filled by restore_station_codes before they are made
+        # NOT NULL and the constraints and indexes on them are restored.
+        migrations.AlterField(
+            model_name='statistic',
+            name='station',
+            field=models.CharField(max_length=100, null=True, verbose_name='Name of Station'),
+        ),
+        migrations.AlterField(
+            model_name='weatherrecord',
+            name='station',
+            field=models.CharField(max_length=100, null=True, verbose_name='Name of Station'),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, restore_station_codes),
+        migrations.RemoveField(
+            model_name='statistic',
+            name='station',
+        ),
+        migrations.RemoveField(
+            model_name='weatherrecord',
+            name='station',
+        ),
+        migrations.RenameField(
+            model_name='statistic',
+            old_name='station_ref',
+            new_name='station',
+        ),
+        migrations.RenameField(
+            model_name='weatherrecord',
+            old_name='station_ref',
+            new_name='station',
+        ),
+        migrations.AlterField(
+            model_name='statistic',
+            name='station',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='weather_api.station', verbose_name='Station'),
+        ),
+        migrations.AlterField(
+            model_name='weatherrecord',
+            name='station',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='records', to='weather_api.station', verbose_name='Station'),
+        ),
+        migrations.AddConstraint(
+            model_name='statistic',
+            constraint=models.UniqueConstraint(fields=('year', 'station'), name='unique_year_station'),
+        ),
+        migrations.AddIndex(
+            model_name='statistic',
+            index=models.Index(fields=['station', 'year'], include=('average_max_temperature', 'average_min_temperature', 'total_precipitation'), name='index_station_year_covering'),
+        ),
+        migrations.AddConstraint(
+            model_name='weatherrecord',
+            constraint=models.UniqueConstraint(fields=('date', 'station'), name='unique_date_station'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherrecord',
+            index=models.Index(fields=['station', 'date'], include=('maximum_temperature', 'minimum_temperature', 'precipitation'), name='index_station_date_covering'),
+        ),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:31
+
+from django.db import migrations
+
+from weather_api.partitions import forget_partitions
+
+# The DDL below is frozen here rather than imported from weather_api.partitions,
+# so later changes to that module cannot alter what this migration does.
+TABLE = "weather_api_weatherrecord"
+COLUMNS = "id, station_id, date, maximum_temperature, minimum_temperature, precipitation"
+MEASUREMENT_COLUMNS = "maximum_temperature, minimum_temperature, precipitation"
+STATION_FK = (
+    "FOREIGN KEY (station_id) REFERENCES weather_api_station (id) "
+    "DEFERRABLE INITIALLY DEFERRED"
+)
+
+
+def year_bounds(year):
+    return f"'{int(year)}-01-01'", f"'{int(year) + 1}-01-01'"
+
+
+def create_partitioned_table(cursor, first_year, last_year):
+    cursor.execute(
+        f"CREATE TABLE {TABLE} ("
+        "id bigint NOT NULL, station_id integer NOT NULL, date date NULL, "
+        "maximum_temperature integer NULL, minimum_temperature integer NULL, "
+        "precipitation integer NULL) PARTITION BY RANGE (date)"
+    )
+    cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+    if first_year is not None:
+        for year in range(first_year, last_year + 1):
+            lower, upper = year_bounds(year)
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_y{year} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ({lower}) TO ({upper})"
+            )
+
+
+def add_partitioned_table_objects(cursor):
+    # PostgreSQL requires unique constraints to include the partition key, so
+    # the row id is unique together with the date.
+    cursor.execute(f"CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    cursor.execute(
+        f"SELECT setval('{TABLE}_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}"
+    )
+    cursor.execute(
+        f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')"
+    )
+    cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_id_date UNIQUE (id, date)")
+    cursor.execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT unique_date_station UNIQUE (date, station_id)"
+    )
+    cursor.execute(
+        f"CREATE INDEX index_station_date_covering ON {TABLE} (station_id, date) "
+        f"INCLUDE ({MEASUREMENT_COLUMNS})"
+    )
+    cursor.execute(f"CREATE INDEX index_date_brin ON {TABLE} USING brin (date)")
+    cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_station_id_fk {STATION_FK}")
+
+
+# Declarative partitioning is PostgreSQL only; other databases keep the plain
+# table, which Django's model state describes either way.
+def partition_weather_records(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT EXTRACT(YEAR FROM MIN(date))::int, EXTRACT(YEAR FROM MAX(date))::int "
+            f"FROM {TABLE}"
+        )
+        first_year, last_year = cursor.fetchone()
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_unpartitioned")
+        create_partitioned_table(cursor, first_year, last_year)
+        cursor.execute(
+            f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {TABLE}_unpartitioned"
+        )
+        cursor.execute(f"DROP TABLE {TABLE}_unpartitioned")
+        add_partitioned_table_objects(cursor)
+    forget_partitions(schema_editor.connection.alias)
+
+
+# Rebuilds the plain table of 0006 with its identity primary key, constraint
+# and indexes (the BRIN one as 0005 creates it), then drops the partitions.
+def unpartition_weather_records(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {TABLE}_unpartitioned ("
+            "id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY, "
+            "station_id integer NOT NULL, date date NULL, "
+            "maximum_temperature integer NULL, minimum_temperature integer NULL, "
+            "precipitation integer NULL)"
+        )
+        cursor.execute(
+            f"INSERT INTO {TABLE}_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM {TABLE}"
+        )
+        cursor.execute(f"DROP TABLE {TABLE}")
+        cursor.execute(f"ALTER TABLE {TABLE}_unpartitioned RENAME TO {TABLE}")
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+            f"COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}"
+        )
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT unique_date_station UNIQUE (date, station_id)"
+        )
+        cursor.execute(
+            f"CREATE INDEX index_station_date_covering ON {TABLE} (station_id, date) "
+            f"INCLUDE ({MEASUREMENT_COLUMNS})"
+        )
+        cursor.execute(
+            f"CREATE INDEX index_date_brin ON {TABLE} "
+            "USING brin (date) WITH (pages_per_range = 16)"
+        )
+        cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_station_id_fk {STATION_FK}")
+    forget_partitions(schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0006_station'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_weather_records, unpartition_weather_records),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0007_partition_weatherrecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(verbose_name='Year')),
+                ('observations', models.IntegerField(verbose_name='Daily Records')),
+                ('missing_days', models.IntegerField(verbose_name='Days Without a Complete Record')),
+                ('min_temperature', models.IntegerField(null=True, verbose_name='Lowest Minimum Temperature')),
+                ('max_temperature', models.IntegerField(null=True, verbose_name='Highest Maximum Temperature')),
+                ('average_min_temperature', models.FloatField(null=True, verbose_name='Average Minimum Temperature')),
+                ('average_max_temperature', models.FloatField(null=True, verbose_name='Average Maximum Temperature')),
+                ('total_precipitation', models.IntegerField(null=True, verbose_name='Total Precipitation')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Month')),
+                ('station', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='weather_api.station', verbose_name='Station')),
+            ],
+            options={
+                'ordering': ['station', 'year', 'month'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SeasonalStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(verbose_name='Year')),
+                ('observations', models.IntegerField(verbose_name='Daily Records')),
+                ('missing_days', models.IntegerField(verbose_name='Days Without a Complete Record')),
+                ('min_temperature', models.IntegerField(null=True, verbose_name='Lowest Minimum Temperature')),
+                ('max_temperature', models.IntegerField(null=True, verbose_name='Highest Maximum Temperature')),
+                ('average_min_temperature', models.FloatField(null=True, verbose_name='Average Minimum Temperature')),
+                ('average_max_temperature', models.FloatField(null=True, verbose_name='Average Maximum Temperature')),
+                ('total_precipitation', models.IntegerField(null=True, verbose_name='Total Precipitation')),
+                ('season', models.PositiveSmallIntegerField(choices=[(1, 'winter'), (2, 'spring'), (3, 'summer'), (4, 'autumn')], verbose_name='Season')),
+                ('station', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='weather_api.station', verbose_name='Station')),
+            ],
+            options={
+                'ordering': ['station', 'year', 'season'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlystatistic',
+            constraint=models.UniqueConstraint(fields=('station', 'year', 'month'), name='unique_station_year_month'),
+        ),
+        migrations.AddConstraint(
+            model_name='seasonalstatistic',
+            constraint=models.UniqueConstraint(fields=('station', 'year', 'season'), name='unique_station_year_season'),
+        ),
+    ]
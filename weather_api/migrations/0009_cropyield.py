@@ -0,0 +1,24 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0008_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CropYield',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(unique=True, verbose_name='Harvest Year')),
+                ('corn_grain_yield', models.BigIntegerField(verbose_name='Corn Grain Yield')),
+            ],
+            options={
+                'ordering': ['year'],
+            },
+        ),
+    ]
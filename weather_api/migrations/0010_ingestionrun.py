@@ -0,0 +1,38 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0009_cropyield'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(null=True, verbose_name='Finished At')),
+                ('files_scanned', models.IntegerField(default=0, verbose_name='Files Scanned')),
+                ('files_loaded', models.IntegerField(default=0, verbose_name='Files Loaded')),
+                ('files_appended', models.IntegerField(default=0, verbose_name='Files Appended')),
+                ('files_skipped', models.IntegerField(default=0, verbose_name='Files Skipped')),
+                ('files_failed', models.IntegerField(default=0, verbose_name='Files Failed')),
+                ('rows_parsed', models.BigIntegerField(default=0, verbose_name='Rows Parsed')),
+                ('parse_seconds', models.FloatField(default=0, verbose_name='Parse Seconds')),
+                ('rows_inserted', models.BigIntegerField(null=True, verbose_name='Rows Inserted')),
+                ('conflicts_skipped', models.BigIntegerField(null=True, verbose_name='Conflicting Rows Skipped')),
+                ('load_seconds', models.FloatField(default=0, verbose_name='Load Seconds')),
+                ('statistics_upserted', models.IntegerField(default=0, verbose_name='Statistics Upserted')),
+                ('statistics_seconds', models.FloatField(default=0, verbose_name='Statistics Seconds')),
+                ('rollups_upserted', models.IntegerField(default=0, verbose_name='Rollups Upserted')),
+                ('rollups_seconds', models.FloatField(default=0, verbose_name='Rollups Seconds')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
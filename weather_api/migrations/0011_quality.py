@@ -0,0 +1,66 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0010_ingestionrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestionrun',
+            name='quality_seconds',
+            field=models.FloatField(default=0, verbose_name='Quality Summary Seconds'),
+        ),
+        migrations.AddField(
+            model_name='ingestionrun',
+            name='rows_quarantined',
+            field=models.BigIntegerField(default=0, verbose_name='Rows Quarantined'),
+        ),
+        migrations.AddField(
+            model_name='ingestionrun',
+            name='validate_seconds',
+            field=models.FloatField(default=0, verbose_name='Validate Seconds'),
+        ),
+        migrations.CreateModel(
+            name='QuarantinedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.CharField(max_length=255, verbose_name='File Name')),
+                ('reason', models.CharField(max_length=32, verbose_name='Reason Code')),
+                ('date', models.DateField(blank=True, null=True, verbose_name='Record Date')),
+                ('maximum_temperature', models.IntegerField(blank=True, null=True, verbose_name='Maximum Temperature')),
+                ('minimum_temperature', models.IntegerField(blank=True, null=True, verbose_name='Minimum Temperature')),
+                ('precipitation', models.IntegerField(blank=True, null=True, verbose_name='Precipitation')),
+                ('line', models.TextField(blank=True, verbose_name='Raw Line')),
+                ('quarantined_at', models.DateTimeField(auto_now_add=True, verbose_name='Quarantined At')),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quarantined_records', to='weather_api.station', verbose_name='Station')),
+            ],
+            options={
+                'ordering': ['station', 'date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StationQuality',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('records', models.IntegerField(verbose_name='Loaded Records')),
+                ('incomplete_records', models.IntegerField(verbose_name='Records Missing a Measurement')),
+                ('first_date', models.DateField(null=True, verbose_name='First Record Date')),
+                ('last_date', models.DateField(null=True, verbose_name='Last Record Date')),
+                ('missing_days', models.IntegerField(verbose_name='Days Without a Record Between the First and Last')),
+                ('coverage', models.FloatField(null=True, verbose_name='Share of Days With a Record')),
+                ('quarantined_records', models.IntegerField(verbose_name='Quarantined Records')),
+                ('quarantine_reasons', models.JSONField(default=dict, verbose_name='Quarantined Records per Reason')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('station', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='quality', to='weather_api.station', verbose_name='Station')),
+            ],
+            options={
+                'ordering': ['station'],
+            },
+        ),
+    ]
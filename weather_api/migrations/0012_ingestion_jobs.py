@@ -0,0 +1,75 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:53
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_past_runs(apps, schema_editor):
+    """Runs recorded before jobs existed were run by `create` straight away, so they are not queued."""
+    IngestionRun = apps.get_model("weather_api", "IngestionRun")
+    runs = IngestionRun.objects.all()
+    runs.update(queued_at=F("started_at"))
+    runs.filter(finished_at__isnull=False).update(status="succeeded")
+    runs.filter(finished_at__isnull=True).update(status="failed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0011_quality'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ingestionrun',
+            options={'ordering': ['-queued_at']},
+        ),
+        migrations.AddField(
+            model_name='ingestionrun',
+            name='error',
+            field=models.TextField(blank=True, verbose_name='Error'),
+        ),
+        migrations.AddField(
+            model_name='ingestionrun',
+            name='files_done',
+            field=models.IntegerField(default=0, verbose_name='Files Processed'),
+        ),
+        migrations.AddField(
+            model_name='ingestionrun',
+            name='files_to_load',
+            field=models.IntegerField(default=0, verbose_name='Files to Load'),
+        ),
+        migrations.AddField(
+            model_name='ingestionrun',
+            name='options',
+            field=models.JSONField(default=dict, verbose_name='Options'),
+        ),
+        migrations.AddField(
+            model_name='ingestionrun',
+            name='phase',
+            field=models.CharField(blank=True, max_length=32, verbose_name='Current Phase'),
+        ),
+        migrations.AddField(
+            model_name='ingestionrun',
+            name='queued_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Queued At'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='ingestionrun',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=16, verbose_name='Status'),
+        ),
+        migrations.AddField(
+            model_name='ingestionrun',
+            name='worker',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Worker'),
+        ),
+        migrations.AlterField(
+            model_name='ingestionrun',
+            name='started_at',
+            field=models.DateTimeField(null=True, verbose_name='Started At'),
+        ),
+        migrations.RunPython(mark_past_runs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.7 on 2026-10-18 22:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0012_ingestion_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='statistic',
+            options={'ordering': ['-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='weatherrecord',
+            options={'ordering': ['-id']},
+        ),
+    ]
@@ -1,9 +1,28 @@
 from django.db import models
 
 
+class Station(models.Model):
+    """A weather station, keyed by a small integer, with the metadata encoded in its GHCN code."""
+    id = models.AutoField(primary_key=True)
+    code = models.CharField(verbose_name="Station Code", max_length=100, unique=True)
+    country = models.CharField(verbose_name="Country Code", max_length=2, blank=True)
+    network = models.CharField(verbose_name="Network Code", max_length=1, blank=True)
+    state = models.CharField(verbose_name="State", max_length=2, blank=True)
+
+    def __str__(self):
+        return self.code
+
+
 class WeatherRecord(models.Model):
     """Represents daily weather data for a specific station, including temperature and precipitation."""
-    station = models.CharField(verbose_name="Name of Station", max_length=100)
+    # The covering (station, date) index below already leads on station_id.
+    station = models.ForeignKey(
+        Station,
+        verbose_name="Station",
+        on_delete=models.CASCADE,
+        related_name="records",
+        db_index=False,
+    )
     date = models.DateField(verbose_name="Record Date", null=True, blank=True)
     maximum_temperature = models.IntegerField(
         verbose_name="Maximum Temperature", null=True, blank=True
@@ -21,7 +40,18 @@ class WeatherRecord(models.Model):
                 fields=["date", "station"], name="unique_date_station"
             )
         ]
-        indexes = [models.Index("date", "station", name="index_date_station")]
+        # unique_date_station already serves date lookups. Station lookups and
+        # keyset pages use the covering index below, and a BRIN index on date
+        # for range scans is added by a PostgreSQL-only migration.
+        indexes = [
+            models.Index(
+                fields=["station", "date"],
+                include=["maximum_temperature", "minimum_temperature", "precipitation"],
+                name="index_station_date_covering",
+            ),
+        ]
+        # Limit/offset pages stay newest first; keyset pages order by the view's
+        # keyset_ordering instead.
         ordering = ["-id"]
 
     def __str__(self):
@@ -30,7 +60,13 @@ class WeatherRecord(models.Model):
 
 class Statistic(models.Model):
     """Stores yearly weather statistics for a station, including average temperatures and total precipitation."""
-    station = models.CharField(verbose_name="Name of Station", max_length=100)
+    station = models.ForeignKey(
+        Station,
+        verbose_name="Station",
+        on_delete=models.CASCADE,
+        related_name="statistics",
+        db_index=False,
+    )
     year = models.IntegerField(verbose_name="Record Year")
     average_max_temperature = models.FloatField(
         verbose_name="Average Maximum Temperature"
@@ -46,8 +82,289 @@ class Statistic(models.Model):
                 fields=["year", "station"], name="unique_year_station"
             )
         ]
-        indexes = [models.Index("year", "station", name="index_year_station")]
+        indexes = [
+            models.Index(
+                fields=["station", "year"],
+                include=[
+                    "average_max_temperature",
+                    "average_min_temperature",
+                    "total_precipitation",
+                ],
+                name="index_station_year_covering",
+            ),
+        ]
         ordering = ["-id"]
 
     def __str__(self):
         return f"Statistics for {self.station} on {self.year}"
+
+
+class Rollup(models.Model):
+    """Aggregates of a station's daily records over a calendar period, with observation and missing-day counts."""
+    # The unique (station, year, period) constraint already leads on station_id.
+    station = models.ForeignKey(
+        Station,
+        verbose_name="Station",
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,
+    )
+    year = models.IntegerField(verbose_name="Year")
+    observations = models.IntegerField(verbose_name="Daily Records")
+    missing_days = models.IntegerField(
+        verbose_name="Days Without a Complete Record"
+    )
+    min_temperature = models.IntegerField(
+        verbose_name="Lowest Minimum Temperature", null=True
+    )
+    max_temperature = models.IntegerField(
+        verbose_name="Highest Maximum Temperature", null=True
+    )
+    average_min_temperature = models.FloatField(
+        verbose_name="Average Minimum Temperature", null=True
+    )
+    average_max_temperature = models.FloatField(
+        verbose_name="Average Maximum Temperature", null=True
+    )
+    total_precipitation = models.IntegerField(
+        verbose_name="Total Precipitation", null=True
+    )
+
+    class Meta:
+        abstract = True
+
+
+class MonthlyStatistic(Rollup):
+    """Monthly rollup of a station's daily records."""
+    month = models.PositiveSmallIntegerField(verbose_name="Month")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["station", "year", "month"], name="unique_station_year_month"
+            )
+        ]
+        ordering = ["station", "year", "month"]
+
+    def __str__(self):
+        return f"Statistics for {self.station} on {self.year}-{self.month:02d}"
+
+
+class SeasonalStatistic(Rollup):
+    """
+    Meteorological season rollup of a station's daily records. Winter runs
+    from December to February and belongs to the year of its January.
+    """
+    WINTER, SPRING, SUMMER, AUTUMN = 1, 2, 3, 4
+    SEASONS = [
+        (WINTER, "winter"),
+        (SPRING, "spring"),
+        (SUMMER, "summer"),
+        (AUTUMN, "autumn"),
+    ]
+    season = models.PositiveSmallIntegerField(verbose_name="Season", choices=SEASONS)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["station", "year", "season"], name="unique_station_year_season"
+            )
+        ]
+        ordering = ["station", "year", "season"]
+
+    def __str__(self):
+        return f"Statistics for {self.station} on {self.get_season_display()} {self.year}"
+
+
+class CropYield(models.Model):
+    """Yearly total corn grain yield of the United States, in thousands of metric tons."""
+    year = models.IntegerField(verbose_name="Harvest Year", unique=True)
+    corn_grain_yield = models.BigIntegerField(verbose_name="Corn Grain Yield")
+
+    class Meta:
+        ordering = ["year"]
+
+    def __str__(self):
+        return f"Corn grain yield for {self.year}"
+
+
+class IngestedFile(models.Model):
+    """Manifest entry for an ingested weather data file, used to skip unchanged files and load appended tails."""
+    name = models.CharField(verbose_name="File Name", max_length=255, unique=True)
+    size = models.BigIntegerField(verbose_name="Size in Bytes")
+    mtime = models.FloatField(verbose_name="Modification Time")
+    content_hash = models.CharField(verbose_name="SHA-256 of Content", max_length=64)
+    rows = models.IntegerField(verbose_name="Rows Loaded", default=0)
+    ingested_at = models.DateTimeField(verbose_name="Ingested At", auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return f"Manifest for {self.name}"
+
+
+class DataVersion(models.Model):
+    """Single-row counter bumped whenever ingestion changes the data; cached counts and responses are keyed on it."""
+    version = models.PositiveBigIntegerField(verbose_name="Data Version", default=0)
+    updated_at = models.DateTimeField(verbose_name="Updated At", auto_now=True)
+
+    def __str__(self):
+        return f"Data version {self.version}"
+
+
+class QuarantinedRecord(models.Model):
+    """A station file line rejected at ingestion, with the reason code of the parser or validation rule that rejected it."""
+    station = models.ForeignKey(
+        Station,
+        verbose_name="Station",
+        on_delete=models.CASCADE,
+        related_name="quarantined_records",
+    )
+    file = models.CharField(verbose_name="File Name", max_length=255)
+    reason = models.CharField(verbose_name="Reason Code", max_length=32)
+    # Parsed values when the line was readable, the raw line otherwise.
+    date = models.DateField(verbose_name="Record Date", null=True, blank=True)
+    maximum_temperature = models.IntegerField(
+        verbose_name="Maximum Temperature", null=True, blank=True
+    )
+    minimum_temperature = models.IntegerField(
+        verbose_name="Minimum Temperature", null=True, blank=True
+    )
+    precipitation = models.IntegerField(
+        verbose_name="Precipitation", null=True, blank=True
+    )
+    line = models.TextField(verbose_name="Raw Line", blank=True)
+    quarantined_at = models.DateTimeField(verbose_name="Quarantined At", auto_now_add=True)
+
+    class Meta:
+        ordering = ["station", "date"]
+
+    def __str__(self):
+        return f"Quarantined {self.reason} record for {self.station} on {self.date}"
+
+
+class StationQuality(models.Model):
+    """Data quality summary of a station: loaded and quarantined rows, incomplete rows and missing-day coverage."""
+    station = models.OneToOneField(
+        Station,
+        verbose_name="Station",
+        on_delete=models.CASCADE,
+        related_name="quality",
+    )
+    records = models.IntegerField(verbose_name="Loaded Records")
+    incomplete_records = models.IntegerField(
+        verbose_name="Records Missing a Measurement"
+    )
+    first_date = models.DateField(verbose_name="First Record Date", null=True)
+    last_date = models.DateField(verbose_name="Last Record Date", null=True)
+    missing_days = models.IntegerField(
+        verbose_name="Days Without a Record Between the First and Last"
+    )
+    coverage = models.FloatField(verbose_name="Share of Days With a Record", null=True)
+    quarantined_records = models.IntegerField(verbose_name="Quarantined Records")
+    quarantine_reasons = models.JSONField(
+        verbose_name="Quarantined Records per Reason", default=dict
+    )
+    updated_at = models.DateTimeField(verbose_name="Updated At", auto_now=True)
+
+    class Meta:
+        ordering = ["station"]
+
+    def __str__(self):
+        return f"Data quality of {self.station}"
+
+
+class IngestionRun(models.Model):
+    """
+    An ingestion job: queued by the API or `ingest_worker --enqueue`, run by
+    `ingest_worker` or `create`, with its progress and per stage counters and
+    timings. /metrics exposes the last finished run.
+    """
+    QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+    STATUSES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+    STAGE_FIELDS = (
+        "files_scanned",
+        "files_loaded",
+        "files_appended",
+        "files_skipped",
+        "files_failed",
+        "rows_parsed",
+        "parse_seconds",
+        "rows_quarantined",
+        "validate_seconds",
+        "rows_inserted",
+        "conflicts_skipped",
+        "load_seconds",
+        "statistics_upserted",
+        "statistics_seconds",
+        "rollups_upserted",
+        "rollups_seconds",
+        "quality_seconds",
+    )
+
+    status = models.CharField(
+        verbose_name="Status", max_length=16, choices=STATUSES, default=QUEUED
+    )
+    # Keyword arguments of dump_wx_data: batch_size, loader, parser, workers, force.
+    options = models.JSONField(verbose_name="Options", default=dict)
+    queued_at = models.DateTimeField(verbose_name="Queued At", auto_now_add=True)
+    started_at = models.DateTimeField(verbose_name="Started At", null=True)
+    finished_at = models.DateTimeField(verbose_name="Finished At", null=True)
+    worker = models.CharField(verbose_name="Worker", max_length=255, blank=True)
+    phase = models.CharField(verbose_name="Current Phase", max_length=32, blank=True)
+    files_done = models.IntegerField(verbose_name="Files Processed", default=0)
+    files_to_load = models.IntegerField(verbose_name="Files to Load", default=0)
+    error = models.TextField(verbose_name="Error", blank=True)
+    files_scanned = models.IntegerField(verbose_name="Files Scanned", default=0)
+    files_loaded = models.IntegerField(verbose_name="Files Loaded", default=0)
+    files_appended = models.IntegerField(verbose_name="Files Appended", default=0)
+    files_skipped = models.IntegerField(verbose_name="Files Skipped", default=0)
+    files_failed = models.IntegerField(verbose_name="Files Failed", default=0)
+    rows_parsed = models.BigIntegerField(verbose_name="Rows Parsed", default=0)
+    parse_seconds = models.FloatField(verbose_name="Parse Seconds", default=0)
+    rows_quarantined = models.BigIntegerField(verbose_name="Rows Quarantined", default=0)
+    validate_seconds = models.FloatField(verbose_name="Validate Seconds", default=0)
+    # Unknown with the ORM loader, which cannot tell new rows from conflicts.
+    rows_inserted = models.BigIntegerField(verbose_name="Rows Inserted", null=True)
+    conflicts_skipped = models.BigIntegerField(
+        verbose_name="Conflicting Rows Skipped", null=True
+    )
+    load_seconds = models.FloatField(verbose_name="Load Seconds", default=0)
+    statistics_upserted = models.IntegerField(
+        verbose_name="Statistics Upserted", default=0
+    )
+    statistics_seconds = models.FloatField(verbose_name="Statistics Seconds", default=0)
+    rollups_upserted = models.IntegerField(verbose_name="Rollups Upserted", default=0)
+    rollups_seconds = models.FloatField(verbose_name="Rollups Seconds", default=0)
+    quality_seconds = models.FloatField(verbose_name="Quality Summary Seconds", default=0)
+
+    class Meta:
+        ordering = ["-queued_at"]
+
+    @property
+    def rows_parsed_per_second(self):
+        return self.rows_parsed / self.parse_seconds if self.parse_seconds else None
+
+    def record_ingestion(self, result):
+        """Copies the file, row and stage totals of a dump_wx_data IngestionResult."""
+        self.files_scanned = result.files
+        for status in ("loaded", "appended", "skipped", "failed"):
+            setattr(self, f"files_{status}", result.statuses.get(status, 0))
+        self.rows_parsed = result.rows
+        self.parse_seconds = result.parse_seconds
+        self.rows_quarantined = result.quarantined
+        self.validate_seconds = result.validate_seconds
+        self.rows_inserted = result.inserted
+        self.conflicts_skipped = (
+            None if result.inserted is None else result.rows - result.inserted
+        )
+        self.load_seconds = result.load_seconds
+
+    def __str__(self):
+        return f"Ingestion run {self.pk} ({self.status})"
@@ -0,0 +1,261 @@
+import json
+import hashlib
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from .metrics import record_cache
+from .versioning import data_version_token
+
+
+def estimate_count(queryset):
+    """
+    Returns the PostgreSQL planner's row estimate for a queryset, or None when
+    no estimate is available (other databases, or a table never analyzed).
+    Unfiltered querysets read pg_class.reltuples (summed over partitions),
+    filtered ones use EXPLAIN.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            # A partitioned table has no statistics of its own; add up its partitions.
+            cursor.execute(
+                "SELECT CASE WHEN parent.relkind = 'p' THEN ("
+                "SELECT SUM(child.reltuples) FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = parent.oid AND child.reltuples >= 0"
+                ") ELSE parent.reltuples END "
+                "FROM pg_class parent WHERE parent.oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            estimate = row[0] if row and row[0] is not None else -1
+        else:
+            try:
+                sql, params = queryset.order_by().query.sql_with_params()
+            except EmptyResultSet:
+                return None
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = plan[0]["Plan"]["Plan Rows"]
+    return int(estimate) if estimate >= 0 else None
+
+
+def cached_count(queryset):
+    """Returns the exact count of a queryset, cached per query and data version."""
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        # Filters such as station__in=[] are known to match nothing.
+        return 0
+    digest = hashlib.sha256(f"{sql}|{params!r}".encode()).hexdigest()
+    key = f"count:{data_version_token()}:{digest}"
+    cache = caches[settings.API_COUNT_CACHE]
+    count = cache.get(key)
+    record_cache("count", count is not None)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.API_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def page_count(queryset):
+    """
+    Returns (count, exact): the planner estimate when it is above
+    API_COUNT_ESTIMATE_THRESHOLD, otherwise the cached exact count.
+    """
+    estimate = estimate_count(queryset)
+    if estimate is not None and estimate >= settings.API_COUNT_ESTIMATE_THRESHOLD:
+        return estimate, False
+    return cached_count(queryset), True
+
+
+class EstimatedCountPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination whose count comes from the planner estimate when
+    that estimate is above API_COUNT_ESTIMATE_THRESHOLD, and otherwise from an
+    exact COUNT(*) cached until the next ingestion. The response carries
+    `count_exact` so clients know which one they got.
+    """
+
+    def get_count(self, queryset):
+        if not isinstance(queryset, QuerySet):
+            # Results computed in Python, such as columnar snapshot aggregates.
+            self.count_exact = True
+            return len(queryset)
+        count, self.count_exact = page_count(queryset)
+        return count
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.count,
+                "count_exact": self.count_exact,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_exact"] = {"type": "boolean"}
+        return response_schema
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite key such as (station, date).
+
+    Each page seeks past the last key of the previous one instead of using
+    OFFSET, and no COUNT(*) is run, so page latency does not grow with depth.
+    Rows with NULL in a key column have no position and are left out.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 1000
+    ordering = ("station", "date")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(getattr(view, "keyset_ordering", self.ordering))
+        self.fields = [queryset.model._meta.get_field(name) for name in self.ordering]
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.filter(
+            **{f"{field.name}__isnull": False for field in self.fields if field.null}
+        )
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.seek(position, reverse))
+        order = [f"-{name}" if reverse else name for name in self.ordering]
+        results = list(queryset.order_by(*order)[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next_position = self.previous_position = None
+        if results and (has_more or reverse):
+            self.next_position = self.key(results[-1])
+        if results and (position is not None) and (has_more or not reverse):
+            self.previous_position = self.key(results[0])
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def key(self, row):
+        """Returns the ordering key of a result row, which may be a model instance or a dict."""
+        if isinstance(row, dict):
+            return [row[field.attname] for field in self.fields]
+        return [getattr(row, field.attname) for field in self.fields]
+
+    def seek(self, position, reverse):
+        """Builds the filter selecting rows strictly after (or before, when reversed) `position`."""
+        lookup = "lt" if reverse else "gt"
+        first = self.fields[0]
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.fields, position):
+            condition |= Q(**equal, **{f"{field.attname}__{lookup}": value})
+            equal[field.attname] = value
+        # The redundant bound on the leading column lets the index range scan start at the cursor.
+        bound = {f"{first.attname}__{lookup}e": position[0]}
+        return Q(**bound) & condition
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({"p": position, "r": int(reverse)}, default=str)
+        token = urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(token.encode()))
+            position = [
+                field.to_python(value) for field, value in zip(self.fields, payload["p"])
+            ]
+            if len(position) != len(self.fields):
+                raise ValueError
+            return position, bool(payload["r"])
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class PaginationModeMixin:
+    """
+    Lets a list view switch from the default limit/offset pagination to
+    KeysetPagination with ?pagination=cursor, by passing a cursor, or globally
+    through the API_PAGINATION_MODE setting.
+    """
+
+    keyset_ordering = KeysetPagination.ordering
+
+    def use_keyset_pagination(self):
+        request = getattr(self, "request", None)
+        params = getattr(request, "query_params", {})
+        mode = params.get("pagination", settings.API_PAGINATION_MODE)
+        return mode == "cursor" or KeysetPagination.cursor_query_param in params
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.use_keyset_pagination():
+                self._paginator = KeysetPagination()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
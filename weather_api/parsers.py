@@ -0,0 +1,280 @@
+import logging
+import warnings
+import numpy as np
+from datetime import datetime
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MISSING = "-9999"
+MISSING_VALUE = -9999
+FIELDS = 4
+
+
+class StationFrame:
+    """
+    Columnar rows of one station file: dates as datetime64[D] and masked int32
+    measurement columns. `rejects` holds the (line, reason) pairs the parser
+    could not turn into rows.
+    """
+
+    def __init__(
+        self,
+        station,
+        dates,
+        maximum_temperature,
+        minimum_temperature,
+        precipitation,
+        rejects=(),
+    ):
+        self.station = station
+        self.dates = dates
+        self.maximum_temperature = maximum_temperature
+        self.minimum_temperature = minimum_temperature
+        self.precipitation = precipitation
+        self.rejects = list(rejects)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, index):
+        return StationFrame(
+            self.station,
+            self.dates[index],
+            self.maximum_temperature[index],
+            self.minimum_temperature[index],
+            self.precipitation[index],
+        )
+
+    @classmethod
+    def from_rows(cls, station, rows, rejects=()):
+        """Builds a frame from (station, date, max, min, precipitation) tuples as produced by the text parser."""
+        columns = list(zip(*rows)) or [(), (), (), (), ()]
+        return cls(
+            station,
+            np.array(columns[1], dtype="datetime64[D]"),
+            *(
+                np.ma.masked_equal(
+                    np.array(
+                        [MISSING_VALUE if value is None else value for value in column],
+                        dtype=np.int32,
+                    ),
+                    MISSING_VALUE,
+                )
+                for column in columns[2:]
+            ),
+            rejects,
+        )
+
+    @property
+    def columns(self):
+        """The three masked measurement columns, in model field order."""
+        return (self.maximum_temperature, self.minimum_temperature, self.precipitation)
+
+    def rows(self):
+        """Returns the frame as (station, date, max, min, precipitation) tuples with None for missing values."""
+        return list(
+            zip(
+                [self.station] * len(self),
+                self.dates.tolist(),
+                *(column.tolist() for column in self.columns),
+            )
+        )
+
+    def years(self):
+        """Returns the distinct calendar years present in the frame."""
+        dates = self.dates[~np.isnat(self.dates)]
+        years = np.unique(dates.astype("datetime64[Y]")).astype(int) + 1970
+        return set(years.tolist())
+
+    def by_year(self):
+        """Yields (year, frame) for each calendar year in the frame, and (None, frame) for rows without a date."""
+        missing = np.isnat(self.dates)
+        years = self.dates.astype("datetime64[Y]").astype(int) + 1970
+        for year in np.unique(years[~missing]).tolist():
+            yield year, self[(years == year) & ~missing]
+        if missing.any():
+            yield None, self[missing]
+
+    def yearly_statistics(self):
+        """Vectorised equivalent of dump.yearly_statistics for this station: averages and totals over complete rows."""
+        complete = ~np.isnat(self.dates)
+        for column in self.columns:
+            complete &= ~np.ma.getmaskarray(column)
+        years = self.dates[complete].astype("datetime64[Y]").astype(int) + 1970
+        if not years.size:
+            return []
+        unique_years, index = np.unique(years, return_inverse=True)
+        counts = np.bincount(index)
+        maximum, minimum, precipitation = (
+            np.bincount(index, weights=column.data[complete].astype(np.float64))
+            for column in self.columns
+        )
+        return [
+            {
+                "station": self.station,
+                "year": int(year),
+                "average_max_temperature": float(maximum[i] / counts[i]),
+                "average_min_temperature": float(minimum[i] / counts[i]),
+                "total_precipitation": int(precipitation[i]),
+            }
+            for i, year in enumerate(unique_years)
+        ]
+
+
+def ymd_to_dates(values):
+    """Converts YYYYMMDD integers to datetime64[D], returning the dates and a mask of values that are not real days."""
+    year, month, day = values // 10000, values // 100 % 100, values % 100
+    months = (year - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (month - 1)
+    dates = months.astype("datetime64[D]") + (day - 1)
+    invalid = (
+        (month < 1)
+        | (month > 12)
+        | (day < 1)
+        | (dates.astype("datetime64[M]") != months)
+    )
+    return dates, invalid
+
+
+def _parse_values(text):
+    """Parses whitespace separated integers in C, returning None when the text contains anything else."""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            return np.fromstring(text, dtype=np.int32, sep=" ")
+    except (ValueError, DeprecationWarning):
+        return None
+
+
+def _has_four_fields_per_line(text, lines):
+    """Checks in one vectorised pass that each of the `lines` lines has exactly three tabs before its newline."""
+    data = np.frombuffer(text.encode(), dtype=np.uint8)
+    # Tab and newline are the only bytes of a station file at or below 10.
+    separators = data[data <= ord("\n")]
+    if data.size and data[-1] != ord("\n"):
+        separators = np.append(separators, np.uint8(ord("\n")))
+    if separators.size != lines * FIELDS:
+        return False
+    expected = np.array([ord("\t")] * (FIELDS - 1) + [ord("\n")], dtype=np.uint8)
+    return bool((separators.reshape(-1, FIELDS) == expected).all())
+
+
+def _well_formed_lines(text, rejects):
+    """Slow path for files with malformed lines: keeps only lines holding exactly four integers, adding the others to `rejects`."""
+    lines = []
+    for line in text.splitlines():
+        try:
+            numbers = [int(field) for field in line.strip().split("\t")]
+        except ValueError:
+            numbers = []
+        if len(numbers) == FIELDS:
+            lines.append(" ".join(map(str, numbers)))
+        else:
+            rejects.append((line, "malformed_row"))
+    return "\n".join(lines)
+
+
+def log_rejects(path, rejects):
+    """Logs one warning per file with the number of rows the parser skipped, rather than one per row."""
+    if rejects:
+        logger.warning(f"Skipped {len(rejects)} invalid data rows in {path}")
+
+
+def parse_station_frame(station, path, offset=0):
+    """Reads a whole station file from byte `offset` into a StationFrame in one vectorised pass."""
+    with open(path, "r") as input_file:
+        input_file.seek(offset)
+        text = input_file.read()
+
+    lines = text.count("\n") + (not text.endswith("\n") and bool(text))
+    rejects = []
+    values = _parse_values(text)
+    # A short line followed by a long one still adds up to four values per
+    # line, so the fields of every line are counted before trusting them.
+    if (
+        values is None
+        or values.size != lines * FIELDS
+        or not _has_four_fields_per_line(text, lines)
+    ):
+        values = _parse_values(_well_formed_lines(text, rejects))
+    values = values.reshape(-1, FIELDS)
+
+    ymd = values[:, 0]
+    dates, invalid = ymd_to_dates(ymd)
+    missing_date = ymd == MISSING_VALUE
+    dates[missing_date] = np.datetime64("NaT")
+    keep = ~(invalid & ~missing_date)
+    if not keep.all():
+        for row in values[~keep].tolist():
+            rejects.append(("\t".join(map(str, row)), "invalid_date"))
+        values, dates = values[keep], dates[keep]
+    log_rejects(path, rejects)
+
+    return StationFrame(
+        station,
+        dates,
+        *(
+            np.ma.masked_equal(values[:, column], MISSING_VALUE)
+            for column in range(1, FIELDS)
+        ),
+        rejects,
+    )
+
+
+def parse_station_file(station, path, offset=0, rejects=None):
+    """
+    Lazily parses one station file from byte `offset`, yielding (station,
+    date, max, min, precipitation) tuples. Unparseable lines are appended to
+    `rejects` as (line, reason) pairs and counted in one warning at the end.
+    """
+    rejects = [] if rejects is None else rejects
+    with open(path, "r") as input_file:
+        input_file.seek(offset)
+        for row in input_file:
+            data = row.strip().split("\t")
+            try:
+                if len(data) > FIELDS:
+                    raise ValueError(f"{len(data)} fields")
+                maximum_temperature = int(data[1]) if data[1] != MISSING else None
+                minimum_temperature = int(data[2]) if data[2] != MISSING else None
+                precipitation = int(data[3]) if data[3] != MISSING else None
+                int(data[0])
+            except (ValueError, IndexError):
+                rejects.append((row.rstrip("\n"), "malformed_row"))
+                continue
+            try:
+                date = (
+                    datetime.strptime(data[0], "%Y%m%d").date()
+                    if data[0] != MISSING
+                    else None
+                )
+            except ValueError:
+                rejects.append((row.rstrip("\n"), "invalid_date"))
+                continue
+
+            yield (
+                station,
+                date,
+                maximum_temperature,
+                minimum_temperature,
+                precipitation,
+            )
+    log_rejects(path, rejects)
+
+
+def parse_text_frame(station, path, offset=0):
+    """Row by row fallback parser: runs parse_station_file and packs its rows into a StationFrame."""
+    rejects = []
+    rows = list(parse_station_file(station, path, offset, rejects))
+    return StationFrame.from_rows(station, rows, rejects)
+
+
+PARSERS = {"numpy": parse_station_frame, "text": parse_text_frame}
+
+
+def get_parser(name=None):
+    """Returns the station file parser registered under `name`, defaulting to INGEST_PARSER."""
+    name = name or settings.INGEST_PARSER
+    if name not in PARSERS:
+        raise ValueError(f"Unknown parser {name!r}, choose from {sorted(PARSERS)}")
+    return PARSERS[name]
@@ -0,0 +1,195 @@
+import logging
+from datetime import date
+from django.conf import settings
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from .models import WeatherRecord
+
+logger = logging.getLogger(__name__)
+
+TABLE = WeatherRecord._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+MEASUREMENT_COLUMNS = "maximum_temperature, minimum_temperature, precipitation"
+
+_partitioned = {}
+_years = {}
+
+
+def partition_name(year):
+    """Returns the table name of the partition holding the rows dated in `year`."""
+    return f"{TABLE}_y{int(year)}"
+
+
+def year_bounds(year):
+    """Returns the inclusive lower and exclusive upper date literals of a yearly partition."""
+    return f"'{int(year)}-01-01'", f"'{int(year) + 1}-01-01'"
+
+
+def is_partitioned(using=DEFAULT_DB_ALIAS):
+    """Tells whether WeatherRecord is a partitioned PostgreSQL table on this database."""
+    if using not in _partitioned:
+        connection = connections[using]
+        partitioned = False
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+                    [TABLE],
+                )
+                partitioned = cursor.fetchone() is not None
+        _partitioned[using] = partitioned
+    return _partitioned[using]
+
+
+def partition_years(using=DEFAULT_DB_ALIAS):
+    """Returns the years that have their own partition."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [TABLE],
+        )
+        prefix = f"{TABLE}_y"
+        return {
+            int(name[len(prefix):])
+            for (name,) in cursor.fetchall()
+            if name.startswith(prefix)
+        }
+
+
+def known_partition_years(using=DEFAULT_DB_ALIAS):
+    """Returns the years with their own partition, read once per process and kept current by ensure_partitions."""
+    if using not in _years:
+        _years[using] = partition_years(using) if is_partitioned(using) else set()
+    return _years[using]
+
+
+def create_partition(cursor, year):
+    """
+    Creates the partition of one year. Rows of that year that were routed to
+    the default partition meanwhile are moved into it, since PostgreSQL
+    refuses a new partition whose range the default partition still holds.
+    Detaching the default partition locks the whole table until the
+    transaction ends, so this must not run while the API is loading data.
+    """
+    lower, upper = year_bounds(year)
+    cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+    cursor.execute(
+        f"CREATE TABLE {partition_name(year)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ({lower}) TO ({upper})"
+    )
+    condition = f"date >= {lower} AND date < {upper}"
+    cursor.execute(
+        f"INSERT INTO {TABLE} SELECT * FROM {DEFAULT_PARTITION} WHERE {condition}"
+    )
+    cursor.execute(f"DELETE FROM {DEFAULT_PARTITION} WHERE {condition}")
+    cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+
+
+def ensure_partitions(years, using=DEFAULT_DB_ALIAS):
+    """Creates the missing yearly partitions for `years`; does nothing when the table is not partitioned."""
+    years = {year for year in years if year is not None}
+    if not years or not is_partitioned(using):
+        return
+    known = known_partition_years(using)
+    if years <= known:
+        return
+    connection = connections[using]
+    # Partitions created inside an outer transaction may still be rolled back.
+    remember = not connection.in_atomic_block
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        # Serialises partition creation between processes.
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [TABLE])
+        existing = partition_years(using)
+        for year in sorted(years - existing):
+            create_partition(cursor, year)
+            logger.info(f"Created partition {partition_name(year)}")
+    if remember:
+        known.update(existing | years)
+
+
+def ensure_partitions_ahead(using=DEFAULT_DB_ALIAS):
+    """
+    Creates the yearly partitions from PARTITION_FIRST_YEAR up to next year,
+    plus those of any dated rows that ended up in the default partition.
+    Loaders never create partitions, since that briefly locks the whole table,
+    so this runs after migrate and before each `create` or queued run, under
+    the ingestion lock.
+    """
+    if not is_partitioned(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT EXTRACT(YEAR FROM date)::int FROM {DEFAULT_PARTITION} "
+            "WHERE date IS NOT NULL"
+        )
+        stray = {year for (year,) in cursor.fetchall()}
+    years = set(range(settings.PARTITION_FIRST_YEAR, date.today().year + 2))
+    ensure_partitions(years | stray, using)
+
+
+def forget_partitions(using=DEFAULT_DB_ALIAS):
+    """Drops what this process knows about the partition layout, e.g. after a migration."""
+    _partitioned.pop(using, None)
+    _years.pop(using, None)
+
+
+def swap_partition(year, load, using=DEFAULT_DB_ALIAS):
+    """
+    Replaces the partition of `year` with a table filled by `load(table)`.
+
+    The new table is loaded and indexed while the old partition keeps serving
+    reads; the swap itself is a detach, drop, rename and attach in one short
+    transaction. A CHECK constraint matching the bounds lets the attach skip
+    its validation scan. Returns whatever `load` returned.
+    """
+    if not is_partitioned(using):
+        raise ValueError("Swapping a partition needs the partitioned PostgreSQL table")
+    ensure_partitions({year}, using)
+    name = partition_name(year)
+    staging = f"{name}_new"
+    lower, upper = year_bounds(year)
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(f"CREATE TABLE {staging} (LIKE {TABLE} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"ALTER TABLE {staging} ADD CONSTRAINT {staging}_bounds "
+            f"CHECK (date IS NOT NULL AND date >= {lower} AND date < {upper})"
+        )
+        # Constraints rather than bare unique indexes, so that the attach can
+        # adopt them for the parent's unique constraints instead of rebuilding.
+        cursor.execute(
+            f"ALTER TABLE {staging} ADD CONSTRAINT {staging}_date_station "
+            "UNIQUE (date, station_id)"
+        )
+        cursor.execute(
+            f"ALTER TABLE {staging} ADD CONSTRAINT {staging}_id_date UNIQUE (id, date)"
+        )
+    result = load(staging)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE INDEX {staging}_station_date ON {staging} (station_id, date) "
+            f"INCLUDE ({MEASUREMENT_COLUMNS})"
+        )
+        cursor.execute(f"CREATE INDEX {staging}_date_brin ON {staging} USING brin (date)")
+        cursor.execute(f"ANALYZE {staging}")
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+        cursor.execute(f"DROP TABLE {name}")
+        cursor.execute(f"ALTER TABLE {staging} RENAME TO {name}")
+        # Index names share the schema's namespace, so the staging names are
+        # given up here for the next swap of this year to reuse.
+        for suffix in ("date_station", "id_date"):
+            cursor.execute(
+                f"ALTER TABLE {name} RENAME CONSTRAINT {staging}_{suffix} TO {name}_{suffix}"
+            )
+        for suffix in ("station_date", "date_brin"):
+            cursor.execute(f"ALTER INDEX {staging}_{suffix} RENAME TO {name}_{suffix}")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ({lower}) TO ({upper})"
+        )
+        cursor.execute(f"ALTER TABLE {name} DROP CONSTRAINT {staging}_bounds")
+    logger.info(f"Swapped partition {name}")
+    return result
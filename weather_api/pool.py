@@ -0,0 +1,180 @@
+import os
+import logging
+from time import monotonic, perf_counter
+from threading import BoundedSemaphore, Lock
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = Lock()
+# Idle connections inherited from the parent process across a fork. They are
+# never closed, and stay referenced so they are not garbage collected either:
+# both would send a Terminate message on the socket the parent still uses.
+_inherited = []
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became free within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    Keeps at most `max_size` database connections checked out at once and
+    reuses returned ones instead of opening a new connection per request.
+    Connections older than `max_lifetime` seconds are replaced, and ones idle
+    for more than `check_after` seconds are passed to `check` before being
+    handed out again.
+    """
+
+    def __init__(
+        self,
+        max_size=10,
+        timeout=30.0,
+        max_lifetime=3600.0,
+        check=None,
+        check_after=30.0,
+    ):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check = check
+        self.check_after = check_after
+        self.lock = Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.slots = BoundedSemaphore(self.max_size)
+        # Idle connections as (connection, opened_at, returned_at), newest last.
+        self.idle = deque()
+        self.opened_at = {}
+        self.metrics = {
+            "checkouts": 0,
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "exhausted": 0,
+            "timeouts": 0,
+        }
+
+    def _after_fork(self):
+        """
+        Forgets the connections of the parent process without closing them:
+        they share their sockets with the parent, which keeps using them. The
+        idle ones are parked in `_inherited` to keep them from being freed.
+        """
+        if self.pid != os.getpid():
+            with self.lock:
+                if self.pid != os.getpid():
+                    _inherited.extend(connection for connection, *_ in self.idle)
+                    self._reset()
+
+    def _discard(self, connection):
+        self.opened_at.pop(id(connection), None)
+        self.metrics["connections_closed"] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _take_idle(self):
+        """Pops the most recently returned connection that is still usable, or returns None."""
+        while True:
+            with self.lock:
+                if not self.idle:
+                    return None
+                connection, opened_at, returned_at = self.idle.pop()
+            now = monotonic()
+            usable = not connection.closed and now - opened_at < self.max_lifetime
+            if usable and self.check and now - returned_at > self.check_after:
+                usable = self.check(connection)
+            if usable:
+                return connection
+            with self.lock:
+                self._discard(connection)
+
+    def checkout(self, connect):
+        """Returns a pooled connection, or one opened with `connect`, waiting up to `timeout` seconds when all are in use."""
+        self._after_fork()
+        start = perf_counter()
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.metrics["exhausted"] += 1
+            logger.warning(f"Connection pool exhausted ({self.max_size} in use), waiting")
+            if not self.slots.acquire(timeout=self.timeout):
+                with self.lock:
+                    self.metrics["timeouts"] += 1
+                raise PoolTimeout(
+                    f"No database connection became free within {self.timeout} seconds"
+                )
+        waited = perf_counter() - start
+        try:
+            connection = self._take_idle()
+            if connection is None:
+                connection = connect()
+                with self.lock:
+                    self.opened_at[id(connection)] = monotonic()
+                    self.metrics["connections_opened"] += 1
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.metrics["checkouts"] += 1
+            self.metrics["wait_seconds_total"] += waited
+            self.metrics["wait_seconds_max"] = max(self.metrics["wait_seconds_max"], waited)
+        return connection
+
+    def checkin(self, connection, reusable=True):
+        """Returns a checked out connection; it is closed instead when it is not `reusable` or closed already."""
+        self._after_fork()
+        with self.lock:
+            opened_at = self.opened_at.get(id(connection))
+            if opened_at is None:
+                # Checked out before a fork, or from another pool.
+                return
+            if reusable and not connection.closed:
+                self.idle.append((connection, opened_at, monotonic()))
+            else:
+                self._discard(connection)
+        self.slots.release()
+
+    def close(self):
+        """Closes the idle connections."""
+        self._after_fork()
+        with self.lock:
+            while self.idle:
+                self._discard(self.idle.pop()[0])
+
+    def stats(self):
+        """Returns the pool counters plus the current number of connections in use and idle."""
+        self._after_fork()
+        with self.lock:
+            idle = len(self.idle)
+            return {
+                **self.metrics,
+                "max_size": self.max_size,
+                "in_use": len(self.opened_at) - idle,
+                "idle": idle,
+            }
+
+
+def get_pool(key, **options):
+    """Returns the process-wide pool registered under `key`, creating it with `options` on first use."""
+    if key not in _pools:
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(**options)
+    return _pools[key]
+
+
+def pool_stats():
+    """Returns the stats of every connection pool in this process, keyed by database alias and name."""
+    return {key: pool.stats() for key, pool in list(_pools.items())}
+
+
+def close_pools():
+    """Closes the idle connections of every pool in this process."""
+    for pool in list(_pools.values()):
+        pool.close()
@@ -0,0 +1,147 @@
+import os
+import json
+import random
+import cProfile
+from threading import Lock
+from pathlib import Path
+from time import perf_counter
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from .middleware import route_name
+
+# cProfile can only run one profile at a time per process on Python 3.12+.
+_lock = Lock()
+
+
+class Profiler:
+    """
+    Collects a cProfile profile and a timeline of the SQL queries run on any
+    database connection of this thread while it is entered.
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.queries = []
+        self.start = self.seconds = None
+        self.stack = ExitStack()
+
+    def __enter__(self):
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self.record_query))
+        self.start = perf_counter()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        self.seconds = perf_counter() - self.start
+        self.stack.close()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {
+                    "alias": context["connection"].alias,
+                    "sql": sql,
+                    "start": start - self.start,
+                    "duration": perf_counter() - start,
+                }
+            )
+
+    def trace_events(self, name):
+        """Returns the run and its queries as Chrome trace events, in microseconds."""
+        pid, tid = os.getpid(), 0
+        events = [
+            {
+                "name": name,
+                "cat": "run",
+                "ph": "X",
+                "ts": 0,
+                "dur": round(self.seconds * 1e6),
+                "pid": pid,
+                "tid": tid,
+            }
+        ]
+        for query in self.queries:
+            events.append(
+                {
+                    "name": query["sql"][:80],
+                    "cat": "sql",
+                    "ph": "X",
+                    "ts": round(query["start"] * 1e6),
+                    "dur": round(query["duration"] * 1e6),
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"alias": query["alias"], "sql": query["sql"]},
+                }
+            )
+        return events
+
+    def save(self, name, folder=None):
+        """
+        Writes `name`.prof, a pstats file for snakeviz, flameprof or gprof2dot,
+        and `name`.trace.json, the SQL timeline in the Chrome trace format read
+        by Perfetto and speedscope. Returns the path of the .prof file.
+        """
+        folder = Path(folder or settings.PROFILING["DIR"])
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{name}.prof"
+        self.profile.dump_stats(path)
+        with open(folder / f"{name}.trace.json", "w") as trace:
+            json.dump({"traceEvents": self.trace_events(name)}, trace)
+        return path
+
+
+def profile_name(label):
+    """Builds a unique, sortable artifact name from a label such as a route name."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    return f"{stamp}-{os.getpid()}-{label.replace(':', '-').replace('/', '-')}"
+
+
+def wants_profile(request, config):
+    """Returns whether the request asked for a profile with the header (and token, when one is set)."""
+    value = request.headers.get(config["HEADER"])
+    if value is None:
+        return False
+    return not config["TOKEN"] or value == config["TOKEN"]
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests that send the PROFILING["HEADER"] header, plus a random
+    PROFILING["SAMPLE_RATE"] share of the others. Requested profiles are always
+    kept; sampled ones only when the request took at least
+    PROFILING["SLOW_THRESHOLD"] seconds. The response names the artifacts in
+    X-Profile-Id. Requests arriving while another one is profiled run
+    unprofiled. Removed from the middleware chain unless PROFILING is enabled.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = settings.PROFILING
+        requested = wants_profile(request, config)
+        if not requested and random.random() >= config["SAMPLE_RATE"]:
+            return self.get_response(request)
+        if not _lock.acquire(blocking=False):
+            # Another request of this process is being profiled.
+            return self.get_response(request)
+        try:
+            with Profiler() as profiler:
+                response = self.get_response(request)
+        finally:
+            _lock.release()
+        if requested or profiler.seconds >= config["SLOW_THRESHOLD"]:
+            name = profile_name(route_name(request))
+            profiler.save(name)
+            response["X-Profile-Id"] = name
+        return response
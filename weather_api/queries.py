@@ -0,0 +1,77 @@
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.db.models.functions import TruncMonth, TruncYear
+from .stations import station_ids
+from .models import SeasonalStatistic
+
+AGGREGATION_PERIODS = {"month": TruncMonth, "year": TruncYear}
+
+
+def split_stations(value):
+    """Splits a comma separated station parameter into a list of station names."""
+    return [station.strip() for station in value.split(",") if station.strip()]
+
+
+def filter_weather_records(queryset, params):
+    """Applies the date, date_from, date_to and comma separated station filters of a request to a WeatherRecord queryset."""
+    date = params.get("date", None)
+    date_from = params.get("date_from", None)
+    date_to = params.get("date_to", None)
+    stations = split_stations(params.get("station", None) or "")
+
+    if date:
+        queryset = queryset.filter(date=date)
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    if stations:
+        # Codes resolve through the station cache, so no join on Station is needed.
+        ids = station_ids(stations)
+        if len(ids) == 1:
+            queryset = queryset.filter(station_id=ids[0])
+        else:
+            queryset = queryset.filter(station_id__in=ids)
+    return queryset
+
+
+def filter_rollups(queryset, params):
+    """Applies the comma separated station, year, month and season filters of a request to a rollup queryset."""
+    stations = split_stations(params.get("station", None) or "")
+    year = params.get("year", None)
+    month = params.get("month", None)
+    season = params.get("season", None)
+
+    if stations:
+        queryset = queryset.filter(station_id__in=station_ids(stations))
+    if year:
+        queryset = queryset.filter(year=year)
+    if month:
+        queryset = queryset.filter(month=month)
+    if season:
+        seasons = {name: value for value, name in SeasonalStatistic.SEASONS}
+        if season not in seasons:
+            raise ValueError(f"season must be one of {', '.join(seasons)}, not {season!r}")
+        queryset = queryset.filter(season=seasons[season])
+    return queryset
+
+
+def aggregate_weather_records(queryset, group_by):
+    """Groups a WeatherRecord queryset per station and month or year with min/max/avg temperatures and total precipitation."""
+    if group_by not in AGGREGATION_PERIODS:
+        raise ValueError(
+            f"group_by must be one of {', '.join(AGGREGATION_PERIODS)}, not {group_by!r}"
+        )
+    return (
+        queryset.filter(date__isnull=False)
+        .annotate(period=AGGREGATION_PERIODS[group_by]("date"))
+        .values("station", "period")
+        .annotate(
+            days=Count("id"),
+            min_temperature=Min("minimum_temperature"),
+            max_temperature=Max("maximum_temperature"),
+            average_min_temperature=Avg("minimum_temperature"),
+            average_max_temperature=Avg("maximum_temperature"),
+            total_precipitation=Sum("precipitation"),
+        )
+        .order_by("station", "period")
+    )
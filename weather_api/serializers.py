@@ -1,9 +1,67 @@
+from django.db import models
 from rest_framework import serializers
-from .models import WeatherRecord, Statistic
+from .models import (
+    CropYield,
+    IngestionRun,
+    MonthlyStatistic,
+    SeasonalStatistic,
+    StationQuality,
+    Statistic,
+    WeatherRecord,
+)
+from .stations import station_code, station_codes
+
+
+class StationCodeField(serializers.Field):
+    """Renders a Station id as its code through the station cache, without fetching the Station row."""
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return station_code(value)
+
+
+def lean_columns(serializer_class):
+    """Returns the columns to read with values() for a plain ModelSerializer, `station` being read as its id."""
+    return [
+        "station_id" if name == "station" else name
+        for name in serializer_class.Meta.fields
+    ]
+
+
+def lean_data(serializer_class, rows):
+    """
+    Builds the same dicts as `serializer_class(rows, many=True).data` from
+    values() rows of lean_columns(), without model instances or per-field
+    serializer calls: station ids become codes and dates ISO strings, the
+    other columns already have their JSON types.
+    """
+    fields = serializer_class.Meta.fields
+    model = serializer_class.Meta.model
+    dates = [
+        name
+        for name in fields
+        if isinstance(model._meta.get_field(name), models.DateField)
+    ]
+    codes = station_codes({row["station_id"] for row in rows})
+    data = []
+    for row in rows:
+        # values() rows keep the column order, which is the field order.
+        item = dict(zip(fields, row.values()))
+        item["station"] = codes[item["station"]]
+        for name in dates:
+            if item[name] is not None:
+                item[name] = item[name].isoformat()
+        data.append(item)
+    return data
 
 
 class WeatherRecordSerializer(serializers.ModelSerializer):
     """Serializes WeatherRecord model instances, including station, date, temperatures, and precipitation."""
+    station = StationCodeField(source="station_id")
+
     class Meta:
         model = WeatherRecord
         fields = (
@@ -17,6 +75,8 @@ class WeatherRecordSerializer(serializers.ModelSerializer):
 
 class StatisticSerializer(serializers.ModelSerializer):
     """Serializes Statistic model instances, including station, year, average temperatures, and total precipitation."""
+    station = StationCodeField(source="station_id")
+
     class Meta:
         model = Statistic
         fields = (
@@ -26,3 +86,96 @@ class StatisticSerializer(serializers.ModelSerializer):
             "average_min_temperature",
             "total_precipitation",
         )
+
+
+ROLLUP_FIELDS = (
+    "observations",
+    "missing_days",
+    "min_temperature",
+    "max_temperature",
+    "average_min_temperature",
+    "average_max_temperature",
+    "total_precipitation",
+)
+
+
+class MonthlyStatisticSerializer(serializers.ModelSerializer):
+    """Serializes monthly rollups of a station's daily records."""
+    station = StationCodeField(source="station_id")
+
+    class Meta:
+        model = MonthlyStatistic
+        fields = ("station", "year", "month", *ROLLUP_FIELDS)
+
+
+class SeasonalStatisticSerializer(serializers.ModelSerializer):
+    """Serializes seasonal rollups of a station's daily records, naming the season."""
+    station = StationCodeField(source="station_id")
+    season = serializers.CharField(source="get_season_display")
+
+    class Meta:
+        model = SeasonalStatistic
+        fields = ("station", "year", "season", *ROLLUP_FIELDS)
+
+
+class StationQualitySerializer(serializers.ModelSerializer):
+    """Serializes a station's data quality summary."""
+    station = StationCodeField(source="station_id")
+
+    class Meta:
+        model = StationQuality
+        fields = (
+            "station",
+            "records",
+            "incomplete_records",
+            "first_date",
+            "last_date",
+            "missing_days",
+            "coverage",
+            "quarantined_records",
+            "quarantine_reasons",
+        )
+
+
+class IngestionRunSerializer(serializers.ModelSerializer):
+    """Serializes an ingestion run: its status, progress, options and per stage counters."""
+    class Meta:
+        model = IngestionRun
+        fields = (
+            "id",
+            "status",
+            "phase",
+            "files_done",
+            "files_to_load",
+            "options",
+            "queued_at",
+            "started_at",
+            "finished_at",
+            "worker",
+            "error",
+            *IngestionRun.STAGE_FIELDS,
+        )
+
+
+class CropYieldSerializer(serializers.ModelSerializer):
+    """Serializes yearly corn grain yields."""
+    class Meta:
+        model = CropYield
+        fields = ("year", "corn_grain_yield")
+
+
+class WeatherAggregateSerializer(serializers.Serializer):
+    """Serializes per station monthly or yearly aggregates of WeatherRecord rows."""
+    PERIOD_FORMATS = {"month": "%Y-%m", "year": "%Y"}
+
+    station = StationCodeField()
+    period = serializers.SerializerMethodField()
+    days = serializers.IntegerField()
+    min_temperature = serializers.IntegerField()
+    max_temperature = serializers.IntegerField()
+    average_min_temperature = serializers.FloatField()
+    average_max_temperature = serializers.FloatField()
+    total_precipitation = serializers.IntegerField()
+
+    def get_period(self, aggregate):
+        return aggregate["period"].strftime(self.PERIOD_FORMATS[self.context["group_by"]])
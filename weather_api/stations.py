@@ -0,0 +1,118 @@
+import re
+from threading import Lock
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from .models import Station
+
+# NCDC state codes, the first two digits of a US cooperative station number.
+STATE_CODES = {
+    "01": "AL", "02": "AZ", "03": "AR", "04": "CA", "05": "CO", "06": "CT",
+    "07": "DE", "08": "FL", "09": "GA", "10": "ID", "11": "IL", "12": "IN",
+    "13": "IA", "14": "KS", "15": "KY", "16": "LA", "17": "ME", "18": "MD",
+    "19": "MA", "20": "MI", "21": "MN", "22": "MS", "23": "MO", "24": "MT",
+    "25": "NE", "26": "NV", "27": "NH", "28": "NJ", "29": "NM", "30": "NY",
+    "31": "NC", "32": "ND", "33": "OH", "34": "OK", "35": "OR", "36": "PA",
+    "37": "RI", "38": "SC", "39": "SD", "40": "TN", "41": "TX", "42": "UT",
+    "43": "VT", "44": "VA", "45": "WA", "46": "WV", "47": "WI", "48": "WY",
+    "50": "AK", "51": "HI",
+}
+GHCN_CODE = re.compile(r"^(?P<country>[A-Z]{2})(?P<network>[A-Z0-9])(?P<number>\w{8})$")
+
+_lock = Lock()
+_ids = {}
+_codes = {}
+
+
+def parse_station_code(code):
+    """Returns the country, network and (for US cooperative stations) state encoded in a GHCN station code."""
+    match = GHCN_CODE.match(code)
+    if match is None:
+        return {"country": "", "network": "", "state": ""}
+    state = ""
+    if match["country"] == "US" and match["network"] == "C":
+        state = STATE_CODES.get(match["number"][2:4], "")
+    return {"country": match["country"], "network": match["network"], "state": state}
+
+
+def _remember(pk, code):
+    with _lock:
+        _codes.pop(_ids.pop(code, None), None)
+        _ids.pop(_codes.pop(pk, None), None)
+        _ids[code] = pk
+        _codes[pk] = code
+
+
+def _fetch(**lookup):
+    """
+    Reads the Station rows matching `lookup` as a {code: id} dict, adding them
+    to the cache unless this runs inside a transaction, whose new stations
+    could still be rolled back.
+    """
+    ids = dict(Station.objects.filter(**lookup).values_list("code", "id"))
+    if not connection.in_atomic_block:
+        for code, pk in ids.items():
+            _remember(pk, code)
+    return ids
+
+
+def clear_station_cache():
+    """Empties the in-process station cache."""
+    with _lock:
+        _ids.clear()
+        _codes.clear()
+
+
+def station_id(code, create=False):
+    """
+    Returns the id of a station code from the in-process cache, looking the
+    code up by itself on a miss. Unknown codes return None, or are registered
+    together with their parsed metadata when `create` is set.
+    """
+    if code in _ids:
+        return _ids[code]
+    pk = _fetch(code=code).get(code)
+    if pk is None and create:
+        station, _ = Station.objects.get_or_create(
+            code=code, defaults=parse_station_code(code)
+        )
+        pk = station.pk
+    return pk
+
+
+def station_ids(codes):
+    """Returns the ids of the known codes among `codes`, looking up only the ones missing from the cache in one query."""
+    ids = {code: pk for code in codes if (pk := _ids.get(code)) is not None}
+    missing = [code for code in codes if code not in ids]
+    if missing:
+        ids.update(_fetch(code__in=missing))
+    return [ids[code] for code in codes if code in ids]
+
+
+def station_code(pk):
+    """Returns the code of a station id from the in-process cache, looking the id up by itself on a miss."""
+    if pk in _codes:
+        return _codes[pk]
+    return next(iter(_fetch(pk=pk)), None)
+
+
+def station_codes(pks):
+    """Returns a {id: code} dict for `pks`, looking up only the ids missing from the cache in one query."""
+    codes = {pk: code for pk in pks if (code := _codes.get(pk)) is not None}
+    missing = [pk for pk in pks if pk not in codes]
+    if missing:
+        codes.update((pk, code) for code, pk in _fetch(pk__in=missing).items())
+    return {pk: codes.get(pk) for pk in pks}
+
+
+def _station_saved(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: _remember(instance.pk, instance.code))
+
+
+def _station_deleted(sender, instance, **kwargs):
+    with _lock:
+        _ids.pop(_codes.pop(instance.pk, None), None)
+
+
+post_save.connect(_station_saved, sender=Station, dispatch_uid="station_cache_saved")
+post_delete.connect(_station_deleted, sender=Station, dispatch_uid="station_cache_deleted")
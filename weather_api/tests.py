@@ -1,10 +1,95 @@
+import io
+import os
+import csv
+import gzip
+import json
+import pstats
+import tempfile
+import numpy as np
 from faker import Faker
 from datetime import date
+from unittest import mock, skipUnless
+from django.conf import settings
 from django.urls import reverse
+from django.utils import timezone
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient, APITestCase
-from weather_api.models import Statistic, WeatherRecord
+from weather_api.models import (
+    CropYield,
+    IngestedFile,
+    IngestionRun,
+    MonthlyStatistic,
+    QuarantinedRecord,
+    SeasonalStatistic,
+    Station,
+    StationQuality,
+    Statistic,
+    WeatherRecord,
+)
 from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
 from weather_api.serializers import StatisticSerializer, WeatherRecordSerializer
+from weather_api.benchmarks import (
+    benchmark_columnar,
+    benchmark_loaders,
+    benchmark_queries,
+    benchmark_serialization,
+)
+from weather_api.loaders import CopyLoader, OrmLoader, get_loader
+from weather_api.parsers import StationFrame, parse_station_frame, parse_text_frame
+from weather_api.pagination import cached_count, estimate_count
+from weather_api.versioning import bump_data_version, get_data_version
+from weather_api.caching import LocMemLRUBackend, get_response_cache
+from weather_api.pool import ConnectionPool, PoolTimeout, _inherited
+from weather_api.metrics import (
+    CACHE_REQUESTS,
+    REGISTRY,
+    REQUEST_QUERIES,
+    Histogram,
+    record_cache,
+)
+from weather_api.profiling import Profiler
+from weather_api.validation import validate_frame
+from weather_api.jobs import enqueue, ingestion_lock, run_pending
+from weather_api.queries import filter_weather_records
+from weather_api.stations import (
+    parse_station_code,
+    station_codes,
+    station_id,
+    station_ids,
+)
+from weather_api.analytics import yield_correlation
+from weather_api.columnar import current_snapshot, ensure_snapshot
+from weather_api.benchmark_suite import compare_results, generate_wx_data
+from weather_api.partitions import (
+    ensure_partitions_ahead,
+    is_partitioned,
+    partition_name,
+    partition_years,
+    swap_partition,
+)
+from weather_api.dump import (
+    FileResult,
+    _ingest_station_worker,
+    batched,
+    dump_quality,
+    dump_rollups,
+    dump_statistics,
+    dump_wx_data,
+    dump_yield_data,
+    iter_station_files,
+    parse_station_file,
+    read_data,
+    reload_year,
+)
+
+
+def make_station(code):
+    """Returns the Station with the given code, creating it if needed."""
+    return Station.objects.get_or_create(code=code)[0]
 
 
 class WeatherRecordTest(APITestCase):
@@ -17,7 +102,7 @@ class WeatherRecordTest(APITestCase):
 
         for _ in range(10):
             WeatherRecord.objects.create(
-                station=self.faker.city(),
+                station=make_station(self.faker.city()),
                 date=self.faker.date_this_century(),
                 maximum_temperature=self.faker.random_int(min=-30, max=40),
                 minimum_temperature=self.faker.random_int(min=-50, max=20),
@@ -77,7 +162,7 @@ class WeatherRecordTest(APITestCase):
             path=f"{self.route}?station={station}&date={date}",
             content_type="application/json",
         )
-        records = WeatherRecord.objects.filter(station=station, date=date)
+        records = WeatherRecord.objects.filter(station__code=station, date=date)
         serializer = WeatherRecordSerializer(records, many=True)
         self.assertEqual(response.status_code, HTTP_200_OK)
         self.assertEqual(response.data["count"], len(serializer.data))
@@ -94,7 +179,7 @@ class WeatherRecordTest(APITestCase):
     def test_weather_record_str(self):
         """Test the string representation of a WeatherRecord instance."""
         self.weather_record = WeatherRecord.objects.create(
-            station="Test Station",
+            station=make_station("Test Station"),
             date=date(2024, 1, 1),
             maximum_temperature=35,
             minimum_temperature=22,
@@ -115,7 +200,7 @@ class StatisticsTest(APITestCase):
 
         for _ in range(10):
             Statistic.objects.create(
-                station=self.faker.city(),
+                station=make_station(self.faker.city()),
                 year=self.faker.year(),
                 average_max_temperature=self.faker.random_int(min=-10, max=30),
                 average_min_temperature=self.faker.random_int(min=-20, max=10),
@@ -176,7 +261,7 @@ class StatisticsTest(APITestCase):
             path=f"{self.route}?station={station}&year={year}",
             content_type="application/json",
         )
-        statistics = Statistic.objects.filter(station=station, year=year)
+        statistics = Statistic.objects.filter(station__code=station, year=year)
         serializer = StatisticSerializer(statistics, many=True)
         self.assertEqual(response.status_code, HTTP_200_OK)
         self.assertEqual(response.data["results"], serializer.data)
@@ -193,10 +278,1636 @@ class StatisticsTest(APITestCase):
     def test_statistic_str(self):
         """Test the string representation of a Statistic instance."""
         self.statistic = Statistic.objects.create(
-            station="Test Station",
+            station=make_station("Test Station"),
             year=2024,
             average_max_temperature=30.5,
             average_min_temperature=20.5,
             total_precipitation=150.0,
         )
         self.assertEqual(str(self.statistic), "Statistics for Test Station on 2024")
+
+
+class DumpTest(TestCase):
+    """Tests for the streaming weather data ingestion pipeline."""
+    def setUp(self):
+        """Write two small station files into a temporary data folder."""
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.write_station(
+            "USC00000001",
+            "19850101\t  -22\t -128\t   94\n"
+            "19850102\t -122\t -217\t    0\n"
+            "19850103\t-9999\t -244\t-9999\n",
+        )
+        self.write_station(
+            "USC00000002",
+            "19850101\t   10\t   -5\t    3\n"
+            "not-a-row\n",
+        )
+
+    def write_station(self, station, content):
+        """Create a station file with the given content."""
+        with open(os.path.join(self.folder.name, f"{station}.txt"), "w") as file:
+            file.write(content)
+
+    def test_parse_station_file(self):
+        """Test missing values become None and invalid rows are skipped."""
+        rows = list(
+            parse_station_file(
+                "USC00000001", os.path.join(self.folder.name, "USC00000001.txt")
+            )
+        )
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0], ("USC00000001", date(1985, 1, 1), -22, -128, 94))
+        self.assertEqual(rows[2], ("USC00000001", date(1985, 1, 3), None, -244, None))
+
+    def test_read_data_is_lazy(self):
+        """Test read_data returns a generator instead of a list."""
+        rows = read_data(self.folder.name)
+        self.assertNotIsInstance(rows, list)
+        self.assertEqual(len(list(rows)), 4)
+
+    def test_batched(self):
+        """Test batched splits an iterable into fixed-size chunks."""
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+    def test_dump_wx_data_in_batches(self):
+        """Test rows are flushed in fixed-size batches and re-runs skip duplicates."""
+        loader = OrmLoader()
+        with mock.patch.object(loader, "load_frame", wraps=loader.load_frame) as load:
+            rows_count = dump_wx_data(
+                batch_size=3, folder=self.folder.name, loader=loader
+            ).rows
+        self.assertEqual(rows_count, 4)
+        self.assertEqual(load.call_count, 2)
+        self.assertEqual(WeatherRecord.objects.count(), 4)
+
+        dump_wx_data(batch_size=3, folder=self.folder.name)
+        self.assertEqual(WeatherRecord.objects.count(), 4)
+
+    def test_station_is_resolved_once_per_file(self):
+        """Test the station of a file is looked up once, however many batches it loads in."""
+        with CaptureQueriesContext(connection) as queries:
+            dump_wx_data(batch_size=1, folder=self.folder.name)
+        station_queries = [
+            query for query in queries
+            if 'FROM "weather_api_station"' in query["sql"]
+            or 'INTO "weather_api_station"' in query["sql"]
+        ]
+        # Per file: the cache miss lookup, get_or_create's lookup and its insert.
+        self.assertLessEqual(len(station_queries), 2 * 3)
+        self.assertEqual(WeatherRecord.objects.count(), 4)
+
+    def test_manifest_skips_unchanged_files(self):
+        """Test a second run only touches files whose content changed."""
+        dump_wx_data(folder=self.folder.name)
+        self.assertEqual(IngestedFile.objects.count(), 2)
+        self.assertEqual(IngestedFile.objects.get(name="USC00000001.txt").rows, 3)
+
+        loader = OrmLoader()
+        with mock.patch.object(loader, "load") as load:
+            self.assertEqual(
+                dump_wx_data(folder=self.folder.name, loader=loader).rows, 0
+            )
+        load.assert_not_called()
+
+        # Same content with a new mtime is re-hashed but not re-loaded.
+        path = os.path.join(self.folder.name, "USC00000001.txt")
+        os.utime(path, (0, 0))
+        with mock.patch.object(loader, "load") as load:
+            self.assertEqual(
+                dump_wx_data(folder=self.folder.name, loader=loader).rows, 0
+            )
+        load.assert_not_called()
+
+    def test_manifest_loads_appended_tail(self):
+        """Test a file that only grew loads just the appended rows."""
+        dump_wx_data(folder=self.folder.name)
+        with open(os.path.join(self.folder.name, "USC00000001.txt"), "a") as file:
+            file.write("19850104\t   11\t   -3\t    0\n")
+        loader = OrmLoader()
+        with mock.patch.object(loader, "insert", wraps=loader.insert) as insert:
+            result = dump_wx_data(folder=self.folder.name, loader=loader)
+        self.assertEqual(result.rows, 1)
+        self.assertEqual(result.touched, {"USC00000001": {1985}})
+        self.assertEqual(insert.call_args.args[0][0][1], date(1985, 1, 4))
+        self.assertEqual(WeatherRecord.objects.count(), 5)
+        self.assertEqual(IngestedFile.objects.get(name="USC00000001.txt").rows, 4)
+
+    def test_manifest_reloads_rewritten_file(self):
+        """Test a file whose existing content changed is re-read in full and replaces the station's rows."""
+        dump_wx_data(folder=self.folder.name)
+        dump_statistics()
+        self.write_station(
+            "USC00000001",
+            "19850101\t   50\t  -10\t   12\n"
+            "19850102\t -122\t -217\t    0\n",
+        )
+        result = dump_wx_data(folder=self.folder.name)
+        self.assertEqual(result.rows, 2)
+        self.assertEqual(result.touched, {"USC00000001": {1985}})
+        records = WeatherRecord.objects.filter(station__code="USC00000001").order_by("date")
+        self.assertEqual(
+            list(records.values_list("date", "maximum_temperature", "precipitation")),
+            [(date(1985, 1, 1), 50, 12), (date(1985, 1, 2), -122, 0)],
+        )
+        dump_statistics(result.touched)
+        statistic = Statistic.objects.get(station__code="USC00000001")
+        self.assertEqual(statistic.total_precipitation, 12)
+        self.assertEqual(dump_wx_data(folder=self.folder.name, force=True).rows, 3)
+        self.assertEqual(WeatherRecord.objects.count(), 3)
+
+    def test_bad_file_does_not_abort_others(self):
+        """Test an unreadable station file is reported while the rest still load."""
+        with open(os.path.join(self.folder.name, "USC00000000.txt"), "wb") as file:
+            file.write(b"\xff\xfe\x00")
+        result = dump_wx_data(batch_size=3, folder=self.folder.name)
+        self.assertEqual(result.rows, 4)
+        self.assertEqual(result.statuses, {"loaded": 2, "failed": 1})
+        self.assertEqual(list(result.failures), ["USC00000000"])
+        self.assertEqual(WeatherRecord.objects.count(), 4)
+
+        os.remove(os.path.join(self.folder.name, "USC00000000.txt"))
+        self.assertEqual(dump_wx_data(folder=self.folder.name).failures, {})
+
+    def test_ingest_station_worker(self):
+        """Test the process pool entry point returns results and errors instead of raising."""
+        path = os.path.join(self.folder.name, "USC00000001.txt")
+        result = _ingest_station_worker("USC00000001", path, "orm", 2)
+        self.assertEqual(
+            result._replace(parse_seconds=0.0, load_seconds=0.0, validate_seconds=0.0),
+            FileResult("USC00000001", 3, "loaded", years=frozenset({1985})),
+        )
+        result = _ingest_station_worker(
+            "USC00000009", os.path.join(self.folder.name, "missing.txt"), "orm", 2
+        )
+        self.assertEqual((result.station, result.status), ("USC00000009", "failed"))
+        self.assertIsNotNone(result.error)
+
+    def test_create_records_ingestion_run(self):
+        """Test the create command stores the stage counters of its run."""
+        yields = os.path.join(self.folder.name, "yield.csv")
+        with open(yields, "w") as file:
+            file.write("1985\t100\n")
+        with override_settings(WX_DATA_DIR=self.folder.name, YLD_DATA_FILE=yields):
+            call_command("create", loader="orm", batch_size=2)
+        run = IngestionRun.objects.get()
+        self.assertEqual(
+            (run.files_scanned, run.files_loaded, run.rows_parsed), (2, 2, 4)
+        )
+        # The ORM loader cannot tell inserted rows from skipped conflicts.
+        self.assertIsNone(run.rows_inserted)
+        self.assertIsNone(run.conflicts_skipped)
+        self.assertEqual(run.statistics_upserted, 2)
+        self.assertGreater(run.rollups_upserted, 0)
+        self.assertIsNotNone(run.finished_at)
+
+
+class LoaderTest(TestCase):
+    """Tests for the weather record batch loaders."""
+    rows = [
+        ("USC00000001", date(1985, 1, 1), -22, -128, 94),
+        ("USC00000001", date(1985, 1, 2), None, -217, None),
+    ]
+
+    def test_auto_loader_falls_back_to_orm(self):
+        """Test "auto" only selects COPY on PostgreSQL."""
+        expected = "copy" if connection.vendor == "postgresql" else "orm"
+        self.assertEqual(get_loader("auto").name, expected)
+
+    def test_unknown_loader(self):
+        """Test an unknown loader name is rejected."""
+        with self.assertRaises(ValueError):
+            get_loader("nope")
+
+    def test_copy_text_format(self):
+        """Test rows are rendered as tab separated COPY text with \\N for NULL."""
+        self.assertEqual(
+            CopyLoader.to_copy_text(self.rows).getvalue(),
+            "USC00000001\t1985-01-01\t-22\t-128\t94\n"
+            "USC00000001\t1985-01-02\t\\N\t-217\t\\N\n",
+        )
+
+    def test_loader_skips_conflicts(self):
+        """Test loading the same batch twice keeps one row per station and date."""
+        loader = get_loader("auto")
+        loader.load(self.rows)
+        loader.load(self.rows)
+        self.assertEqual(WeatherRecord.objects.count(), 2)
+
+    def test_benchmark_loaders_rolls_back(self):
+        """Test the loader benchmark reports throughput without keeping its rows."""
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        with open(os.path.join(folder.name, "USC00000001.txt"), "w") as file:
+            file.write("19850101\t  -22\t -128\t   94\n")
+        results = benchmark_loaders(folder=folder.name, files=1)
+        self.assertEqual(results[0]["rows"], 1)
+        self.assertIn("rows_per_second", results[0])
+        self.assertEqual(WeatherRecord.objects.count(), 0)
+
+
+class DumpStatisticsTest(TestCase):
+    """Tests for full and incremental statistics maintenance."""
+    def setUp(self):
+        """Create complete and incomplete daily rows for two stations."""
+        for station, day, maximum, minimum, precipitation in [
+            ("A", date(2000, 1, 1), 10, 0, 5),
+            ("A", date(2000, 1, 2), 20, 10, 7),
+            ("A", date(2001, 1, 1), 30, 20, 1),
+            ("B", date(2000, 1, 1), 5, -5, 2),
+            ("B", date(2000, 1, 2), None, -5, 2),
+        ]:
+            WeatherRecord.objects.create(
+                station=make_station(station),
+                date=day,
+                maximum_temperature=maximum,
+                minimum_temperature=minimum,
+                precipitation=precipitation,
+            )
+
+    def test_full_recompute(self):
+        """Test every station and year is aggregated from complete rows."""
+        self.assertEqual(dump_statistics(), 3)
+        statistic = Statistic.objects.get(station__code="A", year=2000)
+        self.assertEqual(statistic.average_max_temperature, 15)
+        self.assertEqual(statistic.total_precipitation, 12)
+        self.assertEqual(
+            Statistic.objects.get(station__code="B", year=2000).average_max_temperature, 5
+        )
+
+    def test_incremental_recompute_updates_touched_pairs_only(self):
+        """Test only touched (station, year) pairs are re-aggregated and upserted."""
+        dump_statistics()
+        WeatherRecord.objects.create(
+            station=make_station("A"),
+            date=date(2000, 1, 3),
+            maximum_temperature=30,
+            minimum_temperature=20,
+            precipitation=0,
+        )
+        Statistic.objects.filter(station__code="B").update(total_precipitation=-1)
+
+        self.assertEqual(dump_statistics({"A": {2000}}), 1)
+        self.assertEqual(
+            Statistic.objects.get(station__code="A", year=2000).average_max_temperature, 20
+        )
+        self.assertEqual(
+            Statistic.objects.get(station__code="B", year=2000).total_precipitation, -1
+        )
+
+    def test_incremental_recompute_drops_empty_years(self):
+        """Test a touched year without complete rows loses its statistic."""
+        Statistic.objects.create(
+            station=make_station("B"),
+            year=2001,
+            average_max_temperature=1,
+            average_min_temperature=1,
+            total_precipitation=1,
+        )
+        dump_statistics({"B": {2001}})
+        self.assertFalse(Statistic.objects.filter(station__code="B", year=2001).exists())
+
+    def test_full_recompute_drops_stale_pairs(self):
+        """Test a full rebuild removes statistics of pairs without complete rows, like an incremental one."""
+        dump_statistics()
+        WeatherRecord.objects.filter(station__code="A", date__year=2001).delete()
+        self.assertEqual(dump_statistics(), 2)
+        self.assertEqual(
+            sorted(Statistic.objects.values_list("station__code", "year")),
+            [("A", 2000), ("B", 2000)],
+        )
+
+    def test_incremental_recompute_with_nothing_touched(self):
+        """Test an ingestion that touched nothing leaves statistics alone."""
+        self.assertEqual(dump_statistics({}), 0)
+        self.assertEqual(Statistic.objects.count(), 0)
+
+
+class ParserTest(TestCase):
+    """Tests for the vectorised station file parser."""
+    def setUp(self):
+        """Write a station file with missing values and malformed lines."""
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = os.path.join(self.folder.name, "USC00000001.txt")
+        with open(self.path, "w") as file:
+            file.write(
+                "19991231\t   50\t  -10\t    0\n"
+                "20000101\t  -22\t -128\t   94\n"
+                "20000102\t-9999\t -217\t    0\n"
+                "20000230\t    1\t    1\t    1\n"
+                "20000103\t   10\n"
+                "20000104\t   30\t   10\t-9999\n"
+            )
+
+    def test_numpy_parser_matches_text_parser(self):
+        """Test both parser backends produce the same rows, skipping the same bad lines."""
+        frame = parse_station_frame("USC00000001", self.path)
+        self.assertEqual(frame.rows(), parse_text_frame("USC00000001", self.path).rows())
+        self.assertEqual(len(frame), 4)
+        self.assertEqual(frame.rows()[2], ("USC00000001", date(2000, 1, 2), None, -217, 0))
+        self.assertEqual(frame.maximum_temperature.dtype, "int32")
+        self.assertEqual(frame.years(), {1999, 2000})
+
+    def test_numpy_parser_fast_path(self):
+        """Test a clean file is parsed from an offset without the row by row fallback."""
+        with open(self.path, "w") as file:
+            file.write("20000101\t 1\t 2\t 3\n20000102\t 4\t 5\t 6\n")
+        frame = parse_station_frame("USC00000001", self.path, offset=18)
+        self.assertEqual(frame.rows(), [("USC00000001", date(2000, 1, 2), 4, 5, 6)])
+
+    def test_short_and_long_lines_are_rejected(self):
+        """Test a short line followed by a long one does not shift the columns of the rows after them."""
+        with open(self.path, "w") as file:
+            file.write(
+                "19850101\t1\t2\n"
+                "19850102\t3\t4\t5\t6\n"
+                "19850103\t7\t8\t9\n"
+            )
+        for parse in (parse_station_frame, parse_text_frame):
+            frame = parse("USC00000001", self.path)
+            self.assertEqual(frame.rows(), [("USC00000001", date(1985, 1, 3), 7, 8, 9)])
+            self.assertEqual(
+                [reason for _, reason in frame.rejects], ["malformed_row", "malformed_row"]
+            )
+
+    def test_frame_slicing(self):
+        """Test frames slice into batches that keep their station."""
+        frame = parse_station_frame("USC00000001", self.path)
+        self.assertEqual(frame[1:3].rows(), frame.rows()[1:3])
+
+    def test_yearly_statistics_match_database(self):
+        """Test the vectorised yearly statistics equal the database aggregation."""
+        frame = parse_station_frame("USC00000001", self.path)
+        OrmLoader().load_frame(frame)
+        dump_statistics()
+        expected = list(
+            Statistic.objects.order_by("year").values(
+                "year",
+                "average_max_temperature",
+                "average_min_temperature",
+                "total_precipitation",
+            )
+        )
+        statistics = frame.yearly_statistics()
+        self.assertEqual({row.pop("station") for row in statistics}, {"USC00000001"})
+        self.assertEqual(statistics, expected)
+
+    def test_copy_text_from_frame(self):
+        """Test the vectorised COPY rendering matches the row based one."""
+        frame = parse_station_frame("USC00000001", self.path)
+        self.assertEqual(
+            CopyLoader.frame_to_copy_text(frame, 7).getvalue(),
+            CopyLoader.to_copy_text((7, *row[1:]) for row in frame.rows()).getvalue(),
+        )
+        empty = StationFrame.from_rows("USC00000001", [])
+        self.assertEqual(CopyLoader.frame_to_copy_text(empty, 7).getvalue(), "")
+
+
+class KeysetPaginationTest(APITestCase):
+    """Tests for cursor (keyset) pagination on the list endpoints."""
+    def setUp(self):
+        """Create records for two stations and two years of statistics."""
+        self.client = APIClient()
+        # Station ids, which define the page order, follow the codes.
+        make_station("A"), make_station("B")
+        for station in ("B", "A"):
+            for day in range(1, 4):
+                WeatherRecord.objects.create(
+                    station=make_station(station),
+                    date=date(2000, 1, day),
+                    maximum_temperature=day,
+                    minimum_temperature=0,
+                    precipitation=0,
+                )
+            for year in (2001, 2000):
+                Statistic.objects.create(
+                    station=make_station(station),
+                    year=year,
+                    average_max_temperature=1,
+                    average_min_temperature=0,
+                    total_precipitation=0,
+                )
+
+    def walk(self, url):
+        """Follow `next` links and return every page."""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTP_200_OK)
+            pages.append(response.data)
+            url = response.data["next"]
+        return pages
+
+    def test_pages_follow_station_date_order(self):
+        """Test cursor pages cover every record in (station, date) order without a count."""
+        pages = self.walk(f"{reverse('weather-list')}?pagination=cursor&limit=4")
+        self.assertEqual(len(pages), 2)
+        self.assertNotIn("count", pages[0])
+        keys = [(row["station"], row["date"]) for page in pages for row in page["results"]]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(keys), 6)
+        self.assertIsNone(pages[0]["previous"])
+
+    def test_previous_link(self):
+        """Test the previous link of the last page returns the first page."""
+        first, second = self.walk(f"{reverse('weather-list')}?pagination=cursor&limit=4")
+        response = self.client.get(second["previous"])
+        self.assertEqual(response.data["results"], first["results"])
+        self.assertIsNone(response.data["previous"])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_filters_apply(self):
+        """Test filters combine with cursor pagination."""
+        pages = self.walk(f"{reverse('weather-list')}?pagination=cursor&station=A&limit=2")
+        rows = [row for page in pages for row in page["results"]]
+        self.assertEqual({row["station"] for row in rows}, {"A"})
+        self.assertEqual(len(rows), 3)
+
+    def test_statistics_cursor(self):
+        """Test statistics are paged by (station, year)."""
+        pages = self.walk(f"{reverse('weather-stats-list')}?pagination=cursor&limit=3")
+        keys = [(row["station"], row["year"]) for page in pages for row in page["results"]]
+        self.assertEqual(keys, [("A", 2000), ("A", 2001), ("B", 2000), ("B", 2001)])
+
+    def test_offset_pages_stay_newest_first(self):
+        """Test limit/offset pages keep the newest-first order; only cursor pages follow the key."""
+        response = self.client.get(reverse("weather-list"))
+        keys = [(row["station"], row["date"][-1]) for row in response.data["results"]]
+        self.assertEqual(
+            keys, [("A", "3"), ("A", "2"), ("A", "1"), ("B", "3"), ("B", "2"), ("B", "1")]
+        )
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor is rejected."""
+        response = self.client.get(f"{reverse('weather-list')}?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+
+class CountStrategyTest(APITestCase):
+    """Tests for estimated and cached counts on limit/offset pages."""
+    def setUp(self):
+        """Create a few records and start from an empty count cache."""
+        cache.clear()
+        self.client = APIClient()
+        self.route = reverse("weather-list")
+        for day in range(1, 4):
+            WeatherRecord.objects.create(station=make_station("A"), date=date(2000, 1, day))
+
+    def test_exact_count_is_flagged(self):
+        """Test small querysets report an exact count."""
+        response = self.client.get(self.route)
+        self.assertEqual(response.data["count"], 3)
+        self.assertTrue(response.data["count_exact"])
+
+    def test_estimate_above_threshold(self):
+        """Test a planner estimate above the threshold is returned as an estimated count."""
+        with mock.patch("weather_api.pagination.estimate_count", return_value=2_000_000):
+            response = self.client.get(self.route)
+        self.assertEqual(response.data["count"], 2_000_000)
+        self.assertFalse(response.data["count_exact"])
+
+    def test_estimate_unavailable_off_postgres(self):
+        """Test estimates are only taken from the PostgreSQL planner."""
+        if connection.vendor != "postgresql":
+            self.assertIsNone(estimate_count(WeatherRecord.objects.all()))
+
+    def test_exact_count_is_cached_until_ingestion(self):
+        """Test cached counts survive new rows until the data version is bumped."""
+        queryset = WeatherRecord.objects.filter(station__code="A")
+        self.assertEqual(cached_count(queryset), 3)
+        WeatherRecord.objects.create(station=make_station("A"), date=date(2000, 1, 4))
+        self.assertEqual(cached_count(queryset), 3)
+        version = get_data_version().version
+        self.assertEqual(bump_data_version().version, version + 1)
+        self.assertEqual(cached_count(queryset), 4)
+
+
+class ResponseCacheTest(APITestCase):
+    """Tests for the rendered response cache on the list endpoints."""
+    def setUp(self):
+        """Create a record and start from an empty response cache."""
+        get_response_cache().clear()
+        self.client = APIClient()
+        self.route = reverse("weather-list")
+        WeatherRecord.objects.create(station=make_station("A"), date=date(2000, 1, 1))
+
+    def test_second_request_is_served_from_cache(self):
+        """Test the same request is a hit with identical content and validators."""
+        first = self.client.get(self.route)
+        second = self.client.get(self.route)
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertIn("Last-Modified", second)
+
+    def test_query_string_is_part_of_the_key(self):
+        """Test different filters are cached separately."""
+        self.client.get(self.route)
+        response = self.client.get(f"{self.route}?station=B")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 0)
+
+    @override_settings(ALLOWED_HOSTS=["a.example.com", "b.example.com"])
+    def test_host_is_part_of_the_key(self):
+        """Test pages with absolute links are not shared between hosts."""
+        WeatherRecord.objects.create(station=make_station("A"), date=date(2000, 1, 2))
+        route = f"{self.route}?limit=1"
+        first = self.client.get(route, HTTP_HOST="a.example.com")
+        second = self.client.get(route, HTTP_HOST="b.example.com")
+        self.assertEqual(second["X-Cache"], "MISS")
+        self.assertTrue(first.data["next"].startswith("http://a.example.com/"))
+        self.assertTrue(second.data["next"].startswith("http://b.example.com/"))
+
+    def test_if_none_match_returns_304(self):
+        """Test revalidating with the ETag returns an empty 304."""
+        etag = self.client.get(self.route)["ETag"]
+        response = self.client.get(self.route, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_if_modified_since_returns_304(self):
+        """Test revalidating with Last-Modified returns a 304."""
+        last_modified = self.client.get(self.route)["Last-Modified"]
+        response = self.client.get(self.route, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_ingestion_invalidates(self):
+        """Test bumping the data version stops stale pages from being served."""
+        etag = self.client.get(self.route)["ETag"]
+        WeatherRecord.objects.create(station=make_station("A"), date=date(2000, 1, 2))
+        bump_data_version()
+        response = self.client.get(self.route, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 2)
+
+    def test_errors_are_not_cached(self):
+        """Test failing requests bypass the cache."""
+        response = self.client.get(f'{self.route}?date="2024-01-01"')
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertNotIn("X-Cache", response)
+
+    def test_lru_eviction(self):
+        """Test the local memory backend evicts the least recently used entry."""
+        backend = LocMemLRUBackend(max_entries=2)
+        backend.set("a", 1)
+        backend.set("b", 2)
+        backend.get("a")
+        backend.set("c", 3)
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual((backend.get("a"), backend.get("c")), (1, 3))
+
+
+def explain(queryset):
+    """Returns the query plan of a queryset, discouraging sequential scans on PostgreSQL so tiny test tables still show which index fits."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+class WeatherQueryTest(APITestCase):
+    """Tests for date range, multi-station and aggregate queries on /api/weather/."""
+    def setUp(self):
+        """Create two months of records for three stations."""
+        self.client = APIClient()
+        self.route = reverse("weather-list")
+        for station in ("A", "B", "C"):
+            for day in (date(2000, 1, 1), date(2000, 1, 2), date(2000, 2, 1)):
+                WeatherRecord.objects.create(
+                    station=make_station(station),
+                    date=day,
+                    maximum_temperature=day.day * 10,
+                    minimum_temperature=day.day,
+                    precipitation=day.month,
+                )
+
+    def test_date_range(self):
+        """Test date_from and date_to are inclusive bounds."""
+        response = self.client.get(
+            f"{self.route}?date_from=2000-01-02&date_to=2000-02-01"
+        )
+        self.assertEqual(response.data["count"], 6)
+
+    def test_multiple_stations(self):
+        """Test a comma separated station list."""
+        response = self.client.get(f"{self.route}?station=A,C")
+        self.assertEqual(response.data["count"], 6)
+        self.assertEqual({row["station"] for row in response.data["results"]}, {"A", "C"})
+
+    def test_group_by_month(self):
+        """Test monthly aggregates per station."""
+        response = self.client.get(f"{self.route}?station=A&group_by=month")
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"][0],
+            {
+                "station": "A",
+                "period": "2000-01",
+                "days": 2,
+                "min_temperature": 1,
+                "max_temperature": 20,
+                "average_min_temperature": 1.5,
+                "average_max_temperature": 15.0,
+                "total_precipitation": 2,
+            },
+        )
+        self.assertEqual(response.data["results"][1]["period"], "2000-02")
+
+    def test_group_by_year(self):
+        """Test yearly aggregates combine with filters and limit/offset pages."""
+        response = self.client.get(
+            f"{self.route}?group_by=year&date_from=2000-01-02&pagination=cursor"
+        )
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(response.data["results"][0]["days"], 2)
+        self.assertEqual(response.data["results"][0]["period"], "2000")
+
+    def test_invalid_group_by(self):
+        """Test an unknown aggregation period is a bad request."""
+        response = self.client.get(f"{self.route}?group_by=week")
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+    def test_station_range_query_uses_index(self):
+        """Test stations plus a date range is answered from the (station, date) index."""
+        queryset = filter_weather_records(
+            WeatherRecord.objects.all(),
+            {"station": "A,B", "date_from": "2000-01-01", "date_to": "2000-01-31"},
+        )
+        plan = explain(queryset.order_by("station", "date"))
+        self.assertIn("index", plan.lower())
+        self.assertIn("station_date", plan)
+
+    def test_date_range_query_uses_index(self):
+        """Test a date range alone is answered from an index leading on date."""
+        queryset = filter_weather_records(
+            WeatherRecord.objects.all(),
+            {"date_from": "2000-01-01", "date_to": "2000-01-31"},
+        )
+        self.assertIn("index", explain(queryset.order_by("date")).lower())
+
+    def test_station_query_uses_covering_index(self):
+        """Test station keyset pages are read in index order from the covering (station, date) index."""
+        records = WeatherRecord.objects.filter(station=make_station("A"))
+        plan = explain(records.order_by("station", "date"))
+        self.assertIn("index_station_date_covering", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_benchmark_queries(self):
+        """Test the query benchmark reports p50/p99 latency for every filter combination."""
+        results = benchmark_queries(repeat=2)
+        self.assertIn("weather?station&date_range", [result["name"] for result in results])
+        for result in results:
+            self.assertEqual(result["status"], HTTP_200_OK)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+
+class StationTest(APITestCase):
+    """Tests for the Station dimension and its code cache."""
+    def setUp(self):
+        """Create a record for a cooperative station."""
+        self.client = APIClient()
+        WeatherRecord.objects.create(
+            station=make_station("USC00110072"), date=date(2000, 1, 1)
+        )
+
+    def test_parse_station_code(self):
+        """Test country, network and state are read from a GHCN code."""
+        self.assertEqual(
+            parse_station_code("USC00250050"),
+            {"country": "US", "network": "C", "state": "NE"},
+        )
+        self.assertEqual(
+            parse_station_code("Test Station"),
+            {"country": "", "network": "", "state": ""},
+        )
+
+    def test_loading_registers_stations(self):
+        """Test loaders create missing stations with their metadata."""
+        OrmLoader().load([("USC00330058", date(2000, 1, 1), 1, 0, 0)])
+        station = Station.objects.get(code="USC00330058")
+        self.assertEqual((station.country, station.state), ("US", "OH"))
+        self.assertEqual(station.records.count(), 1)
+
+    def test_station_filter_needs_no_join(self):
+        """Test station codes are resolved before the query, so it never joins Station."""
+        queryset = filter_weather_records(
+            WeatherRecord.objects.all(), {"station": "USC00110072,USC00120001"}
+        )
+        self.assertNotIn("JOIN", str(queryset.query))
+        self.assertEqual(queryset.count(), 1)
+
+    def test_cache_misses_only_look_up_missing_codes(self):
+        """Test unknown codes and ids are looked up by themselves instead of reading every station."""
+        other = make_station("USC00120001")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(station_ids(["UNKNOWN"]), [])
+            self.assertIsNone(station_id("UNKNOWN"))
+            self.assertEqual(
+                station_codes([other.pk, 0]), {other.pk: "USC00120001", 0: None}
+            )
+        self.assertEqual(len(queries), 3)
+        for query in queries:
+            self.assertIn("WHERE", query["sql"])
+
+    def test_api_returns_station_codes(self):
+        """Test responses show station codes rather than ids."""
+        response = self.client.get(f"{reverse('weather-list')}?station=USC00110072")
+        self.assertEqual(response.data["results"][0]["station"], "USC00110072")
+
+
+class PartitionTest(TestCase):
+    """Tests for the yearly partitions of WeatherRecord."""
+    def setUp(self):
+        """Write a station file spanning two years and a row without a date."""
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        with open(os.path.join(self.folder, "USC00110072.txt"), "w") as file:
+            file.write(
+                "20001231\t   10\t    0\t    1\n"
+                "20010101\t   20\t   10\t    2\n"
+                "-9999\t   30\t   20\t    3\n"
+            )
+        self.frame = parse_station_frame(
+            "USC00110072", os.path.join(self.folder, "USC00110072.txt")
+        )
+
+    def test_frame_by_year(self):
+        """Test frames split into one part per year plus the undated rows."""
+        parts = {year: len(part) for year, part in self.frame.by_year()}
+        self.assertEqual(parts, {2000: 1, 2001: 1, None: 1})
+
+    def test_swap_needs_partitioned_table(self):
+        """Test swapping a partition is refused when the table is not partitioned."""
+        if not is_partitioned():
+            with self.assertRaises(ValueError):
+                swap_partition(2000, lambda table: 0)
+
+    @skipUnless(connection.vendor == "postgresql", "Partitioning is PostgreSQL only")
+    def test_loading_routes_rows_into_partitions(self):
+        """Test ingestion routes rows into the yearly partitions created ahead of it."""
+        get_loader("copy").load_frame(self.frame)
+        self.assertTrue({2000, 2001} <= partition_years())
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {partition_name(2001)}")
+            self.assertEqual(cursor.fetchone()[0], 1)
+        self.assertEqual(WeatherRecord.objects.count(), 3)
+
+    @skipUnless(connection.vendor == "postgresql", "Partitioning is PostgreSQL only")
+    def test_partitions_are_created_ahead_of_loading(self):
+        """Test loaders never create partitions: rows of a year without one wait in the default partition."""
+        frame = StationFrame.from_rows(
+            "USC00110072", [("USC00110072", date(1900, 1, 1), 1, 2, 3)]
+        )
+        get_loader("copy").load_frame(frame)
+        self.assertNotIn(1900, partition_years())
+        ensure_partitions_ahead()
+        self.assertIn(1900, partition_years())
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {partition_name(1900)}")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    @skipUnless(connection.vendor == "postgresql", "Partitioning is PostgreSQL only")
+    def test_date_filter_prunes_partitions(self):
+        """Test a date filter only scans the partition of that year."""
+        get_loader("copy").load_frame(self.frame)
+        plan = WeatherRecord.objects.filter(date=date(2001, 1, 1)).explain()
+        self.assertIn(partition_name(2001), plan)
+        self.assertNotIn(partition_name(2000), plan)
+
+    @skipUnless(connection.vendor == "postgresql", "Partitioning is PostgreSQL only")
+    def test_reload_year_swaps_partition(self):
+        """Test reloading a year replaces its rows without touching other years."""
+        get_loader("copy").load_frame(self.frame)
+        WeatherRecord.objects.filter(date=date(2000, 12, 31)).update(precipitation=99)
+        self.assertEqual(reload_year(2000, folder=self.folder), 1)
+        self.assertEqual(
+            WeatherRecord.objects.get(date=date(2000, 12, 31)).precipitation, 1
+        )
+        self.assertEqual(WeatherRecord.objects.count(), 3)
+
+    @skipUnless(connection.vendor == "postgresql", "Partitioning is PostgreSQL only")
+    def test_reload_same_year_twice(self):
+        """Test a year can be swapped again, since the swap frees the staging index names."""
+        get_loader("copy").load_frame(self.frame)
+        self.assertEqual(reload_year(2000, folder=self.folder), 1)
+        self.assertEqual(reload_year(2000, folder=self.folder), 1)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM pg_class WHERE relname LIKE %s",
+                [f"{partition_name(2000)}_new%"],
+            )
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertEqual(WeatherRecord.objects.count(), 3)
+
+
+class RollupTest(APITestCase):
+    """Tests for the monthly and seasonal rollups and their endpoints."""
+    def setUp(self):
+        """Create a winter spanning two years, with one incomplete day."""
+        self.client = APIClient()
+        for day, maximum, minimum, precipitation in [
+            (date(2000, 12, 31), 10, 0, 5),
+            (date(2001, 1, 1), 20, 10, 7),
+            (date(2001, 1, 2), None, -10, 1),
+            (date(2001, 3, 1), 30, 20, 0),
+        ]:
+            WeatherRecord.objects.create(
+                station=make_station("A"),
+                date=day,
+                maximum_temperature=maximum,
+                minimum_temperature=minimum,
+                precipitation=precipitation,
+            )
+
+    def test_monthly_rollup(self):
+        """Test monthly aggregates with observation and missing-day counts."""
+        dump_rollups()
+        january = MonthlyStatistic.objects.get(station__code="A", year=2001, month=1)
+        self.assertEqual((january.observations, january.missing_days), (2, 30))
+        self.assertEqual((january.min_temperature, january.max_temperature), (-10, 20))
+        self.assertEqual(january.average_min_temperature, 0)
+        self.assertEqual(january.total_precipitation, 8)
+        self.assertEqual(MonthlyStatistic.objects.count(), 3)
+
+    def test_winter_spans_december(self):
+        """Test December counts towards the next year's winter."""
+        dump_rollups()
+        winter = SeasonalStatistic.objects.get(
+            station__code="A", year=2001, season=SeasonalStatistic.WINTER
+        )
+        self.assertEqual(winter.observations, 3)
+        self.assertEqual(winter.missing_days, 31 + 31 + 28 - 2)
+        self.assertFalse(SeasonalStatistic.objects.filter(year=2000).exists())
+
+    def test_incremental_refresh(self):
+        """Test touched years refresh their months and the winters they overlap only."""
+        dump_rollups()
+        MonthlyStatistic.objects.filter(month=3).update(observations=-1)
+        WeatherRecord.objects.create(
+            station=make_station("A"), date=date(2000, 12, 30), precipitation=1
+        )
+        dump_rollups({"A": {2000}})
+        self.assertEqual(
+            MonthlyStatistic.objects.get(year=2000, month=12).observations, 2
+        )
+        winter = SeasonalStatistic.objects.get(
+            year=2001, season=SeasonalStatistic.WINTER
+        )
+        self.assertEqual(winter.observations, 4)
+        self.assertEqual(MonthlyStatistic.objects.get(month=3).observations, -1)
+
+    def test_full_refresh_drops_empty_periods(self):
+        """Test a full refresh deletes the periods that no longer have rows."""
+        dump_rollups()
+        WeatherRecord.objects.filter(date__month=3).delete()
+        dump_rollups()
+        self.assertFalse(MonthlyStatistic.objects.filter(month=3).exists())
+        self.assertFalse(
+            SeasonalStatistic.objects.filter(season=SeasonalStatistic.SPRING).exists()
+        )
+        self.assertEqual(MonthlyStatistic.objects.count(), 2)
+
+    def test_endpoints(self):
+        """Test the rollup endpoints filter by station, year, month and season."""
+        dump_rollups()
+        response = self.client.get(
+            f"{reverse('weather-stats-monthly-list')}?station=A&year=2001&month=1"
+        )
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["station"], "A")
+        self.assertEqual(response.data["results"][0]["missing_days"], 30)
+        response = self.client.get(
+            f"{reverse('weather-stats-seasonal-list')}?season=winter&pagination=cursor"
+        )
+        self.assertEqual(
+            [(row["year"], row["season"]) for row in response.data["results"]],
+            [(2001, "winter")],
+        )
+        response = self.client.get(
+            f"{reverse('weather-stats-seasonal-list')}?season=monsoon"
+        )
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+
+class CropYieldTest(APITestCase):
+    """Tests for the corn yield data and its correlation with the weather statistics."""
+    def setUp(self):
+        """Load four years of yields and statistics for two stations."""
+        self.client = APIClient()
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = os.path.join(folder.name, "yield.txt")
+        with open(self.path, "w") as file:
+            file.write("2000\t100\n2001\t120\n2002\t90\n2003\t150\n2004\t130\n")
+        dump_yield_data(self.path)
+        for station, offset in (("A", 0), ("B", 2)):
+            for year, maximum, precipitation in [
+                (2000, 10, 50),
+                (2001, 12, 70),
+                (2002, 9, 20),
+                (2003, 15, 90),
+            ]:
+                Statistic.objects.create(
+                    station=make_station(station),
+                    year=year,
+                    average_max_temperature=maximum + offset,
+                    average_min_temperature=offset,
+                    total_precipitation=precipitation,
+                )
+
+    def test_dump_yield_data(self):
+        """Test yields are loaded once and only changed years count on reload."""
+        self.assertEqual(CropYield.objects.get(year=2001).corn_grain_yield, 120)
+        self.assertEqual(dump_yield_data(self.path), 0)
+        with open(self.path, "a") as file:
+            file.write("2005\t160\n")
+        self.assertEqual(dump_yield_data(self.path), 1)
+
+    def test_correlation_matches_numpy(self):
+        """Test the vectorised correlation equals numpy.corrcoef over the shared years."""
+        result = yield_correlation()
+        self.assertEqual(
+            (result["years"], result["year_from"], result["year_to"]), (4, 2000, 2003)
+        )
+        correlations = {row["metric"]: row for row in result["correlations"]}
+        expected = np.corrcoef([11, 13, 10, 16], [100, 120, 90, 150])[0, 1]
+        self.assertAlmostEqual(
+            correlations["average_max_temperature"]["r"], expected, places=4
+        )
+        self.assertIsNone(correlations["average_min_temperature"]["r"])
+
+    def test_correlation_endpoint(self):
+        """Test the endpoint applies station and year filters and rejects bad years."""
+        route = reverse("yield-correlation-list")
+        response = self.client.get(f"{route}?station=A&year_from=2001")
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data["years"], 3)
+        response = self.client.get(f"{route}?year_to=abc")
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse("yield-list"))
+        self.assertEqual(response.data["count"], 5)
+
+
+class AsyncViewTest(TestCase):
+    """Tests for the async list views."""
+    def setUp(self):
+        """Create records and statistics for two stations."""
+        for station in ("A", "B"):
+            for day in range(1, 4):
+                WeatherRecord.objects.create(
+                    station=make_station(station),
+                    date=date(2000, 1, day),
+                    maximum_temperature=day,
+                    precipitation=0,
+                )
+            Statistic.objects.create(
+                station=make_station(station),
+                year=2000,
+                average_max_temperature=2.5,
+                average_min_temperature=0,
+                total_precipitation=0,
+            )
+
+    def test_matches_sync_view(self):
+        """Test the async weather list returns the same page as /api/weather/."""
+        query = "?station=A,B&date_from=2000-01-02&limit=2&offset=2"
+        expected = self.client.get(reverse("weather-list") + query).json()
+        response = self.client.get(reverse("async-weather-list") + query).json()
+        expected["previous"] = expected["previous"].replace(
+            reverse("weather-list"), reverse("async-weather-list")
+        )
+        self.assertEqual(response, expected)
+        self.assertEqual((response["count"], response["count_exact"]), (4, True))
+        self.assertIsNone(response["next"])
+        self.assertNotIn("offset", response["previous"])
+
+    def test_count_estimate(self):
+        """Test the async views use the planner estimate above the threshold like the sync ones."""
+        with mock.patch("weather_api.pagination.estimate_count", return_value=2_000_000):
+            response = self.client.get(reverse("async-weather-list")).json()
+        self.assertEqual((response["count"], response["count_exact"]), (2_000_000, False))
+
+    def test_statistics(self):
+        """Test the async statistics list filters by station."""
+        response = self.client.get(f"{reverse('async-weather-stats-list')}?station=B")
+        self.assertEqual(response.json()["results"][0]["station"], "B")
+        self.assertEqual(response.json()["count"], 1)
+
+    def test_bad_filter(self):
+        """Test invalid filters are a bad request."""
+        response = self.client.get(f"{reverse('async-weather-list')}?date=abc")
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+
+class FakeConnection:
+    """Stands in for a DB-API connection in the pool tests."""
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(TestCase):
+    """Tests for the per-process connection pool."""
+    def test_reuses_returned_connections(self):
+        """Test a returned connection is handed out again instead of opening one."""
+        pool = ConnectionPool(max_size=2)
+        first = pool.checkout(FakeConnection)
+        pool.checkin(first)
+        self.assertIs(pool.checkout(FakeConnection), first)
+        stats = pool.stats()
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["in_use"], 1)
+
+    def test_exhaustion(self):
+        """Test checkouts beyond max_size wait, then time out and are counted."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.checkout(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(FakeConnection)
+        stats = pool.stats()
+        self.assertEqual(stats["exhausted"], 1)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertGreater(stats["wait_seconds_total"], 0)
+
+    def test_discards_unusable_connections(self):
+        """Test broken, closed and failing health check connections are replaced."""
+        pool = ConnectionPool(max_size=1, check=lambda connection: False, check_after=0)
+        first = pool.checkout(FakeConnection)
+        pool.checkin(first, reusable=False)
+        self.assertTrue(first.closed)
+        second = pool.checkout(FakeConnection)
+        pool.checkin(second)
+        self.assertIsNot(pool.checkout(FakeConnection), second)
+        self.assertEqual(pool.stats()["connections_closed"], 2)
+
+    def test_fork_keeps_parent_connections_open(self):
+        """Test a forked process forgets the parent's connections without closing or freeing them."""
+        pool = ConnectionPool(max_size=1)
+        connection = pool.checkout(FakeConnection)
+        pool.checkin(connection)
+        pool.pid = -1
+        self.assertEqual(pool.stats()["idle"], 0)
+        self.assertFalse(connection.closed)
+        self.assertIn(connection, _inherited)
+        self.assertIsNot(pool.checkout(FakeConnection), connection)
+
+
+@override_settings(RESPONSE_CACHE={"ENABLED": False})
+class LeanSerializationTest(APITestCase):
+    """Tests for serializing list pages from values() rows."""
+    def setUp(self):
+        """Create records, including missing measurements, and statistics for two stations."""
+        for station in ("A", "B"):
+            for day in range(1, 4):
+                WeatherRecord.objects.create(
+                    station=make_station(station),
+                    date=date(2000, 1, day),
+                    maximum_temperature=day,
+                    minimum_temperature=None if day == 2 else -day,
+                    precipitation=0,
+                )
+            Statistic.objects.create(
+                station=make_station(station),
+                year=2000,
+                average_max_temperature=2.5,
+                average_min_temperature=-1 / 3,
+                total_precipitation=0,
+            )
+
+    def assertSameBytes(self, url):
+        """Assert a response renders the same bytes with and without the lean path."""
+        with override_settings(API_LEAN_SERIALIZATION=False):
+            expected = self.client.get(url).content
+        with override_settings(API_LEAN_SERIALIZATION=True):
+            self.assertEqual(self.client.get(url).content, expected)
+
+    def test_weather_records(self):
+        """Test weather pages are byte identical, for offset and cursor pagination."""
+        self.assertSameBytes(reverse("weather-list") + "?limit=4&offset=1")
+        self.assertSameBytes(reverse("weather-list") + "?pagination=cursor&limit=2")
+
+    def test_statistics(self):
+        """Test statistic pages are byte identical."""
+        self.assertSameBytes(reverse("weather-stats-list"))
+        self.assertSameBytes(reverse("weather-stats-list") + "?station=B")
+
+    def test_benchmark(self):
+        """Test the serialization benchmark reports identical output for both paths."""
+        results = benchmark_serialization(rows=10, repeat=1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result["identical"] for result in results[1::2]))
+
+
+class ExportTest(APITestCase):
+    """Tests for the streaming /api/weather/export/ endpoint."""
+    def setUp(self):
+        """Create records for two stations, one with missing measurements."""
+        for station in ("A", "B"):
+            for day in range(1, 4):
+                WeatherRecord.objects.create(
+                    station=make_station(station),
+                    date=date(2000, 1, day),
+                    maximum_temperature=day,
+                    minimum_temperature=None if day == 2 else -day,
+                    precipitation=0,
+                )
+
+    def export(self, query="", **headers):
+        """Return the export response and its joined streamed body."""
+        with override_settings(EXPORT_CHUNK_SIZE=2):
+            response = self.client.get(reverse("weather-export-list") + query, **headers)
+        return response, b"".join(response.streaming_content)
+
+    def test_ndjson_matches_api(self):
+        """Test NDJSON lines are the records of /api/weather/ cursor pages, in the same order."""
+        response, body = self.export("?station=B&date_from=2000-01-02")
+        expected = self.client.get(
+            reverse("weather-list") + "?station=B&date_from=2000-01-02&pagination=cursor"
+        ).json()["results"]
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual([json.loads(line) for line in body.splitlines()], expected)
+
+    def test_csv(self):
+        """Test the CSV export has a header and empty cells for missing values."""
+        _, body = self.export("?output=csv&station=A")
+        rows = list(csv.reader(body.decode().splitlines()))
+        self.assertEqual(rows[0][:2], ["station", "date"])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[2], ["A", "2000-01-02", "2", "", "0"])
+
+    def test_gzip(self):
+        """Test the stream is gzip compressed when the client accepts it."""
+        response, body = self.export("?output=csv", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(gzip.decompress(body).decode().splitlines()), 7)
+
+    def test_bad_request(self):
+        """Test invalid filters and unknown formats are a bad request before streaming starts."""
+        for query in ("?date=abc", "?output=xml"):
+            response = self.client.get(reverse("weather-export-list") + query)
+            self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+
+class ColumnarSnapshotTest(APITestCase):
+    """Tests for answering ?group_by= aggregates from the columnar snapshot."""
+    def setUp(self):
+        """Create records over two months and two years, with missing values, in a temporary snapshot directory."""
+        for station in ("A", "B"):
+            for day in (date(2000, 1, 1), date(2000, 1, 2), date(2000, 2, 1), date(2001, 3, 1)):
+                WeatherRecord.objects.create(
+                    station=make_station(station),
+                    date=day,
+                    maximum_temperature=day.day * 10,
+                    minimum_temperature=None if day.month == 2 else -day.day,
+                    precipitation=None if station == "B" else day.month,
+                )
+        WeatherRecord.objects.create(station=make_station("A"), date=None)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            COLUMNAR_SNAPSHOT={"ENABLED": True, "DIR": directory.name},
+            RESPONSE_CACHE={"ENABLED": False},
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_matches_sql(self):
+        """Test snapshot aggregates render the same as the SQL GROUP BY for several filters."""
+        queries = [
+            "?group_by=month",
+            "?group_by=year",
+            "?group_by=month&station=B",
+            "?group_by=month&date_from=2000-01-02&date_to=2000-12-31",
+            "?group_by=year&date=2001-03-01",
+            "?group_by=year&station=unknown",
+            "?group_by=month&limit=2&offset=1",
+        ]
+        expected = {}
+        for query in queries:
+            expected[query] = self.client.get(reverse("weather-list") + query).json()
+        self.assertTrue(ensure_snapshot())
+        self.assertIsNotNone(current_snapshot())
+        for query in queries:
+            response = self.client.get(reverse("weather-list") + query).json()
+            self.assertEqual(response, expected[query], query)
+
+    def test_stale_snapshot(self):
+        """Test the SQL path is used until the snapshot of the current data version is built."""
+        ensure_snapshot()
+        bump_data_version()
+        self.assertIsNone(current_snapshot())
+        self.assertTrue(ensure_snapshot())
+        self.assertFalse(ensure_snapshot())
+        self.assertIsNotNone(current_snapshot())
+
+    def test_benchmark(self):
+        """Test the columnar benchmark finds the same aggregates as SQL."""
+        results = benchmark_columnar(repeat=1)
+        self.assertEqual(results[0]["name"], "build")
+        self.assertTrue(all(result["identical"] for result in results[1:]))
+
+
+class BenchmarkSuiteTest(TestCase):
+    """Tests for the synthetic data generator and the baseline comparison."""
+    def test_generated_files_parse(self):
+        """Test generated station files are valid wx_data files that both parsers read alike."""
+        with tempfile.TemporaryDirectory() as folder:
+            rows = generate_wx_data(folder, stations=2, first_year=2000, last_year=2000)
+            files = list(iter_station_files(folder))
+            self.assertEqual(rows, 732)
+            self.assertEqual(len(files), 2)
+            station, path = files[0]
+            self.assertEqual(parse_station_code(station)["country"], "US")
+            frame = parse_station_frame(station, path)
+            self.assertEqual(frame.rows(), parse_text_frame(station, path).rows())
+            self.assertEqual(frame.years(), {2000})
+            self.assertEqual(frame.rows()[59][1], date(2000, 2, 29))
+
+    def test_compare_results(self):
+        """Test regressions are flagged by direction, threshold and noise floor."""
+        baseline = {
+            "metrics": {
+                "load.rows_per_second": 1000,
+                "statistics.build_seconds": 2.0,
+                "queries.weather.p50_ms": 2.0,
+            }
+        }
+        results = {
+            "metrics": {
+                "load.rows_per_second": 700,
+                "statistics.build_seconds": 2.2,
+                "queries.weather.p50_ms": 2.9,
+            }
+        }
+        comparisons = {
+            item["metric"]: item for item in compare_results(results, baseline, 0.25)
+        }
+        self.assertTrue(comparisons["load.rows_per_second"]["regressed"])
+        self.assertFalse(comparisons["statistics.build_seconds"]["regressed"])
+        # 45% slower, but within the 1 ms noise floor.
+        self.assertFalse(comparisons["queries.weather.p50_ms"]["regressed"])
+
+
+class MetricsTest(APITestCase):
+    """Tests for the Prometheus metrics registry and the /metrics endpoint."""
+    def test_histogram_render(self):
+        """Test histogram buckets are cumulative and labels are escaped."""
+        histogram = Histogram("test_seconds", "Test.", labels=("route",), buckets=(0.1, 1))
+        histogram.observe(0.05, route='a"b')
+        histogram.observe(0.5, route='a"b')
+        histogram.observe(5, route='a"b')
+        samples = {name + labels: value for name, labels, value in histogram.samples()}
+        self.assertEqual(samples['test_seconds_bucket{route="a\\"b",le="0.1"}'], 1)
+        self.assertEqual(samples['test_seconds_bucket{route="a\\"b",le="1.0"}'], 2)
+        self.assertEqual(samples['test_seconds_bucket{route="a\\"b",le="+Inf"}'], 3)
+        self.assertEqual(samples['test_seconds_count{route="a\\"b"}'], 3)
+        self.assertEqual(samples['test_seconds_sum{route="a\\"b"}'], 5.55)
+
+    def test_metrics_endpoint(self):
+        """Test /metrics reports request latency and SQL per route, and cache lookups."""
+        hits = CACHE_REQUESTS.value(cache="response", result="hit")
+        self.client.get(reverse("weather-stats-list"))
+        self.client.get(reverse("weather-stats-list"))
+        self.assertEqual(CACHE_REQUESTS.value(cache="response", result="hit"), hits + 1)
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn(
+            'weather_http_request_duration_seconds_count{route="weather-stats-list",'
+            'method="GET",status="200"}',
+            body,
+        )
+        self.assertIn('weather_http_request_db_queries_count{route="weather-stats-list"}', body)
+        self.assertIn('weather_cache_hit_ratio{cache="response"}', body)
+        self.assertIn("# TYPE weather_serializer_seconds histogram", body)
+
+    async def test_async_view_records_queries(self):
+        """Test async requests record their SQL queries like sync ones."""
+        route = "async-weather-stats-list"
+        before = REQUEST_QUERIES.values.get((route,), [[], 0])[1]
+        response = await self.async_client.get(f"{reverse(route)}?station=ASYNC")
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertGreater(REQUEST_QUERIES.values[(route,)][1], before)
+
+    def test_multiprocess_snapshots(self):
+        """Test /metrics sums the snapshots every worker process wrote to the shared directory."""
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "1.json"), "w") as file:
+                json.dump({"weather_cache_requests_total": [[["other", "hit"], 3]]}, file)
+            metrics = {"MULTIPROCESS_DIR": directory, "FLUSH_INTERVAL": 1}
+            with override_settings(METRICS=metrics), mock.patch(
+                "weather_api.middleware.start_snapshot_flusher"
+            ):
+                record_cache("other", hit=False)
+                body = self.client.get("/metrics").content.decode()
+            self.assertTrue(os.path.exists(os.path.join(directory, f"{os.getpid()}.json")))
+        own = CACHE_REQUESTS.value(cache="other", result="miss")
+        self.assertIn('weather_cache_requests_total{cache="other",result="hit"} 3', body)
+        self.assertIn(f'weather_cache_requests_total{{cache="other",result="miss"}} {own}', body)
+        self.assertIn(f'weather_cache_hit_ratio{{cache="other"}} {3 / (3 + own)!r}', body)
+
+    def test_last_ingestion_run(self):
+        """Test the latest ingestion run is exported as gauges."""
+        IngestionRun.objects.create(
+            rows_parsed=100, parse_seconds=0.5, finished_at=timezone.now()
+        )
+        body = REGISTRY.render()
+        self.assertIn('weather_ingestion_last_run{stage="rows_parsed"} 100', body)
+        self.assertIn('weather_ingestion_last_run{stage="rows_parsed_per_second"} 200.0', body)
+        self.assertNotIn('stage="rows_inserted"', body)
+
+
+class ProfilingTest(APITestCase):
+    """Tests for the opt-in request and ingestion profiling."""
+    def setUp(self):
+        """Use a temporary profile folder."""
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.config = {
+            "ENABLED": True,
+            "HEADER": "X-Profile",
+            "TOKEN": "",
+            "SAMPLE_RATE": 0,
+            "SLOW_THRESHOLD": 0.5,
+            "DIR": self.folder.name,
+        }
+
+    def test_profiler_records_sql_timeline(self):
+        """Test the profiler saves a pstats file and the queries as trace events."""
+        with Profiler() as profiler:
+            Station.objects.count()
+        path = profiler.save("count", self.folder.name)
+        self.assertGreater(pstats.Stats(str(path)).total_calls, 0)
+        with open(os.path.join(self.folder.name, "count.trace.json")) as trace:
+            events = json.load(trace)["traceEvents"]
+        self.assertEqual(events[0]["name"], "count")
+        self.assertEqual([event["cat"] for event in events[1:]], ["sql"])
+        self.assertIn("COUNT(*)", events[1]["args"]["sql"])
+
+    def test_header_triggers_profile(self):
+        """Test only requests sending the header are profiled when nothing is sampled."""
+        with override_settings(PROFILING=self.config):
+            response = self.client.get(reverse("weather-stats-list"))
+            self.assertNotIn("X-Profile-Id", response)
+            self.assertEqual(os.listdir(self.folder.name), [])
+
+            response = self.client.get(
+                reverse("weather-stats-list"), HTTP_X_PROFILE="1"
+            )
+        name = response["X-Profile-Id"]
+        self.assertTrue(name.endswith("weather-stats-list"))
+        self.assertEqual(
+            sorted(os.listdir(self.folder.name)),
+            [f"{name}.prof", f"{name}.trace.json"],
+        )
+
+    def test_sampled_requests_kept_when_slow(self):
+        """Test sampled requests faster than the threshold leave no profile."""
+        config = {**self.config, "SAMPLE_RATE": 1.0, "SLOW_THRESHOLD": 60}
+        with override_settings(PROFILING=config):
+            response = self.client.get(reverse("weather-stats-list"))
+        self.assertNotIn("X-Profile-Id", response)
+        with override_settings(PROFILING={**config, "SLOW_THRESHOLD": 0}):
+            response = self.client.get(reverse("weather-stats-list"))
+        self.assertIn("X-Profile-Id", response)
+
+    def test_create_profile(self):
+        """Test create --profile writes a profile per phase."""
+        data = tempfile.TemporaryDirectory()
+        self.addCleanup(data.cleanup)
+        with open(os.path.join(data.name, "USC00000001.txt"), "w") as file:
+            file.write("19850101\t  -22\t -128\t   94\n")
+        with open(os.path.join(data.name, "yield.csv"), "w") as file:
+            file.write("1985\t100\n")
+        with override_settings(
+            WX_DATA_DIR=data.name,
+            YLD_DATA_FILE=os.path.join(data.name, "yield.csv"),
+            PROFILING=self.config,
+        ):
+            call_command("create", loader="orm", profile=True, stdout=io.StringIO())
+        profiles = sorted(
+            name.split("-")[-1]
+            for name in os.listdir(self.folder.name)
+            if name.endswith(".prof")
+        )
+        self.assertEqual(
+            profiles, ["ingest.prof", "quality.prof", "rollups.prof", "statistics.prof"]
+        )
+
+
+class ValidationTest(APITestCase):
+    """Tests for the validation rules, the quarantine and the station quality summaries."""
+    def setUp(self):
+        """Write a station file with one malformed line and three impossible rows."""
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        with open(os.path.join(self.folder.name, "USC00000001.txt"), "w") as file:
+            file.write(
+                "19850101\t  -22\t -128\t   94\n"
+                "19850102\t -300\t -217\t    0\n"
+                "19850103\t  -10\t  -20\t   -5\n"
+                "19850105\t  990\t  -20\t    0\n"
+                "19850106\t-9999\t -244\t-9999\n"
+                "not-a-row\n"
+            )
+
+    def test_validate_frame(self):
+        """Test each row is rejected for the first rule it fails, and rules are configurable."""
+        path = os.path.join(self.folder.name, "USC00000001.txt")
+        for parser in (parse_station_frame, parse_text_frame):
+            frame = parser("USC00000001", path)
+            self.assertEqual(frame.rejects, [("not-a-row", "malformed_row")])
+            valid, rejects = validate_frame(frame)
+            self.assertEqual(len(valid), 2)
+            self.assertEqual(
+                [(reason, part.rows()[0][1].day) for reason, part in rejects],
+                [
+                    ("max_below_min", 2),
+                    ("negative_precipitation", 3),
+                    ("temperature_out_of_range", 5),
+                ],
+            )
+        config = {**settings.VALIDATION, "RULES": ["negative_precipitation"]}
+        self.assertEqual(len(validate_frame(frame, config)[0]), 4)
+        with self.assertRaises(ValueError):
+            validate_frame(frame, {**config, "RULES": ["unknown"]})
+
+    def test_rejects_are_quarantined(self):
+        """Test rejected rows are quarantined instead of loaded, once per file content."""
+        result = dump_wx_data(folder=self.folder.name)
+        self.assertEqual((result.rows, result.quarantined), (2, 4))
+        self.assertEqual(WeatherRecord.objects.count(), 2)
+        self.assertEqual(
+            sorted(QuarantinedRecord.objects.values_list("reason", flat=True)),
+            [
+                "malformed_row",
+                "max_below_min",
+                "negative_precipitation",
+                "temperature_out_of_range",
+            ],
+        )
+        record = QuarantinedRecord.objects.get(reason="max_below_min")
+        self.assertEqual(
+            (record.date, record.maximum_temperature, record.minimum_temperature),
+            (date(1985, 1, 2), -300, -217),
+        )
+        dump_wx_data(folder=self.folder.name, force=True)
+        self.assertEqual(QuarantinedRecord.objects.count(), 4)
+
+    def test_quality_summary(self):
+        """Test the quality summary counts rows, gaps and quarantine reasons, and is served by the stats endpoint."""
+        dump_wx_data(folder=self.folder.name)
+        self.assertEqual(dump_quality(), 1)
+        quality = StationQuality.objects.get()
+        self.assertEqual((quality.records, quality.incomplete_records), (2, 1))
+        self.assertEqual((quality.first_date, quality.last_date), (date(1985, 1, 1), date(1985, 1, 6)))
+        self.assertEqual(quality.missing_days, 4)
+        self.assertAlmostEqual(quality.coverage, 2 / 6)
+        self.assertEqual(quality.quarantined_records, 4)
+        self.assertEqual(quality.quarantine_reasons["malformed_row"], 1)
+
+        response = self.client.get(
+            reverse("weather-stats-quality-list"), {"station": "USC00000001"}
+        )
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["station"], "USC00000001")
+        self.assertEqual(response.data["results"][0]["missing_days"], 4)
+
+
+class IngestionJobTest(APITestCase):
+    """Tests for queued ingestion runs, the ingestion lock and the ingestion API."""
+    def setUp(self):
+        """Write one station file and use a temporary lock file."""
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        with open(os.path.join(self.folder.name, "USC00000001.txt"), "w") as file:
+            file.write("19850101\t  -22\t -128\t   94\n19850102\t -122\t -217\t    0\n")
+        yields = os.path.join(self.folder.name, "yield.csv")
+        with open(yields, "w") as file:
+            file.write("1985\t100\n")
+        settings_override = override_settings(
+            WX_DATA_DIR=self.folder.name,
+            YLD_DATA_FILE=yields,
+            INGESTION={
+                **settings.INGESTION,
+                "LOCK_FILE": os.path.join(self.folder.name, "ingestion.lock"),
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_enqueue(self):
+        """Test identical queued runs are not duplicated and bad options are rejected."""
+        run, created = enqueue(loader="orm")
+        self.assertTrue(created)
+        self.assertEqual(run.options["loader"], "orm")
+        self.assertEqual(enqueue(loader="orm"), (run, False))
+        self.assertTrue(enqueue(loader="orm", force=True)[1])
+        limits = {**settings.INGESTION, "MAX_WORKERS": 4, "MAX_BATCH_SIZE": 10000}
+        with override_settings(INGESTION=limits):
+            self.assertEqual(enqueue(workers=4, batch_size=10000)[0].options["workers"], 4)
+            for options in ({"workers": 5}, {"batch_size": 10001}, {"workers": True}):
+                with self.assertRaises(ValueError):
+                    enqueue(**options)
+        for options in ({"loader": "fast"}, {"workers": 0}, {"unknown": 1}):
+            with self.assertRaises(ValueError):
+                enqueue(**options)
+
+    def test_run_pending(self):
+        """Test queued runs are run oldest first, with progress and outcome saved."""
+        first, _ = enqueue(loader="orm")
+        second, _ = enqueue(loader="orm", force=True)
+        stale = IngestionRun.objects.create(status=IngestionRun.RUNNING)
+        self.assertEqual(run_pending(), 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.status, IngestionRun.SUCCEEDED)
+        self.assertEqual((first.files_done, first.files_to_load), (1, 1))
+        self.assertEqual(first.rows_parsed, 2)
+        self.assertLess(first.started_at, second.started_at)
+        self.assertEqual(second.files_loaded, 1)
+        self.assertEqual(WeatherRecord.objects.count(), 2)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, IngestionRun.FAILED)
+
+    def test_failed_stage_fails_the_run(self):
+        """Test a stage that raises, or a station file that fails, marks the run failed with its error."""
+        run, _ = enqueue(loader="orm")
+        with mock.patch.object(
+            Statistic.objects, "bulk_create", side_effect=ValueError("disk full")
+        ):
+            run_pending()
+        run.refresh_from_db()
+        self.assertEqual(run.status, IngestionRun.FAILED)
+        self.assertEqual(run.error, "disk full")
+        self.assertEqual(run.statistics_upserted, 0)
+        self.assertEqual(Statistic.objects.count(), 0)
+
+        with open(os.path.join(self.folder.name, "USC00000000.txt"), "wb") as file:
+            file.write(b"\xff\xfe\x00")
+        run, _ = enqueue(loader="orm", force=True)
+        run_pending()
+        run.refresh_from_db()
+        self.assertEqual(run.status, IngestionRun.FAILED)
+        self.assertTrue(run.error.startswith("1 station file(s) failed to load: USC00000000: "))
+        self.assertEqual(Statistic.objects.count(), 1)
+
+    def test_partitions_are_created_under_the_lock(self):
+        """Test a queued run creates the partitions ahead only once it holds the ingestion lock."""
+        enqueue(loader="orm")
+        held = []
+
+        def check():
+            with ingestion_lock() as acquired:
+                held.append(not acquired)
+
+        with mock.patch("weather_api.jobs.ensure_partitions_ahead", side_effect=check):
+            run_pending()
+        self.assertEqual(held, [True])
+
+    def test_lock_held_elsewhere(self):
+        """Test nothing runs while another holder has the ingestion lock."""
+        run, _ = enqueue(loader="orm")
+        with ingestion_lock() as acquired:
+            self.assertTrue(acquired)
+            self.assertIsNone(run_pending())
+            with self.assertRaises(CommandError):
+                call_command("create", loader="orm")
+        run.refresh_from_db()
+        self.assertEqual(run.status, IngestionRun.QUEUED)
+
+    def test_api(self):
+        """Test the API queues a run, reports its status and checks the token."""
+        response = self.client.post(reverse("ingestion-list"), format="json")
+        self.assertEqual(response.status_code, 403)
+        self.client.credentials(HTTP_X_INGESTION_TOKEN="secret")
+        with override_settings(INGESTION={**settings.INGESTION, "TOKEN": "secret"}):
+            response = self.client.post(
+                reverse("ingestion-list"), {"loader": "orm"}, format="json"
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "queued")
+        run_pending()
+        response = self.client.get(reverse("ingestion-detail", args=[response.data["id"]]))
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data["status"], "succeeded")
+        self.assertEqual(response.data["rows_parsed"], 2)
+
+        with override_settings(INGESTION={**settings.INGESTION, "TOKEN": "secret"}):
+            response = self.client.post(
+                reverse("ingestion-list"), {"workers": "two"}, format="json"
+            )
+            self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+            self.client.credentials(HTTP_X_INGESTION_TOKEN="wrong")
+            response = self.client.post(reverse("ingestion-list"), format="json")
+            self.assertEqual(response.status_code, 403)
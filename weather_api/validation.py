@@ -0,0 +1,65 @@
+import numpy as np
+from django.conf import settings
+
+
+def max_below_min(frame, config):
+    """Rows whose maximum temperature is below their minimum."""
+    return np.ma.filled(frame.maximum_temperature < frame.minimum_temperature, False)
+
+
+def negative_precipitation(frame, config):
+    """Rows with a precipitation below zero."""
+    return np.ma.filled(frame.precipitation < 0, False)
+
+
+def temperature_out_of_range(frame, config):
+    """Rows with a temperature outside VALIDATION["TEMPERATURE_RANGE"], in tenths of a degree."""
+    low, high = config["TEMPERATURE_RANGE"]
+    out = np.zeros(len(frame), dtype=bool)
+    for column in (frame.maximum_temperature, frame.minimum_temperature):
+        out |= np.ma.filled((column < low) | (column > high), False)
+    return out
+
+
+def precipitation_out_of_range(frame, config):
+    """Rows with more daily precipitation than VALIDATION["MAX_PRECIPITATION"], in tenths of a millimetre."""
+    return np.ma.filled(frame.precipitation > config["MAX_PRECIPITATION"], False)
+
+
+# Rules run in this order; a row failing several is quarantined for the first.
+RULES = {
+    rule.__name__: rule
+    for rule in (
+        max_below_min,
+        negative_precipitation,
+        temperature_out_of_range,
+        precipitation_out_of_range,
+    )
+}
+# Reason codes set by the parsers for lines that never became rows.
+PARSE_REASONS = ("malformed_row", "invalid_date")
+REASONS = (*PARSE_REASONS, *RULES)
+
+
+def validate_frame(frame, config=None):
+    """
+    Applies the VALIDATION["RULES"] to a StationFrame with one vectorised
+    comparison per rule. Returns the frame of valid rows and a list of
+    (reason, frame) pairs holding the rejected ones.
+    """
+    config = config or settings.VALIDATION
+    unknown = set(config["RULES"]) - RULES.keys()
+    if unknown:
+        raise ValueError(
+            f"Unknown validation rules {sorted(unknown)}, choose from {sorted(RULES)}"
+        )
+    rejected = np.zeros(len(frame), dtype=bool)
+    rejects = []
+    for name in config["RULES"]:
+        failed = RULES[name](frame, config) & ~rejected
+        if failed.any():
+            rejects.append((name, frame[failed]))
+            rejected |= failed
+    if not rejects:
+        return frame, rejects
+    return frame[~rejected], rejects
@@ -0,0 +1,31 @@
+from time import monotonic
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from .models import DataVersion
+
+_cached = {"expires": 0.0, "value": None}
+
+
+def get_data_version():
+    """Returns the current DataVersion row, re-reading it at most every DATA_VERSION_CHECK_INTERVAL seconds."""
+    if _cached["value"] is None or monotonic() >= _cached["expires"]:
+        _cached["value"], _ = DataVersion.objects.get_or_create(pk=1)
+        _cached["expires"] = monotonic() + settings.DATA_VERSION_CHECK_INTERVAL
+    return _cached["value"]
+
+
+def data_version_token(version=None):
+    """Short string identifying a data version, for use in cache keys."""
+    version = version or get_data_version()
+    return f"{version.version}.{int(version.updated_at.timestamp() * 1e6)}"
+
+
+def bump_data_version():
+    """Marks the data as changed so every cached count and response becomes stale."""
+    DataVersion.objects.get_or_create(pk=1)
+    DataVersion.objects.filter(pk=1).update(
+        version=F("version") + 1, updated_at=timezone.now()
+    )
+    _cached["value"] = None
+    return get_data_version()
@@ -1,58 +1,196 @@
+import hmac
 from drf_yasg import openapi
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
-from rest_framework.mixins import ListModelMixin
+from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
 from rest_framework.viewsets import GenericViewSet
-from rest_framework.status import HTTP_400_BAD_REQUEST
-from weather_api.models import WeatherRecord, Statistic
-from weather_api.serializers import WeatherRecordSerializer, StatisticSerializer
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.status import (
+    HTTP_202_ACCEPTED,
+    HTTP_400_BAD_REQUEST,
+    HTTP_403_FORBIDDEN,
+)
+from weather_api.analytics import yield_correlation
+from weather_api.models import (
+    CropYield,
+    IngestionRun,
+    MonthlyStatistic,
+    SeasonalStatistic,
+    StationQuality,
+    Statistic,
+    WeatherRecord,
+)
+from weather_api.caching import cache_response
+from weather_api.columnar import current_snapshot
+from weather_api.metrics import SERIALIZER_SECONDS
+from weather_api.jobs import enqueue
+from weather_api.exports import CONTENT_TYPES, get_export, gzip_stream, iter_chunks
+from weather_api.stations import station_id, station_ids
+from weather_api.pagination import PaginationModeMixin
+from weather_api.serializers import (
+    CropYieldSerializer,
+    IngestionRunSerializer,
+    MonthlyStatisticSerializer,
+    SeasonalStatisticSerializer,
+    StationQualitySerializer,
+    StatisticSerializer,
+    WeatherAggregateSerializer,
+    WeatherRecordSerializer,
+    lean_columns,
+    lean_data,
+)
+from weather_api.queries import (
+    AGGREGATION_PERIODS,
+    aggregate_weather_records,
+    filter_rollups,
+    filter_weather_records,
+    split_stations,
+)
 
 
-class WeatherRecordViewSet(ListModelMixin, GenericViewSet):
+PAGINATION_PARAMETERS = [
+    openapi.Parameter(
+        "pagination",
+        openapi.IN_QUERY,
+        description="Set to 'cursor' for keyset pagination without a count.",
+        type=openapi.TYPE_STRING,
+        enum=["offset", "cursor"],
+    ),
+    openapi.Parameter(
+        "cursor",
+        openapi.IN_QUERY,
+        description="Opaque cursor taken from a previous cursor page.",
+        type=openapi.TYPE_STRING,
+    ),
+]
+
+WEATHER_FILTER_PARAMETERS = [
+    openapi.Parameter(
+        "date",
+        openapi.IN_QUERY,
+        description="Date of the record.",
+        type=openapi.TYPE_STRING,
+        format=openapi.FORMAT_DATE,
+    ),
+    openapi.Parameter(
+        "date_from",
+        openapi.IN_QUERY,
+        description="First date of a date range (inclusive).",
+        type=openapi.TYPE_STRING,
+        format=openapi.FORMAT_DATE,
+    ),
+    openapi.Parameter(
+        "date_to",
+        openapi.IN_QUERY,
+        description="Last date of a date range (inclusive).",
+        type=openapi.TYPE_STRING,
+        format=openapi.FORMAT_DATE,
+    ),
+    openapi.Parameter(
+        "station",
+        openapi.IN_QUERY,
+        description="Name of the station, or a comma separated list of stations.",
+        type=openapi.TYPE_STRING,
+    ),
+]
+
+ROLLUP_PARAMETERS = [
+    openapi.Parameter(
+        "station",
+        openapi.IN_QUERY,
+        description="Name of the station, or a comma separated list of stations.",
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        "year",
+        openapi.IN_QUERY,
+        description="Year of the stats.",
+        type=openapi.TYPE_INTEGER,
+    ),
+]
+
+
+class LeanSerializationMixin:
+    """
+    Serializes list pages straight from values() rows when
+    API_LEAN_SERIALIZATION is on, producing the same JSON as the view's
+    ModelSerializer without building model instances.
+    """
+
+    def get_page_data(self, queryset):
+        name = self.serializer_class.__name__
+        if not settings.API_LEAN_SERIALIZATION:
+            page = self.paginate_queryset(queryset)
+            with SERIALIZER_SECONDS.time(serializer=name):
+                return self.get_serializer(page, many=True).data
+        columns = lean_columns(self.serializer_class)
+        page = self.paginate_queryset(queryset.values(*columns))
+        with SERIALIZER_SECONDS.time(serializer=f"{name}.lean"):
+            return lean_data(self.serializer_class, page)
+
+
+class WeatherRecordViewSet(
+    LeanSerializationMixin, PaginationModeMixin, ListModelMixin, GenericViewSet
+):
     """ViewSet for listing WeatherRecord instances with optional date and station filters."""
     queryset = WeatherRecord.objects.all()
     serializer_class = WeatherRecordSerializer
+    keyset_ordering = ("station", "date")
+
+    def use_keyset_pagination(self):
+        # Aggregated rows have no (station, date) key to seek on.
+        if "group_by" in getattr(self.request, "query_params", {}):
+            return False
+        return super().use_keyset_pagination()
 
     @swagger_auto_schema(
         manual_parameters=[
+            *WEATHER_FILTER_PARAMETERS,
             openapi.Parameter(
-                "date",
+                "group_by",
                 openapi.IN_QUERY,
-                description="Date of the record.",
-                type=openapi.TYPE_STRING,
-                format=openapi.FORMAT_DATE,
-            ),
-            openapi.Parameter(
-                "station",
-                openapi.IN_QUERY,
-                description="Name of the station.",
+                description="Aggregate per station and month or year instead of listing days.",
                 type=openapi.TYPE_STRING,
+                enum=list(AGGREGATION_PERIODS),
             ),
+            *PAGINATION_PARAMETERS,
         ]
     )
+    @cache_response
     def list(self, request):
-        """List WeatherRecord instances, optionally filtered by date and/or station."""
+        """List WeatherRecord instances filtered by date, date range and stations, or their monthly/yearly aggregates."""
         try:
-            date = request.GET.get("date", None)
-            station = request.GET.get("station", None)
+            self.queryset = filter_weather_records(self.queryset, request.GET)
 
-            if date:
-                self.queryset = self.queryset.filter(date=date)
-            if station:
-                self.queryset = self.queryset.filter(station=station)
+            group_by = request.GET.get("group_by", None)
+            if group_by:
+                snapshot = current_snapshot()
+                if snapshot is not None:
+                    aggregates = snapshot.aggregate(request.GET, group_by)
+                else:
+                    aggregates = aggregate_weather_records(self.queryset, group_by)
+                page = self.paginate_queryset(aggregates)
+                with SERIALIZER_SECONDS.time(serializer="WeatherAggregateSerializer"):
+                    data = WeatherAggregateSerializer(
+                        page, many=True, context={"group_by": group_by}
+                    ).data
+                return self.get_paginated_response(data)
 
-            page = self.paginate_queryset(self.queryset)
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(self.get_page_data(self.queryset))
 
         except Exception as error:
             return Response({"error": str(error)}, status=HTTP_400_BAD_REQUEST)
 
 
-class StatisticViewSet(ListModelMixin, GenericViewSet):
+class StatisticViewSet(
+    LeanSerializationMixin, PaginationModeMixin, ListModelMixin, GenericViewSet
+):
     """ViewSet for listing Statistic instances with optional year and station filters."""
     queryset = Statistic.objects.all()
     serializer_class = StatisticSerializer
+    keyset_ordering = ("station", "year")
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -68,8 +206,10 @@ class StatisticViewSet(ListModelMixin, GenericViewSet):
                 description="Name of the station.",
                 type=openapi.TYPE_STRING,
             ),
+            *PAGINATION_PARAMETERS,
         ]
     )
+    @cache_response
     def list(self, request):
         """List Statistic instances, optionally filtered by year and/or station."""
         try:
@@ -79,11 +219,253 @@ class StatisticViewSet(ListModelMixin, GenericViewSet):
             if year:
                 self.queryset = self.queryset.filter(year=year)
             if station:
-                self.queryset = self.queryset.filter(station=station)
+                self.queryset = self.queryset.filter(station_id=station_id(station))
+
+            return self.get_paginated_response(self.get_page_data(self.queryset))
+
+        except Exception as error:
+            return Response({"error": str(error)}, status=HTTP_400_BAD_REQUEST)
+
+
+class MonthlyStatisticViewSet(
+    LeanSerializationMixin, PaginationModeMixin, ListModelMixin, GenericViewSet
+):
+    """ViewSet for listing monthly rollups with optional station, year and month filters."""
+    queryset = MonthlyStatistic.objects.all()
+    serializer_class = MonthlyStatisticSerializer
+    keyset_ordering = ("station", "year", "month")
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            *ROLLUP_PARAMETERS,
+            openapi.Parameter(
+                "month",
+                openapi.IN_QUERY,
+                description="Month of the stats (1-12).",
+                type=openapi.TYPE_INTEGER,
+            ),
+            *PAGINATION_PARAMETERS,
+        ]
+    )
+    @cache_response
+    def list(self, request):
+        """List monthly rollups, optionally filtered by stations, year and month."""
+        try:
+            self.queryset = filter_rollups(self.queryset, request.GET)
+            return self.get_paginated_response(self.get_page_data(self.queryset))
+
+        except Exception as error:
+            return Response({"error": str(error)}, status=HTTP_400_BAD_REQUEST)
+
+
+class SeasonalStatisticViewSet(PaginationModeMixin, ListModelMixin, GenericViewSet):
+    """ViewSet for listing seasonal rollups with optional station, year and season filters."""
+    queryset = SeasonalStatistic.objects.all()
+    serializer_class = SeasonalStatisticSerializer
+    keyset_ordering = ("station", "year", "season")
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            *ROLLUP_PARAMETERS,
+            openapi.Parameter(
+                "season",
+                openapi.IN_QUERY,
+                description="Meteorological season; winter belongs to the year of its January.",
+                type=openapi.TYPE_STRING,
+                enum=[name for _, name in SeasonalStatistic.SEASONS],
+            ),
+            *PAGINATION_PARAMETERS,
+        ]
+    )
+    @cache_response
+    def list(self, request):
+        """List seasonal rollups, optionally filtered by stations, year and season."""
+        try:
+            self.queryset = filter_rollups(self.queryset, request.GET)
+            page = self.paginate_queryset(self.queryset)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        except Exception as error:
+            return Response({"error": str(error)}, status=HTTP_400_BAD_REQUEST)
+
+
+class StationQualityViewSet(PaginationModeMixin, ListModelMixin, GenericViewSet):
+    """ViewSet for listing per station data quality summaries with an optional station filter."""
+    queryset = StationQuality.objects.all()
+    serializer_class = StationQualitySerializer
+    keyset_ordering = ("station",)
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "station",
+                openapi.IN_QUERY,
+                description="Station code, or a comma separated list of codes.",
+                type=openapi.TYPE_STRING,
+            ),
+            *PAGINATION_PARAMETERS,
+        ]
+    )
+    @cache_response
+    def list(self, request):
+        """List station quality summaries: loaded, incomplete and quarantined rows and missing-day coverage."""
+        try:
+            stations = split_stations(request.GET.get("station", None) or "")
+            if stations:
+                self.queryset = self.queryset.filter(station_id__in=station_ids(stations))
             page = self.paginate_queryset(self.queryset)
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
         except Exception as error:
             return Response({"error": str(error)}, status=HTTP_400_BAD_REQUEST)
+
+
+class IgnoreAcceptNegotiation(BaseContentNegotiation):
+    """Picks the first renderer whatever the Accept header says, for views that build their own response body."""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class WeatherExportViewSet(GenericViewSet):
+    """ViewSet streaming every WeatherRecord matching the /api/weather/ filters as NDJSON, CSV or Arrow."""
+    queryset = WeatherRecord.objects.all()
+    pagination_class = None
+    content_negotiation_class = IgnoreAcceptNegotiation
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            *WEATHER_FILTER_PARAMETERS,
+            openapi.Parameter(
+                "output",
+                openapi.IN_QUERY,
+                description="Export format; arrow needs pyarrow on the server.",
+                type=openapi.TYPE_STRING,
+                enum=list(CONTENT_TYPES),
+                default="ndjson",
+            ),
+        ],
+        responses={200: openapi.Response("Stream of records in the requested format.")},
+    )
+    def list(self, request):
+        """Stream the filtered records in station and date order; gzip compressed when the client accepts it."""
+        try:
+            output = request.GET.get("output", "ndjson")
+            export = get_export(output)
+            queryset = filter_weather_records(self.queryset, request.GET)
+        except Exception as error:
+            return Response({"error": str(error)}, status=HTTP_400_BAD_REQUEST)
+
+        stream = export(iter_chunks(queryset))
+        gzip = "gzip" in request.headers.get("Accept-Encoding", "")
+        response = StreamingHttpResponse(
+            gzip_stream(stream) if gzip else stream,
+            content_type=CONTENT_TYPES[output],
+        )
+        if gzip:
+            response["Content-Encoding"] = "gzip"
+        response["Vary"] = "Accept-Encoding"
+        response["Content-Disposition"] = f'attachment; filename="weather.{output}"'
+        return response
+
+
+class CropYieldViewSet(ListModelMixin, GenericViewSet):
+    """ViewSet for listing the yearly corn grain yields."""
+    queryset = CropYield.objects.all()
+    serializer_class = CropYieldSerializer
+
+    @cache_response
+    def list(self, request):
+        """List the yearly corn grain yields."""
+        return super().list(request)
+
+
+class YieldCorrelationViewSet(GenericViewSet):
+    """ViewSet correlating yearly corn grain yield with the yearly weather statistics."""
+    pagination_class = None
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "station",
+                openapi.IN_QUERY,
+                description="Only use the statistics of this station, or of a comma separated list of stations.",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "year_from",
+                openapi.IN_QUERY,
+                description="First year of the correlation window (inclusive).",
+                type=openapi.TYPE_INTEGER,
+            ),
+            openapi.Parameter(
+                "year_to",
+                openapi.IN_QUERY,
+                description="Last year of the correlation window (inclusive).",
+                type=openapi.TYPE_INTEGER,
+            ),
+        ],
+        responses={200: openapi.Response("Correlation of yield with each statistic.")},
+    )
+    @cache_response
+    def list(self, request):
+        """Pearson correlation and slope of corn yield against each yearly statistic averaged over the stations."""
+        try:
+            year_from = request.GET.get("year_from", None)
+            year_to = request.GET.get("year_to", None)
+            result = yield_correlation(
+                stations=split_stations(request.GET.get("station", None) or ""),
+                year_from=int(year_from) if year_from else None,
+                year_to=int(year_to) if year_to else None,
+            )
+            return Response(result)
+
+        except Exception as error:
+            return Response({"error": str(error)}, status=HTTP_400_BAD_REQUEST)
+
+
+class IngestionRunViewSet(ListModelMixin, RetrieveModelMixin, GenericViewSet):
+    """
+    ViewSet listing ingestion runs newest first, showing one run's status and
+    progress, and queueing a new run for `ingest_worker` to pick up.
+    """
+    queryset = IngestionRun.objects.all()
+    serializer_class = IngestionRunSerializer
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "force": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                "batch_size": openapi.Schema(type=openapi.TYPE_INTEGER),
+                "loader": openapi.Schema(type=openapi.TYPE_STRING),
+                "parser": openapi.Schema(type=openapi.TYPE_STRING),
+                "workers": openapi.Schema(type=openapi.TYPE_INTEGER),
+            },
+        ),
+        responses={202: IngestionRunSerializer()},
+    )
+    def create(self, request):
+        """Queue an ingestion run, or return the identical run that is already queued."""
+        token = settings.INGESTION["TOKEN"]
+        if not token:
+            return Response(
+                {"error": "Queueing ingestion runs is disabled until INGESTION_TOKEN is set"},
+                status=HTTP_403_FORBIDDEN,
+            )
+        if not hmac.compare_digest(request.headers.get("X-Ingestion-Token", ""), token):
+            return Response(
+                {"error": "A valid X-Ingestion-Token header is required"},
+                status=HTTP_403_FORBIDDEN,
+            )
+        try:
+            run, _ = enqueue(**request.data)
+            return Response(self.get_serializer(run).data, status=HTTP_202_ACCEPTED)
+
+        except Exception as error:
+            return Response({"error": str(error)}, status=HTTP_400_BAD_REQUEST)
@@ -47,6 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so its latency covers the rest of the middleware too.
+    "weather_api.middleware.MetricsMiddleware",
+    "weather_api.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -80,14 +83,36 @@ WSGI_APPLICATION = "weather_app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# With DATABASE_POOL_SIZE > 0 every process borrows its connections from a
+# pool of at most that many (weather_api.pool); otherwise each thread keeps a
+# persistent connection for DATABASE_CONN_MAX_AGE seconds, checked before reuse.
+DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", 0))
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "ENGINE": (
+            "weather_api.backends.postgresql"
+            if DATABASE_POOL_SIZE > 0
+            else "django.db.backends.postgresql"
+        ),
         "NAME": os.environ.get("DATABASE_NAME"),
         "USER": os.environ.get("DATABASE_USERNAME"),
         "PORT": os.environ.get("DATABASE_PORT"),
         "HOST": os.environ.get("DATABASE_HOSTNAME"),
         "PASSWORD": os.environ.get("DATABASE_PASSWORD"),
+        # Pooled connections go back to the pool at the end of each request.
+        "CONN_MAX_AGE": (
+            0
+            if DATABASE_POOL_SIZE > 0
+            else int(os.environ.get("DATABASE_CONN_MAX_AGE", 60))
+        ),
+        "CONN_HEALTH_CHECKS": os.environ.get("DATABASE_CONN_HEALTH_CHECKS", "true").lower()
+        == "true",
+        "POOL": {
+            "MAX_SIZE": DATABASE_POOL_SIZE,
+            "TIMEOUT": float(os.environ.get("DATABASE_POOL_TIMEOUT", 30)),
+            "MAX_LIFETIME": float(os.environ.get("DATABASE_POOL_MAX_LIFETIME", 3600)),
+        },
     }
 }
 
@@ -111,10 +136,182 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'weather_api.pagination.EstimatedCountPagination',
     'PAGE_SIZE': 100
 }
 
+# "offset" keeps limit/offset pages with a count, "cursor" switches the list
+# endpoints to keyset pagination. Clients can also pass ?pagination=cursor.
+API_PAGINATION_MODE = os.environ.get("API_PAGINATION_MODE", "offset")
+
+# Counts of querysets the planner expects to exceed this many rows are served
+# from the estimate; smaller ones are counted exactly and cached until the
+# next ingestion bumps the data version.
+API_COUNT_ESTIMATE_THRESHOLD = int(os.environ.get("API_COUNT_ESTIMATE_THRESHOLD", 100000))
+
+API_COUNT_CACHE = "default"
+
+API_COUNT_CACHE_TIMEOUT = int(os.environ.get("API_COUNT_CACHE_TIMEOUT", 3600))
+
+# Serialize the record, statistic and monthly list pages from values() rows
+# instead of ModelSerializer instances; the JSON is the same either way.
+API_LEAN_SERIALIZATION = os.environ.get("API_LEAN_SERIALIZATION", "true").lower() == "true"
+
+# Rows fetched per server-side cursor round trip, and encoded per chunk, by
+# /api/weather/export/.
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 2000))
+
+# Seconds a process trusts its copy of the data version before re-reading it;
+# 0 re-reads the single DataVersion row on every request.
+DATA_VERSION_CHECK_INTERVAL = float(os.environ.get("DATA_VERSION_CHECK_INTERVAL", 0))
+
+# Caches
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Shared store for RESPONSE_CACHE when it uses DjangoCacheBackend: Redis
+    # when REDIS_URL is set, otherwise a file based local stand-in.
+    "responses": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+        if os.environ.get("REDIS_URL")
+        else {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / "data" / "response_cache",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    ),
+}
+
+# Rendered list responses, keyed on path, query string and data version.
+# Use "weather_api.caching.DjangoCacheBackend" to share them between processes.
+RESPONSE_CACHE = {
+    "ENABLED": os.environ.get("RESPONSE_CACHE_ENABLED", "true").lower() == "true",
+    "BACKEND": os.environ.get(
+        "RESPONSE_CACHE_BACKEND", "weather_api.caching.LocMemLRUBackend"
+    ),
+    "OPTIONS": {"max_entries": int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 512))},
+}
+
+# Data ingestion
+
+WX_DATA_DIR = os.environ.get("WX_DATA_DIR", BASE_DIR / "data" / "wx_data")
+
+YLD_DATA_FILE = os.environ.get(
+    "YLD_DATA_FILE", BASE_DIR / "data" / "yld_data" / "US_corn_grain_yield.txt"
+)
+
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", 5000))
+
+# "copy" streams batches through PostgreSQL COPY, "orm" uses bulk_create and
+# "auto" picks COPY whenever the database is PostgreSQL.
+INGEST_LOADER = os.environ.get("INGEST_LOADER", "auto")
+
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", 1))
+
+# On PostgreSQL, WeatherRecord gets a partition per year from this one up to
+# next year ahead of ingestion; rows of other years land in the default
+# partition until the next migrate or ingestion run gives them their own.
+PARTITION_FIRST_YEAR = int(os.environ.get("PARTITION_FIRST_YEAR", 1985))
+
+# "numpy" parses a station file into columns in one vectorised pass, "text"
+# is the row by row reference parser.
+INGEST_PARSER = os.environ.get("INGEST_PARSER", "numpy")
+
+# Ingestion runs queued through POST /api/ingestion/ or `ingest_worker
+# --enqueue` are run by `ingest_worker`. POLL_INTERVAL is its seconds between
+# checks for queued runs, LOCK_FILE the lock guarding them on databases without
+# advisory locks, and TOKEN the X-Ingestion-Token value the API requires to
+# queue a run; the API refuses to queue runs while it is empty. A run asking
+# for more than MAX_WORKERS processes or MAX_BATCH_SIZE rows per batch is
+# rejected.
+INGESTION = {
+    "POLL_INTERVAL": float(os.environ.get("INGESTION_POLL_INTERVAL", 5)),
+    "LOCK_FILE": os.environ.get(
+        "INGESTION_LOCK_FILE", BASE_DIR / "data" / "ingestion.lock"
+    ),
+    "TOKEN": os.environ.get("INGESTION_TOKEN", ""),
+    "MAX_WORKERS": int(
+        os.environ.get("INGESTION_MAX_WORKERS", max(os.cpu_count() or 1, INGEST_WORKERS))
+    ),
+    "MAX_BATCH_SIZE": int(
+        os.environ.get("INGESTION_MAX_BATCH_SIZE", max(50000, INGEST_BATCH_SIZE))
+    ),
+}
+
+# Rules every parsed row must pass to be loaded; failing rows go to the
+# QuarantinedRecord table with the rule name as reason. Temperatures are in
+# tenths of a degree Celsius, precipitation in tenths of a millimetre.
+VALIDATION = {
+    "RULES": [
+        rule.strip()
+        for rule in os.environ.get(
+            "VALIDATION_RULES",
+            "max_below_min,negative_precipitation,temperature_out_of_range,"
+            "precipitation_out_of_range",
+        ).split(",")
+        if rule.strip()
+    ],
+    "TEMPERATURE_RANGE": (
+        int(os.environ.get("VALIDATION_MIN_TEMPERATURE", -900)),
+        int(os.environ.get("VALIDATION_MAX_TEMPERATURE", 600)),
+    ),
+    "MAX_PRECIPITATION": int(os.environ.get("VALIDATION_MAX_PRECIPITATION", 20000)),
+}
+
+# Columnar copy of WeatherRecord (one memory-mapped .npy file per column),
+# rebuilt by `create` after each ingestion. When enabled, ?group_by= aggregates
+# are computed from it with NumPy instead of a SQL GROUP BY.
+COLUMNAR_SNAPSHOT = {
+    "ENABLED": os.environ.get("COLUMNAR_SNAPSHOT_ENABLED", "false").lower() == "true",
+    "DIR": os.environ.get("COLUMNAR_SNAPSHOT_DIR", BASE_DIR / "data" / "columnar"),
+}
+
+# Logging
+
+# Everything goes to log.log at LOG_LEVEL. DEBUG adds the per-batch ingestion
+# lines and, while DEBUG is on, every SQL query Django runs.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "default": {"format": "%(asctime)s - %(levelname)s - %(message)s"},
+    },
+    "handlers": {
+        "file": {
+            "class": "logging.FileHandler",
+            "filename": os.environ.get("LOG_FILE", "log.log"),
+            "formatter": "default",
+        },
+    },
+    "root": {"handlers": ["file"], "level": os.environ.get("LOG_LEVEL", "INFO")},
+}
+
+# Metrics live in each process. With MULTIPROCESS_DIR set (start does so for
+# the uvicorn workers), every process writes its counters and histograms there
+# every FLUSH_INTERVAL seconds and /metrics sums the files of all of them.
+METRICS = {
+    "MULTIPROCESS_DIR": os.environ.get("METRICS_MULTIPROCESS_DIR", ""),
+    "FLUSH_INTERVAL": float(os.environ.get("METRICS_FLUSH_INTERVAL", 1)),
+}
+
+# Opt-in request profiling: requests sending HEADER (with TOKEN as its value
+# when TOKEN is set) are profiled, and so is a random SAMPLE_RATE share of the
+# others, kept only when slower than SLOW_THRESHOLD seconds. Each profile is a
+# .prof (pstats) file plus a .trace.json SQL timeline in DIR.
+PROFILING = {
+    "ENABLED": os.environ.get("PROFILING_ENABLED", "false").lower() == "true",
+    "HEADER": os.environ.get("PROFILING_HEADER", "X-Profile"),
+    "TOKEN": os.environ.get("PROFILING_TOKEN", ""),
+    "SAMPLE_RATE": float(os.environ.get("PROFILING_SAMPLE_RATE", 0)),
+    "SLOW_THRESHOLD": float(os.environ.get("PROFILING_SLOW_THRESHOLD", 0.5)),
+    "DIR": os.environ.get("PROFILE_DIR", BASE_DIR / "data" / "profiles"),
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -4,7 +4,19 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
-from weather_api.views import StatisticViewSet, WeatherRecordViewSet
+from weather_api import async_views
+from weather_api.metrics import metrics_view
+from weather_api.views import (
+    CropYieldViewSet,
+    IngestionRunViewSet,
+    MonthlyStatisticViewSet,
+    SeasonalStatisticViewSet,
+    StationQualityViewSet,
+    StatisticViewSet,
+    WeatherExportViewSet,
+    WeatherRecordViewSet,
+    YieldCorrelationViewSet,
+)
 
 """
 URL configuration for the weather_app project, including API endpoints, admin interface, and API documentation.
@@ -19,10 +31,40 @@ schema_view = get_schema_view(
 )
 router = DefaultRouter()
 router.register(r"weather", viewset=WeatherRecordViewSet, basename="weather")
+router.register(
+    r"weather/export", viewset=WeatherExportViewSet, basename="weather-export"
+)
 router.register(r"weather/stats", viewset=StatisticViewSet, basename="weather-stats")
+router.register(
+    r"weather/stats/monthly",
+    viewset=MonthlyStatisticViewSet,
+    basename="weather-stats-monthly",
+)
+router.register(
+    r"weather/stats/seasonal",
+    viewset=SeasonalStatisticViewSet,
+    basename="weather-stats-seasonal",
+)
+router.register(
+    r"weather/stats/quality",
+    viewset=StationQualityViewSet,
+    basename="weather-stats-quality",
+)
+router.register(r"yield", viewset=CropYieldViewSet, basename="yield")
+router.register(r"ingestion", viewset=IngestionRunViewSet, basename="ingestion")
+router.register(
+    r"yield/correlation", viewset=YieldCorrelationViewSet, basename="yield-correlation"
+)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
+    path("api/async/weather/", async_views.weather_records, name="async-weather-list"),
+    path(
+        "api/async/weather/stats/",
+        async_views.statistics,
+        name="async-weather-stats-list",
+    ),
     path("api/", include(router.urls)),
     re_path(
         r"^swagger(?P<format>\.json|\.yaml)$",